@@ -0,0 +1,60 @@
+"""
+Shared helpers for the TrueKey Login Deleter benchmarks.
+"""
+
+import os
+import random
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Make the truekey_deleter package importable when run from the benchmarks directory
+sys.path.insert(0, REPO_DIR)
+
+
+def make_synthetic_tree(root, files, dirs_per_level=20, min_size=200, max_size=8192, seed=0):
+    """
+    Generate a directory tree of small files shaped like a Chrome Extensions tree.
+
+    Args:
+        root (str): Directory to create the tree in
+        files (int): Number of files to create
+        dirs_per_level (int): Fan-out of the two directory levels
+        min_size (int): Smallest file size in bytes
+        max_size (int): Largest file size in bytes
+        seed (int): Random seed so runs are comparable
+
+    Returns:
+        int: Total number of bytes written
+    """
+    rng = random.Random(seed)
+    total = 0
+    for i in range(files):
+        directory = os.path.join(root, f"ext{i % dirs_per_level:02d}",
+                                 f"dir{(i // dirs_per_level) % dirs_per_level:02d}")
+        os.makedirs(directory, exist_ok=True)
+        size = rng.randint(min_size, max_size)
+        with open(os.path.join(directory, f"file{i:06d}.js"), "wb") as f:
+            f.write(os.urandom(size))
+        total += size
+    return total
+
+
+def timed(func, *args, **kwargs):
+    """Run a function and return (seconds, result)."""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def print_results(title, rows):
+    """Print benchmark rows of (name, seconds, note)."""
+    print(title)
+    print("=" * 60)
+    for name, seconds, note in rows:
+        if seconds is None:
+            print(f"{name:<12} {'n/a':>10}  {note}")
+        else:
+            print(f"{name:<12} {seconds * 1000:>8.1f}ms  {note}")
+    sys.stdout.flush()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the UI deletion engines against the offline dashboard fixture.
+
+Loads fixtures/dashboard.html in headless Chrome and deletes every row with
+the WebDriver, in-page JavaScript, DevTools Protocol (cdp) and pipelined
+engines.
+Requires Chrome and chromedriver.
+
+Usage:
+    python3 benchmarks/bench_backends.py [--logins N] [--engines webdriver js cdp pipeline] [--delay MS]
+
+Arguments:
+    --logins: Rows rendered by the fixture (default: 200)
+    --engines: Engines to benchmark (default: webdriver js cdp pipeline)
+    --depth: Maximum deletions in flight for the pipeline engine (default: 8)
+    --delay: Milliseconds the fixture waits before removing a confirmed row (default: 0)
+"""
+
+import argparse
+import os
+from unittest.mock import patch
+
+from _common import REPO_DIR, print_results, timed
+
+from truekey_deleter.engines import delete_with_cdp, delete_with_javascript, delete_with_webdriver
+from truekey_deleter.pipeline import delete_with_pipeline
+from truekey_deleter.waits import WaitEngine
+
+
+def fixture_url(logins, delay):
+    """Return the file:// URL of the dashboard fixture."""
+    path = os.path.join(REPO_DIR, "fixtures", "dashboard.html")
+    return f"file://{path}?logins={logins}&delay={delay}"
+
+
+def run_engine(driver, engine, depth):
+    """Delete every fixture row with one engine and return the count."""
+    with patch("builtins.print"):
+        if engine == "webdriver":
+            waits = WaitEngine(driver, timeout=5, poll_interval=0.01)
+            return delete_with_webdriver(driver, waits)
+        if engine == "js":
+            return delete_with_javascript(driver, batch_size=50, timeout=5)
+        if engine == "cdp":
+            return delete_with_cdp(driver, timeout=5)
+        return delete_with_pipeline(driver, depth=depth, timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the UI deletion engines")
+    parser.add_argument("--logins", type=int, default=200, help="Rows rendered by the fixture")
+    parser.add_argument("--engines", nargs="+", default=["webdriver", "js", "cdp", "pipeline"],
+                        choices=["webdriver", "js", "cdp", "pipeline"], help="Engines to benchmark")
+    parser.add_argument("--depth", type=int, default=8,
+                        help="Maximum deletions in flight for the pipeline engine")
+    parser.add_argument("--delay", type=int, default=0,
+                        help="Milliseconds before a confirmed row is removed")
+    args = parser.parse_args()
+
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    driver = webdriver.Chrome(options=options)
+    try:
+        rows = []
+        baseline = None
+        for engine in args.engines:
+            driver.get(fixture_url(args.logins, args.delay))
+            seconds, deleted = timed(run_engine, driver, engine, args.depth)
+            baseline = baseline or seconds
+            rows.append((engine, seconds, f"{deleted} rows, {seconds / max(deleted, 1) * 1000:.2f}ms/row, "
+                                          f"{baseline / seconds:.2f}x vs {args.engines[0]}"))
+        print_results(f"Deleting {args.logins} fixture rows", rows)
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
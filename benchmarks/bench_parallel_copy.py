@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark the thread-pooled profile copy against shutil.copytree.
+
+Generates a tree of small files (50k by default, like a large Extensions
+directory) and copies it with shutil.copytree and with sync_tree at several
+worker counts.
+
+Usage:
+    python3 benchmarks/bench_parallel_copy.py [--files N] [--workers 1 4 8 16] [--dir PATH]
+
+Arguments:
+    --files: Number of files in the synthetic tree (default: 50000)
+    --workers: Worker counts to benchmark (default: 1 4 8 16)
+    --dir: Directory to run in; pick one on the filesystem you want to test
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from _common import make_synthetic_tree, print_results, timed
+
+from truekey_deleter.profile import FileCloner, format_bytes, sync_tree
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel profile copying")
+    parser.add_argument("--files", type=int, default=50000, help="Files in the synthetic tree")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16],
+                        help="Worker counts to benchmark")
+    parser.add_argument("--dir", default=None, help="Directory to run the benchmark in")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="truekey-copy-bench-", dir=args.dir)
+    try:
+        src = os.path.join(work_dir, "src")
+        total = make_synthetic_tree(src, args.files, dirs_per_level=40, max_size=2048)
+
+        seconds, _ = timed(shutil.copytree, src, os.path.join(work_dir, "copytree"))
+        rows = [("copytree", seconds, "baseline")]
+        for workers in args.workers:
+            dst = os.path.join(work_dir, f"workers-{workers}")
+            elapsed, _ = timed(sync_tree, src, dst, cloner=FileCloner("copy"),
+                               workers=workers)
+            rows.append((f"{workers} workers", elapsed, f"{seconds / elapsed:.2f}x vs copytree"))
+        print_results(f"Copying {args.files} files ({format_bytes(total)})", rows)
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark profile cloning strategies on a synthetic profile tree.
+
+Compares cloning a generated Extensions-like tree into an empty TrueKey
+profile with reflinks, hardlinks and plain copies. Reflinks are reported as
+unsupported when the filesystem cannot clone (e.g. ext4, tmpfs).
+
+Usage:
+    python3 benchmarks/bench_profile_clone.py [--files N] [--dir PATH]
+
+Arguments:
+    --files: Number of files in the synthetic tree (default: 5000)
+    --dir: Directory to run in; pick one on the filesystem you want to test
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from _common import make_synthetic_tree, print_results, timed
+
+from truekey_deleter.profile import FileCloner, format_bytes, sync_tree
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark profile cloning strategies")
+    parser.add_argument("--files", type=int, default=5000, help="Files in the synthetic tree")
+    parser.add_argument("--dir", default=None, help="Directory to run the benchmark in")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="truekey-clone-bench-", dir=args.dir)
+    try:
+        src = os.path.join(work_dir, "src")
+        total = make_synthetic_tree(src, args.files)
+        rows = []
+        for strategy in ("copy", "hardlink", "reflink"):
+            dst = os.path.join(work_dir, f"dst-{strategy}")
+            cloner = FileCloner(strategy)
+            try:
+                seconds, _ = timed(sync_tree, src, dst, cloner=cloner, read_only=True)
+                rows.append((strategy, seconds, f"{cloner.describe()}"))
+            except OSError as e:
+                rows.append((strategy, None, f"unsupported here ({e.strerror})"))
+        print_results(f"Cloning {args.files} files ({format_bytes(total)})", rows)
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark the WebDriver deletion loop against the simulated dashboard.
+
+Runs delete_with_webdriver() against test_mocks.SimulatedWebDriver, which
+models rows, staleness, the confirmation dialog, command latency (on a
+virtual clock) and failure rates without a browser. The wall time measures
+the loop's own CPU cost; the virtual time estimates the run against a real
+browser with the given per-command latency.
+
+Usage:
+    python3 benchmarks/bench_simulated_loop.py [--rows N] [--latency SECONDS] [--stale-rate P]
+                                               [--failure-rate P] [--no-confirm]
+
+Arguments:
+    --rows: Login rows on the simulated dashboard (default: 100000)
+    --latency: Virtual seconds per WebDriver command (default: 0.002)
+    --stale-rate: Probability that a row is re-rendered right before its click (default: 0)
+    --failure-rate: Probability that a click is intercepted (default: 0)
+    --no-confirm: Delete rows without a confirmation dialog
+"""
+
+import argparse
+import builtins
+from unittest.mock import patch
+
+from _common import print_results, timed
+
+from test_mocks import SimulatedWebDriver
+from truekey_deleter.engines import delete_with_webdriver
+from truekey_deleter.instrumentation import StepTimer
+from truekey_deleter.waits import WaitEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the deletion loop against the simulated dashboard")
+    parser.add_argument("--rows", type=int, default=100000, help="Login rows on the simulated dashboard")
+    parser.add_argument("--latency", type=float, default=0.002, help="Virtual seconds per WebDriver command")
+    parser.add_argument("--stale-rate", type=float, default=0.0,
+                        help="Probability that a row is re-rendered before its click")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Probability that a click is intercepted")
+    parser.add_argument("--no-confirm", action="store_true", help="Delete rows without a confirmation dialog")
+    args = parser.parse_args()
+
+    driver = SimulatedWebDriver(args.rows, confirm=not args.no_confirm, latency=args.latency,
+                                stale_rate=args.stale_rate, click_failure_rate=args.failure_rate)
+    waits = WaitEngine(driver, timeout=1, poll_interval=0.001)
+    stats = {}
+    timer = StepTimer()
+    # A no-op print: a Mock would record every "Deleted item" call
+    with patch.object(builtins, "print", lambda *args, **kwargs: None):
+        seconds, deleted = timed(delete_with_webdriver, driver, waits, stats, timer=timer)
+
+    item = timer.summary().get("item", {})
+    print_results(f"Deleting {args.rows} simulated rows", [
+        ("loop", seconds, f"{deleted} deleted, {stats['skipped']} skipped, "
+                          f"{stats['stale_retries']} stale retries, {seconds / max(deleted, 1) * 1e6:.1f}us/row"),
+        ("virtual", driver.clock, f"{driver.stats['commands']} commands, "
+                                  f"{driver.stats['commands'] / max(deleted, 1):.1f} per row, "
+                                  f"item p99 {item.get('p99', 0) * 1e6:.1f}us wall"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the deletion loop.
+
+Serves the synthetic dashboard fixture (fixtures/dashboard.html) from a
+loopback HTTP server, or loads it from disk with --file, and runs the real
+DeletionSession code against it in headless Chrome. Each engine runs at
+every size; the default sizes are 100, 1,000 and 10,000 rows. Results,
+including per-step p50/p95/p99 timings, are written as JSON. A later run
+can be compared against a stored baseline to catch slowdowns.
+Requires Chrome and chromedriver.
+
+Usage:
+    python3 benchmarks/run_benchmarks.py [--sizes N ...] [--engines ENGINE ...] [--file]
+                                         [--delay MS] [--render MS] [--dialog MS] [--window N] [--no-confirm]
+                                         [--repeat N] [--output FILE] [--compare BASELINE]
+                                         [--tolerance FRACTION]
+
+Arguments:
+    --sizes: Rows rendered by the fixture per case (default: 100 1000 10000)
+    --engines: Engines to benchmark (default: webdriver js cdp pipeline)
+    --file: Load the fixture from a file:// URL instead of the loopback server
+    --delay: Milliseconds before a confirmed row is removed (default: 0)
+    --render: Milliseconds before the fixture renders its rows (default: 0)
+    --dialog: Milliseconds before the confirmation dialog opens (default: 0)
+    --window: Render the rows lazily in windows of N rows (default: 0, all at once)
+    --no-confirm: Delete rows without a confirmation dialog
+    --depth: Maximum deletions in flight for the pipeline engine (default: 8)
+    --batch-size: Rows per in-page batch for the js engine (default: 50)
+    --repeat: Runs per case; the median run is reported (default: 1)
+    --output: Result file (default: benchmarks/results/benchmark-<timestamp>.json)
+    --compare: Earlier result file to compare items/second against
+    --tolerance: Allowed items/second drop before a case counts as slower (default: 0.15)
+
+Exit Codes:
+    0: Success
+    1: At least one case was slower than the baseline (--compare)
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from _common import REPO_DIR
+
+from truekey_deleter.config import SessionConfig
+from truekey_deleter.instrumentation import build_run_report
+from truekey_deleter.session import DeletionSession
+
+FIXTURES_DIR = os.path.join(REPO_DIR, "fixtures")
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+RESULT_FORMAT_VERSION = 1
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that does not log every request."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_fixtures():
+    """Serve the fixtures directory on a free loopback port and yield its base URL."""
+    handler = functools.partial(QuietHandler, directory=FIXTURES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def fixture_url(base_url, logins, args):
+    """Return the dashboard fixture URL for one case."""
+    return (f"{base_url}/dashboard.html?logins={logins}&delay={args.delay}&render={args.render}"
+            f"&dialog={args.dialog}&window={args.window}&confirm={0 if args.no_confirm else 1}")
+
+
+def run_case(driver, url, engine, args, work_dir):
+    """
+    Delete every fixture row once with the real session code.
+
+    Returns:
+        dict: Case result with the deletion-phase throughput and step percentiles
+    """
+    config = SessionConfig(dashboard_url=url, truekey_profile_dir=work_dir, engine=engine,
+                           batch_size=args.batch_size, pipeline_depth=args.depth,
+                           wait_timeout=10.0, poll_interval=0.01, ready_timeout=30.0 + args.render / 1000,
+                           interactive=False, journal_fsync="never")
+    with patch("builtins.print"):
+        stats = DeletionSession(config, driver=driver).run()
+    report = build_run_report(stats)
+    return {
+        "deleted": report["deleted"],
+        "skipped": report["skipped"],
+        "seconds": report["deletion_seconds"],
+        "items_per_second": report["items_per_second"],
+        "steps": {name: {key: step[key] for key in ("count", "p50", "p95", "p99")}
+                  for name, step in report["steps"].items()},
+        "counters": report["counters"],
+    }
+
+
+def median_run(runs):
+    """Return the run with the median deletion time."""
+    return sorted(runs, key=lambda run: run["seconds"])[len(runs) // 2]
+
+
+def git_commit():
+    """Return the current git commit of the repository, or None."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(results, baseline, tolerance):
+    """
+    Compare items/second per (engine, logins) case against a baseline.
+
+    Args:
+        results (list): Case results of this run
+        baseline (dict): Earlier result file contents
+        tolerance (float): Allowed relative drop in items/second
+
+    Returns:
+        list: (case, baseline items/s, current items/s) for every slower case
+    """
+    previous = {(case["engine"], case["logins"]): case for case in baseline.get("results", [])}
+    slower = []
+    for case in results:
+        before = previous.get((case["engine"], case["logins"]))
+        if before and case["items_per_second"] < before["items_per_second"] * (1 - tolerance):
+            slower.append((case, before["items_per_second"], case["items_per_second"]))
+    return slower
+
+
+def print_table(results):
+    """Print one line per case."""
+    print(f"{'Engine':<10} {'Rows':>7} {'Deleted':>8} {'Seconds':>9} {'Items/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for case in results:
+        item = case["steps"].get("item", {})
+        print(f"{case['engine']:<10} {case['logins']:>7} {case['deleted']:>8} {case['seconds']:>9.2f} "
+              f"{case['items_per_second']:>9.1f} {item.get('p50', 0) * 1000:>8.1f} "
+              f"{item.get('p99', 0) * 1000:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the deletion loop against the synthetic dashboard")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000],
+                        help="Rows rendered by the fixture per case")
+    parser.add_argument("--engines", nargs="+", default=["webdriver", "js", "cdp", "pipeline"],
+                        choices=["webdriver", "js", "cdp", "pipeline"], help="Engines to benchmark")
+    parser.add_argument("--file", action="store_true",
+                        help="Load the fixture from disk instead of the loopback server")
+    parser.add_argument("--delay", type=int, default=0, help="Milliseconds before a confirmed row is removed")
+    parser.add_argument("--render", type=int, default=0, help="Milliseconds before the rows are rendered")
+    parser.add_argument("--dialog", type=int, default=0, help="Milliseconds before the dialog opens")
+    parser.add_argument("--window", type=int, default=0, help="Render the rows lazily in windows of N rows")
+    parser.add_argument("--no-confirm", action="store_true", help="Delete rows without a confirmation dialog")
+    parser.add_argument("--depth", type=int, default=8, help="Maximum deletions in flight (pipeline)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Rows per in-page batch (js)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the median is reported")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/benchmark-<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed items/second drop before a case counts as slower")
+    args = parser.parse_args()
+
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    driver = webdriver.Chrome(options=options)
+    work_dir = tempfile.mkdtemp(prefix="truekey-bench-")
+    results = []
+    try:
+        with contextlib.ExitStack() as stack:
+            base_url = "file://" + FIXTURES_DIR if args.file else stack.enter_context(serve_fixtures())
+            for logins in args.sizes:
+                for engine in args.engines:
+                    url = fixture_url(base_url, logins, args)
+                    runs = [run_case(driver, url, engine, args, work_dir) for _ in range(max(1, args.repeat))]
+                    case = {"engine": engine, "logins": logins, **median_run(runs)}
+                    results.append(case)
+                    print(f"{engine} x {logins}: {case['deleted']} deleted in {case['seconds']:.2f}s "
+                          f"({case['items_per_second']:.1f} items/s)", flush=True)
+        browser_version = driver.capabilities.get("browserVersion")
+    finally:
+        driver.quit()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    document = {
+        "format_version": RESULT_FORMAT_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "browser_version": browser_version,
+            "git_commit": git_commit(),
+        },
+        "fixture": {"source": "file" if args.file else "http", "delay_ms": args.delay,
+                    "render_ms": args.render, "dialog_ms": args.dialog, "window": args.window,
+                    "confirm": not args.no_confirm},
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, time.strftime("benchmark-%Y%m%d-%H%M%S.json"))
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+    print()
+    print_table(results)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare_results(results, json.load(f), args.tolerance)
+        for case, before, after in slower:
+            print(f"SLOWER: {case['engine']} x {case['logins']}: {before:.1f} -> {after:.1f} items/s")
+        if slower:
+            return 1
+        print(f"No case is more than {args.tolerance:.0%} slower than {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -33,8 +33,46 @@ except ImportError:
 # Add the current directory to the path to import our script
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import the script functions (we'll need to refactor the script to be testable)
-# For now, we'll test the logic by mocking the entire script execution
+from truekey_deleter.cli import build_parser
+from truekey_deleter.config import (EXIT_DASHBOARD_NOT_READY, EXIT_OK, LIST_MODE_LOCATOR,
+                                    TRASH_ICON_LOCATOR, SessionConfig)
+from truekey_deleter.chrome import create_chrome_driver
+from truekey_deleter.dashboard import wait_for_dashboard_ready
+from truekey_deleter.engines import (JS_DELETE_BATCH_SCRIPT, delete_with_cdp, delete_with_javascript,
+                                     delete_with_webdriver)
+from truekey_deleter.pipeline import delete_with_pipeline
+from truekey_deleter.profile import FileCloner, latest_extension_version, setup_truekey_profile, sync_tree
+from truekey_deleter.session import DashboardNotReadyError, DeletionSession, DeletionStats
+from truekey_deleter.storage import list_storage_logins, purge_extension_storage
+from truekey_deleter.waits import ROW_LABEL_SCRIPT, WaitEngine
+
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "delete-truekey-logins.py")
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def create_headless_test_driver():
+    """
+    Create a headless Chrome driver for tests that run against local fixtures.
+    
+    The calling test is skipped when Chrome or chromedriver is not installed.
+    """
+    if not shutil.which("chromedriver") or not any(
+            shutil.which(name) for name in ("google-chrome", "chromium", "chromium-browser", "chrome")):
+        pytest.skip("Chrome and chromedriver are required for fixture tests")
+    from selenium import webdriver
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--allow-file-access-from-files")
+    return webdriver.Chrome(options=options)
+
+
+def fixture_url(name, **params):
+    """Build a file:// URL for a fixture page with optional query parameters"""
+    from urllib.parse import urlencode
+    url = "file://" + os.path.join(FIXTURES_DIR, name)
+    return url + ("?" + urlencode(params) if params else "")
 
 
 class TestTrueKeyDeletionScript:
@@ -438,6 +476,2104 @@ class TestTrueKeyDeletionScript:
             assert args.validate_only is True
 
 
+class TestWaitEngine:
+    """Tests for the condition-driven wait engine"""
+    
+    def test_wait_returns_as_soon_as_condition_holds(self):
+        """Test that waits return immediately when the condition is already met"""
+        waits = WaitEngine(Mock(), timeout=5, poll_interval=0.01)
+        
+        assert waits.wait("delete_click", lambda driver: "done") == "done"
+        
+        summary = waits.summary()
+        assert summary["delete_click"]["count"] == 1
+        assert summary["delete_click"]["total"] < 1.0
+        assert summary["delete_click"]["legacy_budget"] == 1.0
+    
+    def test_wait_times_out_and_records_step(self):
+        """Test that a condition that never holds raises TimeoutException"""
+        from selenium.common.exceptions import TimeoutException
+        
+        waits = WaitEngine(Mock(), timeout=0.05, poll_interval=0.01)
+        
+        try:
+            waits.wait("confirm_click", lambda driver: False)
+            assert False, "Expected TimeoutException"
+        except TimeoutException:
+            pass
+        
+        assert waits.summary()["confirm_click"]["count"] == 1
+    
+    def test_row_removed_on_staleness(self):
+        """Test that a stale row element counts as removed"""
+        from selenium.common.exceptions import StaleElementReferenceException
+        
+        mock_driver = Mock()
+        mock_driver.find_elements.return_value = [Mock(), Mock()]
+        stale_icon = Mock()
+        stale_icon.is_enabled.side_effect = StaleElementReferenceException()
+        
+        waits = WaitEngine(mock_driver, timeout=1, poll_interval=0.01)
+        assert waits.until_row_removed("confirm_click", stale_icon)
+    
+    def test_wait_arguments(self):
+        """Test that wait timeout and poll interval are configurable"""
+        args = build_parser().parse_args(["--wait-timeout", "2.5", "--poll-interval", "0.25"])
+        
+        assert args.wait_timeout == 2.5
+        assert args.poll_interval == 0.25
+
+
+class FakeDashboardRows:
+    """Minimal dashboard stand-in whose trash icons disappear when clicked"""
+    
+    def __init__(self, count):
+        from selenium.common.exceptions import StaleElementReferenceException
+        self.rows = []
+        for _ in range(count):
+            icon = Mock()
+            icon.is_enabled.return_value = True
+            icon.click.side_effect = self._remover(icon, StaleElementReferenceException)
+            self.rows.append(icon)
+    
+    def _remover(self, icon, stale_error):
+        def click():
+            self.rows.remove(icon)
+            icon.is_enabled.side_effect = stale_error()
+        return click
+    
+    def find_element(self, by, value):
+        from selenium.common.exceptions import NoSuchElementException
+        if (by, value) == LIST_MODE_LOCATOR:
+            return Mock()
+        by_trash, trash_xpath = TRASH_ICON_LOCATOR
+        index = 0
+        if value.startswith("(" + trash_xpath + ")["):
+            index = int(value.rsplit("[", 1)[1].rstrip("]")) - 1
+        elif value != trash_xpath:
+            raise NoSuchElementException("no confirmation dialog")
+        if index >= len(self.rows):
+            raise NoSuchElementException("no more rows")
+        return self.rows[index]
+    
+    def find_elements(self, by, value):
+        return list(self.rows)
+    
+    def execute_script(self, script, *args):
+        """Answer the row text of scrolled lists and report the page as loaded"""
+        if script == ROW_LABEL_SCRIPT:
+            return f"row {id(args[0])}" if args[0] in self.rows else None
+        return "complete"
+
+
+class FakeRefillingRows:
+    """Dashboard stand-in that shows the next login in a deleted row's node, like a virtualized list"""
+    
+    def __init__(self, count):
+        self.logins = [f"user{number}@example.com" for number in range(count)]
+        self.icon = Mock()
+        self.icon.is_enabled.return_value = True  # The node never goes stale
+        self.icon.click.side_effect = lambda: self.logins.pop(0)
+    
+    def find_element(self, by, value):
+        from selenium.common.exceptions import NoSuchElementException
+        if value != TRASH_ICON_LOCATOR[1] or not self.logins:
+            raise NoSuchElementException("no such row")
+        return self.icon
+    
+    def execute_script(self, script, *args):
+        """Answer the row text and report the page as loaded"""
+        if script == ROW_LABEL_SCRIPT:
+            return self.logins[0] if self.logins else None
+        return "complete"
+
+
+class TestWebDriverDeletionLoop:
+    """Tests for the first-live-row WebDriver deletion loop"""
+    
+    def run_loop(self, dashboard):
+        stats = {}
+        waits = WaitEngine(dashboard, timeout=0.05, poll_interval=0.01)
+        with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+            deleted = delete_with_webdriver(dashboard, waits, stats)
+        return deleted, stats
+    
+    def test_deletes_every_row_with_one_lookup_each(self):
+        """Test that each deletion re-resolves only the first live row"""
+        dashboard = FakeDashboardRows(5)
+        dashboard.find_elements = Mock(side_effect=AssertionError("full rescan"))
+        
+        deleted, stats = self.run_loop(dashboard)
+        
+        assert deleted == 5
+        assert dashboard.rows == []
+        assert stats == {"stale_retries": 0, "skipped": 0}
+    
+    def test_stale_rows_are_retried_and_counted(self):
+        """Test that a row going stale before the click is re-resolved"""
+        from selenium.common.exceptions import StaleElementReferenceException
+        
+        dashboard = FakeDashboardRows(2)
+        first = dashboard.rows[0]
+        remove_first = first.click.side_effect
+        first.click.side_effect = iter_side_effects(StaleElementReferenceException(), remove_first)
+        
+        deleted, stats = self.run_loop(dashboard)
+        
+        assert deleted == 2
+        assert stats["stale_retries"] == 1
+    
+    def test_undeletable_row_is_skipped(self):
+        """Test that a row that keeps failing is skipped and the next one deleted"""
+        from selenium.common.exceptions import WebDriverException
+        
+        dashboard = FakeDashboardRows(3)
+        stuck = dashboard.rows[0]
+        stuck.click.side_effect = WebDriverException("not clickable")
+        
+        deleted, stats = self.run_loop(dashboard)
+        
+        assert deleted == 2
+        assert dashboard.rows == [stuck]
+        assert stats["skipped"] == 1
+        assert stuck.click.call_count == 3
+    
+    def test_confirmation_dialog_is_learned(self):
+        """Test that the dialog probe stops once the first deletions agree"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.instrumentation import StepTimer
+        from truekey_deleter.waits import DialogTracker
+        
+        for confirm, mode in ((True, "always"), (False, "never")):
+            commands = {}
+            for learn_after in (0, 3):
+                driver = SimulatedWebDriver(20, confirm=confirm)
+                dialogs = DialogTracker(learn_after)
+                timer = StepTimer()
+                waits = WaitEngine(driver, timeout=1, poll_interval=0.001)
+                with patch("builtins.print"):
+                    assert delete_with_webdriver(driver, waits, timer=timer, dialogs=dialogs) == 20
+                commands[learn_after] = driver.stats["commands"]
+            
+            assert dialogs.summary() == {"mode": mode, "learn_after": 3, "probes": 3, "relearned": 0}
+            assert timer.summary()["dialog_probe"]["count"] == 3
+            assert commands[3] <= commands[0], confirm
+        assert commands[3] < commands[0]  # No confirm button lookups once "never" is learned
+    
+    def test_dialog_change_restarts_probing(self):
+        """Test that a dialog appearing or going away after the fast path was chosen is handled"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.waits import DialogTracker
+        
+        for confirm, mode in ((False, "always"), (True, "never")):
+            driver = SimulatedWebDriver(10, confirm=confirm)
+            dialogs = DialogTracker(2)
+            
+            def on_deleted(identifier):
+                if driver.stats["deleted"] == 4:
+                    driver.confirm = not confirm  # The dashboard changes its confirmation behaviour
+            
+            waits = WaitEngine(driver, timeout=0.05, poll_interval=0.001)
+            with patch("builtins.print"):
+                deleted = delete_with_webdriver(driver, waits, {}, on_deleted=on_deleted, dialogs=dialogs)
+            
+            assert deleted == 10
+            assert not driver.rows
+            assert dialogs.mode == mode
+            assert dialogs.relearned == 1
+
+
+def iter_side_effects(*effects):
+    """Build a side effect that raises or calls each given effect in turn"""
+    effects = iter(effects)
+    def side_effect(*args, **kwargs):
+        effect = next(effects)
+        if isinstance(effect, Exception):
+            raise effect
+        return effect(*args, **kwargs)
+    return side_effect
+
+
+class TestJavaScriptEngine:
+    """Tests for the in-page JavaScript deletion engine"""
+    
+    def test_batches_until_nothing_remains(self):
+        """Test that batches are requested until the dashboard reports no rows left"""
+        mock_driver = Mock()
+        mock_driver.execute_async_script.side_effect = [
+            {"deleted": 2, "failed": 0, "remaining": 1},
+            {"deleted": 1, "failed": 0, "remaining": 0},
+        ]
+        
+        with patch("builtins.print"):
+            deleted = delete_with_javascript(mock_driver, batch_size=2, timeout=1)
+        
+        assert deleted == 3
+        assert mock_driver.execute_async_script.call_count == 2
+        script, batch_size, timeout_ms, skip = mock_driver.execute_async_script.call_args[0]
+        assert script == JS_DELETE_BATCH_SCRIPT
+        assert batch_size == 2
+        assert timeout_ms == 1000
+        assert skip == 0
+        mock_driver.set_script_timeout.assert_called_once()
+    
+    def test_skips_row_after_repeated_failures(self):
+        """Test that a row failing in every batch is skipped instead of looping"""
+        mock_driver = Mock()
+        failed = {"deleted": 0, "failed": 1, "exhausted": False, "remaining": 5}
+        mock_driver.execute_async_script.side_effect = [
+            failed, failed, failed,
+            {"deleted": 4, "failed": 0, "exhausted": True, "remaining": 1},
+        ]
+        stats = {}
+        
+        with patch("builtins.print"):
+            deleted = delete_with_javascript(mock_driver, stats=stats, max_attempts=3)
+        
+        assert deleted == 4
+        assert stats["skipped"] == 1
+        assert mock_driver.execute_async_script.call_count == 4
+        assert mock_driver.execute_async_script.call_args[0][3] == 1
+    
+    def test_records_in_page_item_times(self):
+        """Test that per-item durations and dialogs measured in the page reach the timer"""
+        from truekey_deleter.instrumentation import StepTimer
+        
+        mock_driver = Mock()
+        mock_driver.execute_async_script.return_value = {
+            "deleted": 2, "failed": 0, "exhausted": True, "remaining": 0,
+            "times": [120, 80], "confirms": 2}
+        timer = StepTimer()
+        
+        with patch("builtins.print"):
+            delete_with_javascript(mock_driver, timer=timer)
+        
+        assert timer.step_times["item"] == [0.12, 0.08]
+        assert timer.counters["confirm_dialogs"] == 2
+    
+    def test_engine_arguments(self):
+        """Test engine selection and batch size arguments"""
+        args = build_parser().parse_args(["--engine", "js", "--batch-size", "200"])
+        
+        assert args.engine == "js"
+        assert args.batch_size == 200
+        assert build_parser().parse_args([]).engine == "webdriver"
+
+
+class FakeCdpDashboard:
+    """DevTools stand-in whose rows ask for confirmation and then disappear"""
+    
+    def __init__(self, count, stuck=0):
+        self.rows = count
+        self.stuck = stuck
+        self.clicks = []
+        self.dialog = False
+    
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Input.dispatchMouseEvent":
+            if params["type"] == "mouseReleased":
+                self.clicks.append((params["x"], params["y"]))
+            return {}
+        expression = params["expression"]
+        if "locate(" in expression:
+            index = int(expression.split("locate(")[1].split(",")[0])
+            self.target = index
+            value = {"x": 10, "y": 20 + index} if index < self.rows else None
+        elif "confirm(" in expression:
+            value = {"x": 300, "y": 200}
+        elif "outcome()" in expression:
+            if self.target < self.stuck:
+                value = "timeout"
+            elif not self.dialog:
+                self.dialog = True
+                value = "dialog"
+            else:
+                self.dialog = False
+                self.rows -= 1
+                value = "removed"
+        else:
+            value = None
+        return {"result": {"type": "object", "value": value}}
+
+
+class TestCdpEngine:
+    """Tests for the Chrome DevTools Protocol deletion engine"""
+    
+    def test_deletes_rows_through_dialog(self):
+        """Test that every row is clicked, confirmed and counted"""
+        dashboard = FakeCdpDashboard(3)
+        
+        with patch("builtins.print"):
+            assert delete_with_cdp(dashboard, timeout=1) == 3
+        
+        # One trash icon click and one confirm click per row
+        assert dashboard.clicks == [(10, 20), (300, 200)] * 3
+    
+    def test_stuck_row_is_skipped(self):
+        """Test that a row that never disappears is skipped after retries"""
+        dashboard = FakeCdpDashboard(3, stuck=1)
+        stats = {}
+        
+        with patch("builtins.print"):
+            assert delete_with_cdp(dashboard, timeout=1, stats=stats, max_attempts=2) == 2
+        
+        assert stats["skipped"] == 1
+    
+    def test_script_errors_are_raised(self):
+        """Test that an exception inside the page surfaces as JavascriptException"""
+        from selenium.common.exceptions import JavascriptException
+        
+        mock_driver = Mock()
+        mock_driver.execute_cdp_cmd.return_value = {
+            "result": {}, "exceptionDetails": {"text": "Uncaught", "exception": {"description": "boom"}}}
+        
+        with pytest.raises(JavascriptException):
+            delete_with_cdp(mock_driver)
+    
+    @pytest.mark.chrome
+    def test_engines_against_fixture_dashboard(self):
+        """Test all UI engines end to end against the offline dashboard fixture"""
+        driver = create_headless_test_driver()
+        try:
+            for engine in ("webdriver", "js", "cdp", "pipeline"):
+                driver.get(fixture_url("dashboard.html", logins=6))
+                waits = WaitEngine(driver, timeout=2, poll_interval=0.01)
+                with patch("builtins.print"):
+                    if engine == "webdriver":
+                        deleted = delete_with_webdriver(driver, waits)
+                    elif engine == "js":
+                        deleted = delete_with_javascript(driver, batch_size=4, timeout=2)
+                    elif engine == "cdp":
+                        deleted = delete_with_cdp(driver, timeout=2)
+                    else:
+                        deleted = delete_with_pipeline(driver, depth=4, timeout=2)
+                assert deleted == 6, engine
+                assert driver.find_elements(*TRASH_ICON_LOCATOR) == []
+        finally:
+            driver.quit()
+
+
+class FakePipelinePage:
+    """Async DevTools stand-in for the pipelined engine's in-page helpers"""
+    
+    def __init__(self, count, latency=0.005, stuck=(), missing=()):
+        self.untagged = count
+        self.next_key = 0
+        self.latency = latency
+        self.stuck = set(stuck)
+        self.missing = set(missing)
+        self.in_flight = 0
+        self.peak = 0
+    
+    async def evaluate(self, expression, await_promise=False):
+        import asyncio
+        if "claim(" in expression:
+            count = min(int(expression.split("claim(")[1].rstrip(")")), self.untagged)
+            self.untagged -= count
+            keys = [str(self.next_key + i) for i in range(count)]
+            self.next_key += count
+            return keys
+        if "remove(" in expression:
+            key = expression.split("remove(")[1].split(",")[0].strip("'")
+            if key in self.missing:
+                return {"outcome": "missing", "latencyMs": 0}
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(self.latency)
+            self.in_flight -= 1
+            outcome = "timeout" if key in self.stuck else "removed"
+            return {"outcome": outcome, "latencyMs": self.latency * 1000}
+        return None
+
+
+class TestPipelineEngine:
+    """Tests for the pipelined DevTools deletion engine"""
+    
+    def run(self, page, **kwargs):
+        import asyncio
+        from truekey_deleter.pipeline import delete_pipelined
+        stats = {}
+        with patch("builtins.print"):
+            deleted = asyncio.run(delete_pipelined(page, stats=stats, **kwargs))
+        return deleted, stats
+    
+    def test_keeps_several_deletions_in_flight(self):
+        """Test that the window opens up while rows disappear promptly"""
+        page = FakePipelinePage(40)
+        
+        deleted, stats = self.run(page, depth=6, timeout=1)
+        
+        assert deleted == 40
+        assert page.peak == stats["peak_in_flight"] == 6
+        assert stats["backoffs"] == 0
+    
+    def test_failed_rows_are_retried_then_skipped(self):
+        """Test that a row that never disappears is retried and then skipped"""
+        page = FakePipelinePage(10, stuck={"3"})
+        
+        deleted, stats = self.run(page, depth=4, timeout=1, max_attempts=2)
+        
+        assert deleted == 9
+        assert stats["skipped"] == 1
+        assert stats["backoffs"] == 2
+    
+    def test_missing_rows_are_not_counted(self):
+        """Test that a tagged row that vanished is neither counted nor retried"""
+        from truekey_deleter.instrumentation import StepTimer
+        page = FakePipelinePage(10, missing={"2", "7"})
+        timer = StepTimer()
+        
+        deleted, stats = self.run(page, depth=4, timeout=1, timer=timer)
+        
+        assert deleted == 8
+        assert stats["skipped"] == 0
+        assert timer.counters["missing_rows"] == 2
+    
+    def test_window_backs_off_when_dashboard_lags(self):
+        """Test the additive increase and multiplicative decrease of the window"""
+        from truekey_deleter.pipeline import AdaptiveWindow
+        window = AdaptiveWindow(maximum=8)
+        for _ in range(40):
+            window.success(10)
+        assert window.limit == 8
+        
+        window.success(100)  # 10x slower than the fastest removal
+        assert window.limit == 4
+        window.backoff()
+        window.backoff()
+        window.backoff()
+        assert window.limit == 1
+        assert window.backoffs == 4
+    
+    def test_connection_correlates_responses(self):
+        """Test that out-of-order DevTools responses resolve the right commands"""
+        import asyncio
+        import json
+        import queue
+        from truekey_deleter.cdp import CdpConnection, CdpError
+        
+        class FakeWebSocket:
+            def __init__(self):
+                self.inbox = queue.Queue()
+                self.sent = []
+            
+            def send(self, message):
+                self.sent.append(json.loads(message))
+                if len(self.sent) == 2:
+                    # Answer the second command first
+                    for request in reversed(self.sent):
+                        value = request["params"]["expression"]
+                        if value == "bad":
+                            reply = {"id": request["id"], "error": {"message": "bad expression"}}
+                        else:
+                            reply = {"id": request["id"], "result": {"result": {"value": value}}}
+                        self.inbox.put(json.dumps(reply))
+            
+            def recv(self):
+                return self.inbox.get()
+            
+            def settimeout(self, timeout):
+                pass
+            
+            def close(self):
+                self.inbox.put("")
+        
+        async def scenario():
+            connection = await CdpConnection.open("ws://fake")
+            try:
+                first = asyncio.ensure_future(connection.evaluate("1 + 1"))
+                second = asyncio.ensure_future(connection.evaluate("bad"))
+                await asyncio.wait([first, second])
+                return first.result(), second.exception()
+            finally:
+                await connection.close()
+        
+        with patch("websocket.create_connection", return_value=FakeWebSocket()):
+            value, error = asyncio.run(scenario())
+        
+        assert value == "1 + 1"
+        assert isinstance(error, CdpError)
+
+
+class TestStoragePurge:
+    """Tests for deleting login records through the extension storage"""
+    
+    RECORDS = [
+        {"key": "login_0", "site": "https://a.example.com", "username": "a"},
+        {"key": "login_1", "site": "https://b.example.com", "username": "b"},
+        {"key": "login_2", "site": "https://c.example.com", "username": "c"},
+    ]
+    
+    
+    def test_dry_run_lists_without_deleting(self):
+        """Test that a dry run only lists the records"""
+        mock_driver = Mock()
+        mock_driver.execute_async_script.return_value = {"error": None, "records": self.RECORDS}
+        
+        with patch("builtins.print") as mock_print:
+            deleted = purge_extension_storage(mock_driver, dry_run=True)
+        
+        assert deleted == 0
+        assert mock_driver.execute_async_script.call_count == 1
+        printed = " ".join(str(c) for c in mock_print.call_args_list)
+        assert "login_2" in printed
+    
+    def test_deletes_in_batches(self):
+        """Test that records are removed in batches of the configured size"""
+        mock_driver = Mock()
+        mock_driver.execute_async_script.side_effect = [
+            {"error": None, "records": self.RECORDS},
+            {"error": None, "removed": 2},
+            {"error": None, "removed": 1},
+        ]
+        
+        with patch("builtins.print"):
+            deleted = purge_extension_storage(mock_driver, batch_size=2, key_pattern="^login_")
+        
+        assert deleted == 3
+        removal_calls = mock_driver.execute_async_script.call_args_list[1:]
+        assert removal_calls[0][0][1] == ["login_0", "login_1"]
+        assert removal_calls[1][0][1] == ["login_2"]
+        
+    def test_filter_selects_records(self):
+        """Test that --match/--exclude patterns narrow the purged records"""
+        from truekey_deleter.filters import RowFilter
+        
+        mock_driver = Mock()
+        mock_driver.execute_async_script.side_effect = [
+            {"error": None, "records": self.RECORDS},
+            {"error": None, "removed": 1},
+        ]
+        
+        with patch("builtins.print"):
+            deleted = purge_extension_storage(mock_driver, key_pattern="^login_",
+                                              row_filter=RowFilter(["site:*.example.com"], ["a", "b"]))
+        
+        assert deleted == 1
+        assert mock_driver.execute_async_script.call_args_list[1][0][1] == ["login_2"]
+    
+    def test_detected_records_need_confirmation(self):
+        """Test that records found without a key pattern are only deleted once confirmed"""
+        mock_driver = Mock()
+        mock_driver.execute_async_script.return_value = {"error": None, "records": self.RECORDS}
+        
+        with patch("builtins.print"):
+            assert purge_extension_storage(mock_driver) == 0
+            assert purge_extension_storage(mock_driver, confirm=lambda records: False) == 0
+        assert mock_driver.execute_async_script.call_count == 2  # Only the listings
+        
+        confirm = Mock(return_value=True)
+        mock_driver.execute_async_script.side_effect = [
+            {"error": None, "records": self.RECORDS},
+            {"error": None, "removed": 3},
+        ]
+        with patch("builtins.print"):
+            assert purge_extension_storage(mock_driver, confirm=confirm) == 3
+        confirm.assert_called_once_with(self.RECORDS)
+    
+    def test_storage_unavailable_raises(self):
+        """Test that an unreadable storage is reported as an error"""
+        mock_driver = Mock()
+        mock_driver.execute_async_script.return_value = {"error": "no storage", "records": []}
+        
+        try:
+            list_storage_logins(mock_driver)
+            assert False, "Expected an exception"
+        except Exception as e:
+            assert "no storage" in str(e)
+    
+    @pytest.mark.chrome
+    def test_purge_against_fixture_page(self):
+        """Test the storage purge end to end against the offline fixture page"""
+        driver = create_headless_test_driver()
+        try:
+            driver.get(fixture_url("storage_dashboard.html", logins=12))
+            
+            with patch("builtins.print"):
+                records = list_storage_logins(driver)
+                assert len(records) == 12
+                assert records[0]["last_used"] == "2023-11-14T22:13:20.000Z"
+                assert purge_extension_storage(driver, batch_size=5, confirm=lambda records: True) == 12
+            
+            assert list_storage_logins(driver) == []
+            remaining = driver.execute_async_script(
+                "var done = arguments[0]; chrome.storage.local.get(null, function (items) { done(Object.keys(items)); });")
+            assert sorted(remaining) == ["lastSync", "settings"]
+        finally:
+            driver.quit()
+
+
+class TestIncrementalProfileSync:
+    """Tests for the incremental TrueKey profile sync"""
+    
+    def setup_method(self):
+        """Create a source and destination tree"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.src = os.path.join(self.temp_dir, "src")
+        self.dst = os.path.join(self.temp_dir, "dst")
+        os.makedirs(os.path.join(self.src, "ext", "1.0"))
+        self.write("ext/1.0/manifest.json", '{"name": "TrueKey"}')
+        self.write("ext/1.0/background.js", "console.log('hi');")
+    
+    def teardown_method(self):
+        """Remove the temporary trees"""
+        shutil.rmtree(self.temp_dir)
+    
+    def write(self, rel, content, root=None):
+        path = os.path.join(root or self.src, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+    
+    def test_first_sync_copies_everything(self):
+        """Test that an empty destination receives every file"""
+        stats = sync_tree(self.src, self.dst)
+        
+        assert stats["files_copied"] == 2
+        assert stats["files_skipped"] == 0
+        assert stats["bytes_copied"] == len('{"name": "TrueKey"}') + len("console.log('hi');")
+        assert os.path.exists(os.path.join(self.dst, "ext", "1.0", "manifest.json"))
+    
+    def test_second_sync_skips_unchanged_files(self):
+        """Test that unchanged files are not copied again"""
+        sync_tree(self.src, self.dst)
+        
+        with patch("shutil.copy2") as mock_copy2:
+            stats = sync_tree(self.src, self.dst)
+        
+        mock_copy2.assert_not_called()
+        assert stats["files_copied"] == 0
+        assert stats["files_skipped"] == 2
+        assert stats["bytes_skipped"] > 0
+    
+    def test_changed_and_removed_files(self):
+        """Test that changed files are copied and vanished files are removed"""
+        sync_tree(self.src, self.dst)
+        
+        self.write("ext/1.0/background.js", "console.log('changed');")
+        os.remove(os.path.join(self.src, "ext", "1.0", "manifest.json"))
+        self.write("old/leftover.txt", "x", root=self.dst)
+        
+        stats = sync_tree(self.src, self.dst)
+        
+        assert stats["files_copied"] == 1
+        assert stats["files_removed"] == 2
+        assert not os.path.exists(os.path.join(self.dst, "ext", "1.0", "manifest.json"))
+        assert not os.path.exists(os.path.join(self.dst, "old"))
+        with open(os.path.join(self.dst, "ext", "1.0", "background.js")) as f:
+            assert f.read() == "console.log('changed');"
+    
+    def test_checksum_detects_same_size_same_mtime_change(self):
+        """Test that checksum mode catches edits that keep size and mtime"""
+        sync_tree(self.src, self.dst)
+        
+        path = os.path.join(self.src, "ext", "1.0", "background.js")
+        stat = os.stat(path)
+        self.write("ext/1.0/background.js", "console.log('HI');")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        
+        assert sync_tree(self.src, self.dst)["files_copied"] == 0
+        assert sync_tree(self.src, self.dst, checksum=True)["files_copied"] == 1
+    
+    def test_setup_truekey_profile_refresh(self):
+        """Test that setting up an existing profile only copies what changed"""
+        chrome = os.path.join(self.temp_dir, "Chrome")
+        self.write("Local State", "{}", root=chrome)
+        self.write("Default/Extensions/abc/1.0/manifest.json", "{}", root=chrome)
+        truekey = os.path.join(self.temp_dir, "TrueKey")
+        
+        with patch("builtins.print"):
+            first = setup_truekey_profile(truekey, chrome, extension_id="abc")
+            second = setup_truekey_profile(truekey, chrome, extension_id="abc")
+        
+        assert first["files_copied"] == 2
+        assert second["files_copied"] == 0
+        assert second["files_skipped"] == 2
+    
+    def test_only_truekey_extension_is_copied(self):
+        """Test that only the newest TrueKey version and its state are copied"""
+        ext_id = "cpaibbcbodhimfnjnakiidgbpiehfgci"
+        chrome = os.path.join(self.temp_dir, "Chrome")
+        self.write(f"Default/Extensions/{ext_id}/4.9.1_0/manifest.json", "{}", root=chrome)
+        self.write(f"Default/Extensions/{ext_id}/4.10.0_0/manifest.json", "{}", root=chrome)
+        self.write("Default/Extensions/otherextension/1.0/big.bin", "x" * 1000, root=chrome)
+        self.write(f"Default/Local Extension Settings/{ext_id}/000003.log", "state", root=chrome)
+        self.write(f"Default/IndexedDB/chrome-extension_{ext_id}_0.indexeddb.leveldb/CURRENT",
+                   "db", root=chrome)
+        self.write("Default/Local Extension Settings/otherextension/000003.log", "x", root=chrome)
+        truekey = os.path.join(self.temp_dir, "TrueKey")
+        self.write("Default/Extensions/leftover/1.0/old.js", "x", root=truekey)
+        
+        with patch("builtins.print"):
+            setup_truekey_profile(truekey, chrome, extension_id=ext_id)
+        
+        default = os.path.join(truekey, "Default")
+        assert os.listdir(os.path.join(default, "Extensions")) == [ext_id]
+        assert os.listdir(os.path.join(default, "Extensions", ext_id)) == ["4.10.0_0"]
+        assert os.listdir(os.path.join(default, "Local Extension Settings")) == [ext_id]
+        assert os.path.exists(os.path.join(
+            default, "IndexedDB", f"chrome-extension_{ext_id}_0.indexeddb.leveldb", "CURRENT"))
+    
+    def test_latest_extension_version_is_numeric(self):
+        """Test that extension versions are compared numerically"""
+        for version in ["4.9.1_0", "4.10.0_0", "4.10.0_1"]:
+            os.makedirs(os.path.join(self.temp_dir, "ext", version))
+        
+        assert latest_extension_version(os.path.join(self.temp_dir, "ext")) == "4.10.0_1"
+        assert latest_extension_version(os.path.join(self.temp_dir, "missing")) is None
+    
+    def test_hardlink_only_for_read_only_files(self):
+        """Test that hardlinks are never used for files Chrome may write"""
+        cloner = FileCloner("hardlink")
+        src = os.path.join(self.src, "ext", "1.0", "manifest.json")
+        
+        assert cloner.clone(src, os.path.join(self.temp_dir, "linked"), read_only=True) == "hardlink"
+        assert cloner.clone(src, os.path.join(self.temp_dir, "copied")) == "copy"
+        
+        assert os.stat(os.path.join(self.temp_dir, "linked")).st_ino == os.stat(src).st_ino
+        assert os.stat(os.path.join(self.temp_dir, "copied")).st_ino != os.stat(src).st_ino
+    
+    def test_clone_replaces_hardlink_without_touching_source(self):
+        """Test that re-cloning over a hardlink does not write through it"""
+        cloner = FileCloner("hardlink")
+        src = os.path.join(self.src, "ext", "1.0", "manifest.json")
+        dst = os.path.join(self.temp_dir, "linked")
+        cloner.clone(src, dst, read_only=True)
+        other = self.write("other.json", "other")
+        
+        FileCloner("copy").clone(other, dst)
+        
+        with open(src) as f:
+            assert f.read() == '{"name": "TrueKey"}'
+        with open(dst) as f:
+            assert f.read() == "other"
+    
+    def test_auto_strategy_falls_back(self):
+        """Test that auto mode falls back when reflinks are unsupported"""
+        cloner = FileCloner("auto")
+        src = os.path.join(self.src, "ext", "1.0", "manifest.json")
+        
+        with patch.object(FileCloner, "_reflink", side_effect=OSError(95, "unsupported")):
+            assert cloner.clone(src, os.path.join(self.temp_dir, "a"), read_only=True) == "hardlink"
+            assert cloner.clone(src, os.path.join(self.temp_dir, "b")) == "copy"
+        
+        assert cloner.counts == {"reflink": 0, "hardlink": 1, "copy": 1}
+    
+    def test_auto_strategy_falls_back_on_windows(self):
+        """Test that auto mode falls back instead of failing where fcntl is missing"""
+        from truekey_deleter import profile
+        
+        cloner = FileCloner("auto")
+        src = os.path.join(self.src, "ext", "1.0", "manifest.json")
+        
+        with patch.object(profile.sys, "platform", "win32"), patch.dict(sys.modules, {"fcntl": None}):
+            assert cloner.clone(src, os.path.join(self.temp_dir, "a")) == "copy"
+        
+        assert cloner.counts == {"reflink": 0, "hardlink": 0, "copy": 1}
+    
+    def test_synced_hardlinks_are_skipped_next_time(self):
+        """Test that hardlinked files count as unchanged on the next sync"""
+        cloner = FileCloner("hardlink")
+        sync_tree(self.src, self.dst, cloner=cloner, read_only=True)
+        
+        stats = sync_tree(self.src, self.dst, cloner=cloner, read_only=True)
+        
+        assert cloner.counts["hardlink"] == 2
+        assert stats["files_skipped"] == 2
+    
+    def test_parallel_sync_matches_sequential(self):
+        """Test that a thread-pooled sync copies the same tree"""
+        for i in range(50):
+            self.write(f"ext/1.0/deep/dir{i % 5}/file{i}.js", f"file {i}")
+        calls = []
+        
+        stats = sync_tree(self.src, self.dst, workers=4,
+                                      progress=lambda done, total: calls.append((done, total)))
+        
+        assert stats["files_copied"] == 52
+        assert calls[-1] == (52, 52)
+        assert len(calls) == 52
+        for i in range(50):
+            with open(os.path.join(self.dst, "ext", "1.0", "deep", f"dir{i % 5}", f"file{i}.js")) as f:
+                assert f.read() == f"file {i}"
+        
+        again = sync_tree(self.src, self.dst, workers=4)
+        assert again["files_skipped"] == 52
+    
+    def test_refresh_arguments(self):
+        """Test the profile refresh arguments"""
+        args = build_parser().parse_args(["--refresh-profile", "--sync-checksum", "--copy-workers", "16"])
+        
+        assert args.refresh_profile is True
+        assert args.sync_checksum is True
+        assert args.copy_workers == 16
+        assert build_parser().parse_args([]).refresh_profile is False
+
+
+class TestHeadlessMode:
+    """Tests for unattended runs and the dashboard readiness probe"""
+    
+    def test_dashboard_ready(self):
+        """Test that a loaded dashboard with its list-mode toggle is ready"""
+        mock_driver = Mock()
+        mock_driver.execute_script.return_value = "complete"
+        waits = WaitEngine(mock_driver, timeout=0.1, poll_interval=0.01)
+        
+        assert wait_for_dashboard_ready(mock_driver, waits) is True
+        mock_driver.find_element.assert_called_with(*LIST_MODE_LOCATOR)
+    
+    def test_dashboard_not_ready(self):
+        """Test that the probe gives up when the list-mode toggle never renders"""
+        from selenium.common.exceptions import NoSuchElementException
+        
+        mock_driver = Mock()
+        mock_driver.execute_script.return_value = "complete"
+        mock_driver.find_element.side_effect = NoSuchElementException()
+        waits = WaitEngine(mock_driver, timeout=5, poll_interval=0.01)
+        
+        assert wait_for_dashboard_ready(mock_driver, waits, timeout=0.05) is False
+    
+    def test_list_view_without_rows_is_not_ready(self):
+        """Test that an unattended run fails when the list view renders neither rows nor the empty placeholder"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.cli import main
+        
+        dashboard = SimulatedWebDriver(5)
+        dashboard.rendered = 0  # Toggle is there, but the rows never render
+        journal_path = os.path.join(tempfile.mkdtemp(), "journal.jsonl")
+        try:
+            with patch("truekey_deleter.chrome.create_chrome_driver", return_value=dashboard), \
+                    patch("truekey_deleter.chrome.close_running_chrome"), \
+                    patch("builtins.print"):
+                code = main(["--non-interactive", "--journal", journal_path,
+                             "--wait-timeout", "0.05", "--poll-interval", "0.01"])
+        finally:
+            shutil.rmtree(os.path.dirname(journal_path))
+        
+        assert code == EXIT_DASHBOARD_NOT_READY
+        assert dashboard.stats["deleted"] == 0
+    
+    def test_empty_list_view_is_rendered(self):
+        """Test that the empty-list placeholder counts as a rendered list view"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.dashboard import switch_to_list_view
+        
+        dashboard = SimulatedWebDriver(0)
+        waits = WaitEngine(dashboard, timeout=0.05, poll_interval=0.01)
+        
+        with patch("builtins.print"):
+            assert switch_to_list_view(dashboard, waits) is True
+    
+    def test_headless_chrome_options(self):
+        """Test that headless mode uses Chrome's new headless mode"""
+        profile_dir = tempfile.gettempdir()
+        
+        with patch("selenium.webdriver.Chrome") as mock_chrome, patch("builtins.print"):
+            create_chrome_driver(profile_dir, headless=True)
+            headless_args = mock_chrome.call_args[1]["options"].arguments
+            create_chrome_driver(profile_dir)
+            windowed_args = mock_chrome.call_args[1]["options"].arguments
+        
+        assert "--headless=new" in headless_args
+        assert "--headless=new" not in windowed_args
+    
+    def test_headless_arguments(self):
+        """Test the unattended mode arguments"""
+        args = build_parser().parse_args(["--headless", "--ready-timeout", "5"])
+        
+        assert args.headless is True
+        assert args.ready_timeout == 5
+        assert build_parser().parse_args([]).non_interactive is False
+        assert EXIT_DASHBOARD_NOT_READY != EXIT_OK
+
+
+class TestDeletionSession:
+    """Tests for the DeletionSession API"""
+    
+    def setup_method(self):
+        """Create an empty TrueKey profile directory for the session's journal"""
+        self.profile_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Remove the profile directory"""
+        shutil.rmtree(self.profile_dir)
+    
+    def make_config(self, **overrides):
+        settings = dict(truekey_profile_dir=self.profile_dir, wait_timeout=0.05,
+                        poll_interval=0.01, ready_timeout=0.1, interactive=False)
+        settings.update(overrides)
+        return SessionConfig(**settings)
+    
+    def test_run_with_existing_driver(self):
+        """Test that a borrowed driver is used for the run and left open"""
+        dashboard = FakeDashboardRows(3)
+        dashboard.get = Mock()
+        dashboard.quit = Mock()
+        confirm = Mock()
+        
+        with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+            with DeletionSession(self.make_config(), driver=dashboard, confirm=confirm) as session:
+                stats = session.run()
+        
+        assert isinstance(stats, DeletionStats)
+        assert stats.deleted == 3
+        assert stats.to_dict()["engine"] == "webdriver"
+        assert "list_mode" in stats.waits
+        dashboard.get.assert_called_once_with(session.config.dashboard_url)
+        confirm.assert_called_once()
+        dashboard.quit.assert_not_called()
+    
+    def test_dashboard_not_ready_raises_when_unattended(self):
+        """Test that an unattended session fails fast if the dashboard never renders"""
+        from selenium.common.exceptions import NoSuchElementException
+        
+        mock_driver = Mock()
+        mock_driver.execute_script.return_value = "complete"
+        mock_driver.find_element.side_effect = NoSuchElementException()
+        
+        with patch("builtins.print"):
+            with pytest.raises(DashboardNotReadyError):
+                DeletionSession(self.make_config(), driver=mock_driver).run()
+    
+    def test_owned_driver_is_closed(self):
+        """Test that a driver created by the session is quit on close"""
+        with patch("truekey_deleter.chrome.create_chrome_driver") as mock_create, \
+                patch("builtins.print"):
+            session = DeletionSession(self.make_config(headless=True))
+            driver = session.start()
+            session.close()
+        
+        assert mock_create.call_args[0][-1] is True  # headless
+        driver.quit.assert_called_once()
+    
+    def test_config_from_arguments(self):
+        """Test that command line arguments map onto the session config"""
+        args = build_parser().parse_args(["--headless", "--extension-id", "abc", "--engine", "js"])
+        config = SessionConfig.from_args(args)
+        
+        assert config.dashboard_url == "chrome-extension://abc/html/dashboard.html"
+        assert config.engine == "js"
+        assert config.interactive is False
+
+
+class TestStartupPath:
+    """Tests for the fast --help and --validate-only startup path"""
+    
+    # Budget for the script's own imports; override with TRUEKEY_STARTUP_BUDGET_MS
+    STARTUP_BUDGET_MS = float(os.environ.get("TRUEKEY_STARTUP_BUDGET_MS", "150"))
+    
+    def import_profile(self, *args):
+        """Run the script under -X importtime and return (module, cumulative us, top level) rows"""
+        import subprocess
+        result = subprocess.run([sys.executable, "-X", "importtime", SCRIPT_PATH, *args],
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        rows = []
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+                continue
+            name = fields[2].rstrip()
+            rows.append((name.strip(), int(fields[1]), len(name) - len(name.lstrip()) == 1))
+        return rows
+    
+    def script_import_ms(self, rows):
+        """Sum the top-level imports made after interpreter startup (site)"""
+        names = [name for name, _, _ in rows]
+        if "site" in names:
+            rows = rows[names.index("site") + 1:]
+        return sum(cumulative for _, cumulative, top_level in rows if top_level) / 1000
+    
+    def test_validate_only_skips_selenium_and_chrome(self):
+        """Test that --validate-only neither imports selenium nor checks for Chrome"""
+        rows = self.import_profile("--validate-only")
+        modules = [name for name, _, _ in rows]
+        
+        assert not any(name.startswith("selenium") for name in modules)
+        assert "subprocess" not in modules
+        assert self.script_import_ms(rows) < self.STARTUP_BUDGET_MS
+    
+    def test_help_skips_selenium(self):
+        """Test that --help does not import selenium"""
+        rows = self.import_profile("--help")
+        
+        assert not any(name.startswith("selenium") for name, _, _ in rows)
+        assert self.script_import_ms(rows) < self.STARTUP_BUDGET_MS
+    
+    def test_validate_only_does_not_touch_chrome(self):
+        """Test that --validate-only never runs pgrep or pkill"""
+        from truekey_deleter.cli import main
+        
+        with patch("subprocess.run") as mock_run, patch("builtins.print"):
+            assert main(["--validate-only"]) == EXIT_OK
+        
+        mock_run.assert_not_called()
+
+
+class TestPersistentBrowser:
+    """Tests for the persistent browser used by --attach"""
+    
+    def setup_method(self):
+        """Create an empty TrueKey profile directory"""
+        self.profile_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Remove the profile directory"""
+        shutil.rmtree(self.profile_dir)
+    
+    def chrome_command_line(self, pid):
+        return f"/usr/bin/chrome --user-data-dir={self.profile_dir} --remote-debugging-port=9222"
+    
+    def test_start_records_state_and_reuses_browser(self):
+        """Test that start launches Chrome once and later calls reuse it"""
+        from truekey_deleter import browser
+        
+        process = Mock(pid=os.getpid())
+        process.poll.return_value = None
+        version = {"Browser": "Chrome/130.0"}
+        with patch.object(browser.subprocess, "Popen", return_value=process) as mock_popen, \
+                patch.object(browser, "devtools_version", side_effect=[None, None, version, version]), \
+                patch.object(browser, "find_chrome_binary", return_value="/usr/bin/chrome"), \
+                patch.object(browser, "process_command_line", self.chrome_command_line), \
+                patch("builtins.print"):
+            state = browser.start_browser(self.profile_dir, debug_port=9333, headless=True)
+            again = browser.start_browser(self.profile_dir, debug_port=9333)
+        
+        command = mock_popen.call_args[0][0]
+        assert command[0] == "/usr/bin/chrome"
+        assert "--remote-debugging-port=9333" in command
+        assert "--headless=new" in command
+        assert mock_popen.call_count == 1
+        assert state["port"] == again["port"] == 9333
+        assert browser.read_browser_state(self.profile_dir)["pid"] == os.getpid()
+    
+    def test_status_discards_stale_state(self):
+        """Test that a state file of an exited browser is removed"""
+        from truekey_deleter import browser
+        
+        with open(browser.state_file_path(self.profile_dir), "w") as f:
+            f.write('{"pid": 1, "port": 9222, "started": 0}')
+        
+        with patch.object(browser, "process_alive", return_value=False):
+            assert browser.browser_status(self.profile_dir) is None
+        assert not os.path.exists(browser.state_file_path(self.profile_dir))
+    
+    def test_unresponsive_browser_is_not_started_twice(self):
+        """Test that a live browser whose DevTools port is silent keeps its state and blocks start"""
+        from truekey_deleter import browser
+        from truekey_deleter.cli import run_browser_command
+        from truekey_deleter.config import EXIT_BROWSER_NOT_RUNNING
+        
+        with open(browser.state_file_path(self.profile_dir), "w") as f:
+            f.write('{"pid": 4242, "port": 9222, "started": 0}')
+        
+        with patch.object(browser, "process_alive", return_value=True), \
+                patch.object(browser, "process_command_line", self.chrome_command_line), \
+                patch.object(browser, "devtools_version", return_value=None), \
+                patch.object(browser.subprocess, "Popen") as mock_popen:
+            state = browser.browser_status(self.profile_dir)
+            with pytest.raises(RuntimeError, match="pid 4242"):
+                browser.start_browser(self.profile_dir)
+            with patch("builtins.print") as mock_print:
+                code = run_browser_command("status", SessionConfig(truekey_profile_dir=self.profile_dir))
+        
+        assert state["healthy"] is False and state["pid"] == 4242
+        mock_popen.assert_not_called()
+        assert os.path.exists(browser.state_file_path(self.profile_dir))
+        assert code == EXIT_BROWSER_NOT_RUNNING
+        assert "not answering" in str(mock_print.call_args_list)
+    
+    def test_stop_terminates_browser(self):
+        """Test that stop signals the recorded browser process"""
+        from truekey_deleter import browser
+        
+        with open(browser.state_file_path(self.profile_dir), "w") as f:
+            f.write('{"pid": 4242, "port": 9222, "started": 0}')
+        
+        with patch.object(browser, "process_alive", side_effect=[True, False, False]), \
+                patch.object(browser, "process_command_line", self.chrome_command_line), \
+                patch.object(browser.os, "kill") as mock_kill:
+            assert browser.stop_browser(self.profile_dir) is True
+        
+        mock_kill.assert_called_once_with(4242, browser.signal.SIGTERM)
+        assert browser.read_browser_state(self.profile_dir) is None
+        assert browser.stop_browser(self.profile_dir) is False
+    
+    def test_reused_pid_is_not_signalled(self):
+        """Test that a recorded PID now used by another process counts as a stale state file"""
+        from truekey_deleter import browser
+        
+        for check in ("command line", "devtools port"):
+            with open(browser.state_file_path(self.profile_dir), "w") as f:
+                f.write('{"pid": 4242, "port": 9222, "started": 0}')
+            command_line = "/usr/bin/python3 unrelated.py" if check == "command line" else None
+            
+            with patch.object(browser, "process_alive", return_value=True), \
+                    patch.object(browser, "process_command_line", return_value=command_line), \
+                    patch.object(browser, "devtools_version", return_value=None), \
+                    patch.object(browser.os, "kill") as mock_kill:
+                assert browser.browser_status(self.profile_dir) is None
+                with open(browser.state_file_path(self.profile_dir), "w") as f:
+                    f.write('{"pid": 4242, "port": 9222, "started": 0}')
+                assert browser.stop_browser(self.profile_dir) is False
+            
+            mock_kill.assert_not_called()
+            assert browser.read_browser_state(self.profile_dir) is None, check
+    
+    def test_attach_session_skips_chrome_process_check(self):
+        """Test that --attach connects through debuggerAddress without pkill"""
+        from truekey_deleter import browser
+        from truekey_deleter.cli import main
+        
+        state = {"pid": 1, "port": 9333, "started": 0}
+        with patch.object(browser, "start_browser", return_value=state), \
+                patch("selenium.webdriver.Chrome") as mock_chrome, \
+                patch("truekey_deleter.chrome.close_running_chrome") as mock_close, \
+                patch("truekey_deleter.session.DeletionSession.load_dashboard",
+                      side_effect=DashboardNotReadyError("not ready")), \
+                patch("builtins.print"):
+            code = main(["--attach", "--non-interactive", "--debug-port", "9333"])
+        
+        assert code == EXIT_DASHBOARD_NOT_READY
+        mock_close.assert_not_called()
+        assert mock_chrome.call_args[1]["options"].debugger_address == "127.0.0.1:9333"
+    
+    def test_browser_subcommand_arguments(self):
+        """Test that browser options are accepted before and after the subcommand"""
+        args = build_parser().parse_args(["browser", "start", "--debug-port", "9333", "--headless"])
+        assert (args.command, args.action, args.debug_port, args.headless) == ("browser", "start", 9333, True)
+        
+        args = build_parser().parse_args(["--debug-port", "9444", "browser", "status"])
+        assert (args.action, args.debug_port, args.headless) == ("status", 9444, False)
+        assert build_parser().parse_args([]).command is None
+
+
+def fake_profile_worker(name, config):
+    """Process pool worker for the runner tests; "crash" profiles die on their first attempt"""
+    marker = os.path.join(config.truekey_profile_dir, "attempted")
+    first_attempt = not os.path.exists(marker)
+    open(marker, "w").close()
+    if name.startswith("crash") and first_attempt:
+        os._exit(1)
+    if name.startswith("fail"):
+        return {"name": name, "status": "failed", "deleted": 0, "skipped": 0, "elapsed": 0.0,
+                "error": "dashboard not ready"}
+    return {"name": name, "status": "ok", "deleted": len(name), "skipped": 0, "elapsed": 0.01,
+            "error": None, "pid": os.getpid(), "engine": config.engine, "export_path": config.export_path}
+
+
+class TestProfileRunner:
+    """Tests for the --profiles multi-profile runner"""
+    
+    def setup_method(self):
+        """Create a directory for manifests and profiles"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Remove the temporary directory"""
+        shutil.rmtree(self.temp_dir)
+    
+    def write_manifest(self, profiles):
+        import json
+        path = os.path.join(self.temp_dir, "profiles.json")
+        with open(path, "w") as f:
+            json.dump({"profiles": profiles}, f)
+        return path
+    
+    def test_manifest_paths_and_overrides(self):
+        """Test that relative paths resolve against the manifest and names default"""
+        from truekey_deleter.runner import load_profile_manifest
+        path = self.write_manifest([{"truekey_profile_dir": "alice"},
+                                    {"name": "bob", "truekey_profile_dir": "b", "engine": "js"}])
+        
+        profiles = load_profile_manifest(path)
+        
+        assert profiles[0]["name"] == "alice"
+        assert profiles[0]["truekey_profile_dir"] == os.path.join(self.temp_dir, "alice")
+        assert profiles[1]["engine"] == "js"
+    
+    def test_manifest_rejects_shared_user_data_dir(self):
+        """Test that two profiles can never share a user-data-dir"""
+        from truekey_deleter.runner import load_profile_manifest
+        path = self.write_manifest([{"name": "a", "truekey_profile_dir": "shared"},
+                                    {"name": "b", "truekey_profile_dir": "./x/../shared"}])
+        
+        with pytest.raises(ValueError, match="share the user-data-dir"):
+            load_profile_manifest(path)
+        
+        with pytest.raises(ValueError, match="unknown settings"):
+            load_profile_manifest(self.write_manifest([{"truekey_profile_dir": "a", "colour": "red"}]))
+        
+        with pytest.raises(ValueError, match="share the export file"):
+            load_profile_manifest(self.write_manifest([
+                {"name": "a", "truekey_profile_dir": "a", "export_path": "inv.csv"},
+                {"name": "b", "truekey_profile_dir": "b", "export_path": "./inv.csv"}]))
+    
+    def test_profile_lock(self):
+        """Test that a live lock blocks a second worker and a stale one is taken over"""
+        from truekey_deleter.runner import (LOCK_FILE_NAME, ProfileLockedError, acquire_profile_lock,
+                                            release_profile_lock)
+        lock = acquire_profile_lock(self.temp_dir)
+        with pytest.raises(ProfileLockedError):
+            acquire_profile_lock(self.temp_dir)
+        release_profile_lock(lock)
+        
+        with open(os.path.join(self.temp_dir, LOCK_FILE_NAME), "w") as f:
+            f.write("999999999")
+        release_profile_lock(acquire_profile_lock(self.temp_dir))
+    
+    def test_worker_count_is_capped_by_memory(self):
+        """Test the CPU and memory based pool size"""
+        from truekey_deleter import runner
+        with patch.object(runner.os, "cpu_count", return_value=16), \
+                patch.object(runner, "available_memory_mb", return_value=3000):
+            assert runner.default_worker_count(10) == 2
+            assert runner.default_worker_count(1) == 1
+        with patch.object(runner.os, "cpu_count", return_value=16), \
+                patch.object(runner, "available_memory_mb", return_value=None):
+            assert runner.default_worker_count(10) == 8
+    
+    def test_run_profiles_aggregates_and_restarts(self):
+        """Test retries, worker crashes and per-profile overrides in a real process pool"""
+        from truekey_deleter.runner import run_profiles
+        profiles = []
+        for name in ("alice", "crash-bob", "fail-carol"):
+            directory = os.path.join(self.temp_dir, name)
+            os.makedirs(directory)
+            profiles.append({"name": name, "truekey_profile_dir": directory})
+        profiles[0]["engine"] = "js"
+        
+        base_config = SessionConfig(export_path=os.path.join(self.temp_dir, "inv.jsonl.gz"))
+        
+        with patch("builtins.print"):
+            results = run_profiles(profiles, base_config, workers=2, retries=1, worker=fake_profile_worker)
+        
+        by_name = {result["name"]: result for result in results}
+        assert [result["name"] for result in results] == ["alice", "crash-bob", "fail-carol"]
+        assert by_name["alice"]["status"] == "ok" and by_name["alice"]["engine"] == "js"
+        assert by_name["crash-bob"]["status"] == "ok"
+        assert by_name["crash-bob"]["attempts"] == 2
+        assert by_name["fail-carol"]["status"] == "failed"
+        assert by_name["fail-carol"]["attempts"] == 2
+        # Workers never share an inventory file
+        assert by_name["alice"]["export_path"] == os.path.join(self.temp_dir, "inv.alice.jsonl.gz")
+        assert by_name["crash-bob"]["export_path"] == os.path.join(self.temp_dir, "inv.crash-bob.jsonl.gz")
+    
+    def test_broken_pool_keeps_finished_results(self):
+        """Test that a profile that finished before a worker died is not failed or run again"""
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        from truekey_deleter import runner
+        
+        submitted = []
+        
+        class FakePool:
+            def __init__(self, max_workers):
+                pass
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc_info):
+                return False
+            
+            def submit(self, worker, name, config):
+                submitted.append(name)
+                future = Future()
+                if name == "crash-bob" and submitted.count(name) == 1:
+                    future.set_exception(BrokenProcessPool("a worker died"))
+                else:
+                    future.set_result({"name": name, "status": "ok", "deleted": 1, "skipped": 0,
+                                       "elapsed": 0.0, "error": None})
+                return future
+        
+        def crash_first(futures, return_when):
+            # The dead worker is reported before alice's finished, uncollected future
+            done = {future for future in futures if future.exception() is not None} or set(futures)
+            return done, set(futures) - done
+        
+        profiles = [{"name": name, "truekey_profile_dir": os.path.join(self.temp_dir, name)}
+                    for name in ("alice", "crash-bob")]
+        with patch.object(runner, "ProcessPoolExecutor", FakePool), \
+                patch.object(runner, "wait", crash_first), \
+                patch("builtins.print"):
+            results = runner.run_profiles(profiles, workers=2, retries=1)
+        
+        assert submitted == ["alice", "crash-bob", "crash-bob"]
+        assert [(result["status"], result["attempts"]) for result in results] == [("ok", 1), ("ok", 2)]
+
+
+class TestDeletionJournal:
+    """Tests for the progress journal and --resume"""
+    
+    def setup_method(self):
+        """Create an empty TrueKey profile directory"""
+        self.profile_dir = tempfile.mkdtemp()
+        self.journal_path = os.path.join(self.profile_dir, "deletion-journal.jsonl")
+    
+    def teardown_method(self):
+        """Remove the profile directory"""
+        shutil.rmtree(self.profile_dir)
+    
+    def make_session(self, rows, **overrides):
+        dashboard = FakeDashboardRows(rows)
+        dashboard.get = Mock()
+        settings = dict(truekey_profile_dir=self.profile_dir, wait_timeout=0.05, poll_interval=0.01,
+                        ready_timeout=0.1, interactive=False)
+        settings.update(overrides)
+        return DeletionSession(SessionConfig(**settings), driver=dashboard, confirm=Mock())
+    
+    def test_records_and_summary(self):
+        """Test that a finished journal reports its deleted entries"""
+        from truekey_deleter.journal import DeletionJournal, read_journal
+        
+        with DeletionJournal(self.journal_path, fsync="always") as journal:
+            journal.start(mode="ui")
+            journal.record_deleted("alice@example.com")
+            journal.record_deleted(None)
+            journal.finish(2)
+        state = read_journal(self.journal_path)
+        
+        assert state["deleted"] == 2
+        assert state["runs"] == 1
+        assert state["finished"] is True
+    
+    def test_truncated_last_line_is_ignored(self):
+        """Test that a record cut off by a crash does not break the summary"""
+        from truekey_deleter.journal import DeletionJournal, read_journal
+        
+        with DeletionJournal(self.journal_path, fsync="never") as journal:
+            journal.start(mode="ui")
+            journal.record_deleted("a")
+        with open(self.journal_path, "a") as f:
+            f.write('{"event":"deleted","id":"b"')
+        state = read_journal(self.journal_path)
+        
+        assert state["deleted"] == 1
+        assert state["finished"] is False
+    
+    def test_batch_policy_syncs_every_batch(self):
+        """Test that the batch policy fsyncs once per batch instead of per record"""
+        from truekey_deleter.journal import DeletionJournal
+        
+        with patch("truekey_deleter.journal.os.fsync") as mock_fsync:
+            journal = DeletionJournal(self.journal_path, fsync="batch", batch_size=10)
+            for index in range(25):
+                journal.record_deleted(str(index))
+            assert mock_fsync.call_count == 2
+            journal.close()
+            assert mock_fsync.call_count == 3
+        
+        with pytest.raises(ValueError):
+            DeletionJournal(self.journal_path, fsync="sometimes")
+    
+    def test_session_resumes_interrupted_run(self):
+        """Test that --resume continues the journal of a run that crashed"""
+        from truekey_deleter.journal import read_journal
+        
+        session = self.make_session(5)
+        third_row = session.driver.rows[2]
+        third_row.click.side_effect = KeyboardInterrupt  # Interrupted before the third deletion
+        with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+            with pytest.raises(KeyboardInterrupt):
+                session.run()
+        state = read_journal(self.journal_path)
+        assert state["deleted"] == 2
+        assert state["finished"] is False
+        
+        resumed = self.make_session(3, resume=True)
+        with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+            stats = resumed.run()
+        state = read_journal(self.journal_path)
+        
+        assert stats.deleted == 3
+        assert stats.previously_deleted == 2
+        resumed.confirm.assert_not_called()
+        assert state["runs"] == 2
+        assert state["deleted"] == 5
+        assert state["finished"] is True
+    
+    def test_webdriver_engine_journals_row_labels(self):
+        """Test that the default engine journals each deleted login's row text"""
+        import json
+        
+        session = self.make_session(3)
+        labels = [f"row {id(icon)}" for icon in session.driver.rows]
+        with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+            session.run()
+        with open(self.journal_path) as f:
+            records = [json.loads(line) for line in f]
+        
+        assert [record["id"] for record in records if record["event"] == "deleted"] == labels
+    
+    def test_resume_without_interrupted_run_starts_fresh(self):
+        """Test that --resume after a finished run starts a new journal"""
+        with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+            self.make_session(2).run()
+            stats = self.make_session(1, resume=True).run()
+        
+        assert stats.previously_deleted == 0
+    
+    def test_dry_run_keeps_interrupted_journal(self):
+        """Test that a dry run neither truncates nor finishes an interrupted run's journal"""
+        import dataclasses
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.journal import DeletionJournal, read_journal
+        
+        with DeletionJournal(self.journal_path) as journal:
+            journal.start(mode="ui")
+            for _ in range(5):
+                journal.record_deleted(None)
+        config = SessionConfig(truekey_profile_dir=self.profile_dir, wait_timeout=0.05, poll_interval=0.001,
+                               ready_timeout=0.1, interactive=False, dry_run=True, scroll_settle=0)
+        for resume in (False, True):
+            with patch("builtins.print"):
+                DeletionSession(dataclasses.replace(config, resume=resume), driver=SimulatedWebDriver(10)).run()
+            state = read_journal(self.journal_path)
+            assert state["deleted"] == 5
+            assert state["finished"] is False
+        assert build_parser().parse_args(["--resume", "--journal-fsync", "always"]).resume is True
+
+
+class TestStepInstrumentation:
+    """Tests for the per-step timers and the JSON run report"""
+    
+    def test_percentiles(self):
+        """Test linearly interpolated percentiles"""
+        from truekey_deleter.instrumentation import percentile
+        
+        values = list(range(1, 101))
+        
+        assert percentile(values, 50) == 50.5
+        assert percentile(values, 99) == pytest.approx(99.01)
+        assert percentile([3.0], 95) == 3.0
+        assert percentile([], 50) == 0.0
+    
+    def test_webdriver_steps_and_stale_retries_are_recorded(self):
+        """Test that the WebDriver loop times each step and counts stale retries"""
+        from selenium.common.exceptions import StaleElementReferenceException
+        from truekey_deleter.instrumentation import StepTimer
+        
+        dashboard = FakeDashboardRows(3)
+        first = dashboard.rows[0]
+        first.click.side_effect = iter_side_effects(StaleElementReferenceException(), first.click.side_effect)
+        timer = StepTimer()
+        waits = WaitEngine(dashboard, timeout=0.05, poll_interval=0.01)
+        with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+            delete_with_webdriver(dashboard, waits, timer=timer)
+        summary = timer.summary()
+        
+        assert summary["item"]["count"] == 3
+        assert summary["click"]["count"] == 4
+        assert summary["find"]["count"] == 5  # Includes the lookup that found no row
+        assert summary["item"]["p50"] <= summary["item"]["p99"] <= summary["item"]["max"]
+        assert timer.counters == {"stale_retries": 1}
+    
+    def test_session_run_report(self):
+        """Test that a session run yields a JSON report of its phases"""
+        import json
+        from truekey_deleter.instrumentation import build_run_report, write_run_report
+        
+        profile_dir = tempfile.mkdtemp()
+        try:
+            dashboard = FakeDashboardRows(4)
+            dashboard.get = Mock()
+            config = SessionConfig(truekey_profile_dir=profile_dir, wait_timeout=0.05, poll_interval=0.01,
+                                   ready_timeout=0.1, interactive=False)
+            with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+                stats = DeletionSession(config, driver=dashboard).run()
+            report_path = os.path.join(profile_dir, "report.json")
+            write_run_report(report_path, build_run_report(stats))
+            with open(report_path) as f:
+                report = json.load(f)
+        finally:
+            shutil.rmtree(profile_dir)
+        
+        assert {"dashboard_load", "list_mode", "deletion", "item"} <= set(report["steps"])
+        assert set(report["steps"]["item"]) >= {"p50", "p95", "p99"}
+        assert report["deleted"] == 4
+        assert report["items_per_second"] > 0
+        assert build_parser().parse_args(["--report", "run.json"]).report == "run.json"
+
+
+class TestMetricsExporter:
+    """Tests for the Prometheus / OpenMetrics exporter"""
+    
+    def make_metrics(self):
+        from truekey_deleter.instrumentation import StepTimer
+        from truekey_deleter.metrics import DeletionMetrics
+        
+        metrics = DeletionMetrics({"engine": "webdriver"}, buckets=(0.1, 1.0))
+        timer = StepTimer(metrics)
+        for seconds in (0.05, 0.5, 3.0):
+            timer.record("item", seconds)
+            timer.count("deleted")
+        timer.count("stale_retries")
+        timer.count("skipped")
+        timer.record("find", 0.01)  # Not exported
+        return metrics
+    
+    def test_render_formats(self):
+        """Test the OpenMetrics and textfile (Prometheus) renderings"""
+        metrics = self.make_metrics()
+        openmetrics = metrics.render()
+        text = metrics.render(openmetrics=False)
+        
+        assert 'truekey_items_deleted_total{engine="webdriver"} 3' in openmetrics
+        assert 'truekey_retries_total{engine="webdriver",kind="stale"} 1' in openmetrics
+        assert 'truekey_skipped_icons_total{engine="webdriver"} 1' in openmetrics
+        assert 'truekey_deletion_latency_seconds_bucket{engine="webdriver",le="0.1"} 1' in openmetrics
+        assert 'truekey_deletion_latency_seconds_bucket{engine="webdriver",le="+Inf"} 3' in openmetrics
+        assert 'truekey_deletion_latency_seconds_count{engine="webdriver"} 3' in openmetrics
+        assert openmetrics.endswith("# EOF\n")
+        assert "# TYPE truekey_items_deleted counter" in openmetrics
+        assert "# TYPE truekey_items_deleted_total counter" in text
+        assert "# EOF" not in text
+    
+    def test_http_endpoint(self):
+        """Test that the metrics can be scraped from the local endpoint"""
+        import urllib.request
+        from truekey_deleter.metrics import MetricsServer
+        
+        with patch("builtins.print"):
+            server = MetricsServer(self.make_metrics(), 0).start()
+        try:
+            request = urllib.request.Request(f"http://127.0.0.1:{server.port}/metrics",
+                                             headers={"Accept": "application/openmetrics-text"})
+            with urllib.request.urlopen(request, timeout=5) as response:
+                content_type = response.headers["Content-Type"]
+                body = response.read().decode("utf-8")
+        finally:
+            server.stop()
+        
+        assert content_type.startswith("application/openmetrics-text")
+        assert "truekey_items_deleted_total" in body
+    
+    def test_session_writes_textfile(self):
+        """Test that a session with --metrics-textfile leaves the final counts on disk"""
+        profile_dir = tempfile.mkdtemp()
+        try:
+            textfile = os.path.join(profile_dir, "truekey.prom")
+            dashboard = FakeDashboardRows(3)
+            dashboard.get = Mock()
+            config = SessionConfig(truekey_profile_dir=profile_dir, wait_timeout=0.05, poll_interval=0.01,
+                                   ready_timeout=0.1, interactive=False, metrics_textfile=textfile)
+            with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+                with DeletionSession(config, driver=dashboard) as session:
+                    session.run()
+            with open(textfile) as f:
+                content = f.read()
+        finally:
+            shutil.rmtree(profile_dir)
+        
+        assert 'truekey_items_deleted_total{engine="webdriver",mode="ui"} 3' in content
+        assert 'truekey_deletion_latency_seconds_count{engine="webdriver",mode="ui"} 3' in content
+    
+    def test_driver_failure_still_writes_textfile(self):
+        """Test that a non-interactive run whose driver cannot start still stops the textfile writer"""
+        import threading
+        from truekey_deleter.cli import main
+        from truekey_deleter.config import EXIT_DRIVER_FAILED
+        from truekey_deleter.session import DriverCreationError
+        
+        profile_dir = tempfile.mkdtemp()
+        try:
+            textfile = os.path.join(profile_dir, "truekey.prom")
+            with patch("truekey_deleter.session.DeletionSession.start",
+                       side_effect=DriverCreationError("chromedriver missing")), \
+                    patch("truekey_deleter.chrome.close_running_chrome"), patch("builtins.print"):
+                code = main(["--non-interactive", "--metrics-textfile", textfile])
+            assert code == EXIT_DRIVER_FAILED
+            assert os.path.exists(textfile)
+            # The exporter was stopped, which wrote the final values
+            assert not [t for t in threading.enumerate() if t.name == "metrics-textfile"]
+        finally:
+            shutil.rmtree(profile_dir)
+
+
+class TestSimulatedWebDriver:
+    """Tests of the deletion loop against the CPU-only simulated dashboard"""
+    
+    def run_loop(self, driver):
+        stats = {}
+        waits = WaitEngine(driver, timeout=1, poll_interval=0.001)
+        with patch("builtins.print", lambda *args, **kwargs: None):
+            deleted = delete_with_webdriver(driver, waits, stats)
+        return deleted, stats
+    
+    def test_loop_cost_is_linear(self):
+        """Test that every deletion costs the same number of WebDriver commands"""
+        from test_mocks import SimulatedWebDriver
+        
+        small, large = SimulatedWebDriver(200), SimulatedWebDriver(2000)
+        assert self.run_loop(small)[0] == 200
+        assert self.run_loop(large)[0] == 2000
+        
+        assert not large.rows
+        assert large.stats["commands"] / 2000 == pytest.approx(small.stats["commands"] / 200, rel=0.01)
+        assert large.stats["elements_returned"] == 2000  # One lookup per row, never a full rescan
+    
+    def test_injected_failures_are_retried(self):
+        """Test that stale rows and intercepted clicks are retried"""
+        from test_mocks import SimulatedWebDriver
+        
+        driver = SimulatedWebDriver(500, stale_rate=0.1, click_failure_rate=0.1, seed=7)
+        deleted, stats = self.run_loop(driver)
+        
+        # A row whose clicks are intercepted three times in a row is skipped and stays
+        assert deleted + stats["skipped"] == 500
+        assert len(driver.rows) == stats["skipped"]
+        assert stats["stale_retries"] == driver.stats["stale_rerenders"] > 0
+        assert driver.stats["intercepted_clicks"] > 0
+    
+    def test_session_with_latency_and_delayed_removal(self):
+        """Test a full session against a dashboard that removes rows after a delay"""
+        from test_mocks import SimulatedWebDriver
+        
+        driver = SimulatedWebDriver(50, latency=0.005, removal_delay=0.02)
+        profile_dir = tempfile.mkdtemp()
+        try:
+            config = SessionConfig(truekey_profile_dir=profile_dir, wait_timeout=1, poll_interval=0.001,
+                                   ready_timeout=1, interactive=False, scroll_settle=0.01)
+            with patch("builtins.print"):
+                stats = DeletionSession(config, driver=driver).run()
+        finally:
+            shutil.rmtree(profile_dir)
+        
+        assert stats.deleted == 50
+        assert driver.list_mode is True
+        assert driver.clock == pytest.approx(driver.stats["commands"] * 0.005)
+
+
+class TestLocatorRegistry:
+    """Tests for the selector schema and the startup locator calibration"""
+
+    def test_bundled_schema_is_valid(self):
+        """Test that the bundled schema lists the reference locators first"""
+        from truekey_deleter.locators import load_selector_schema
+
+        candidates = load_selector_schema()
+        assert candidates["list_mode"][0] == LIST_MODE_LOCATOR
+        assert candidates["trash_icon"][0] == TRASH_ICON_LOCATOR
+        assert ("css selector", "#list-mode") in candidates["list_mode"]
+
+    def test_schema_version_is_checked(self):
+        """Test that an unknown schema version or element is rejected"""
+        import json
+        from truekey_deleter.locators import load_selector_schema
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "selectors.json")
+            for schema in ({"schema_version": 2, "locators": {}},
+                           {"schema_version": 1, "locators": {"logo": [{"by": "id", "value": "logo"}]}},
+                           {"schema_version": 1, "locators": {"list_mode": [{"by": "jquery", "value": "x"}]}}):
+                with open(path, "w") as f:
+                    json.dump(schema, f)
+                with pytest.raises(ValueError):
+                    load_selector_schema(path)
+
+    def test_calibration_picks_fastest_valid_candidate(self):
+        """Test that the fastest locator matching the reference elements is chosen"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.config import CONFIRM_BUTTON_LOCATOR
+        from truekey_deleter.locators import LocatorRegistry
+
+        driver = SimulatedWebDriver(100, realtime=True)
+        driver.lookup_cost = {"xpath": 0.002}
+        registry = LocatorRegistry({"trash_icon": [TRASH_ICON_LOCATOR,
+                                                   ("css selector", 'img[src$="trash.svg"]'),
+                                                   ("css selector", "img.missing")]})
+        chosen = registry.calibrate(driver, ["trash_icon", "confirm_button"], samples=3)
+
+        assert chosen["trash_icon"] == ("css selector", 'img[src$="trash.svg"]')
+        assert chosen["confirm_button"] == CONFIRM_BUTTON_LOCATOR  # No dialog open: not calibrated
+        report = registry.report["trash_icon"]
+        assert report["calibrated"] is True
+        assert [c["valid"] for c in report["candidates"]] == [True, True, False]
+        assert [c["count"] for c in report["candidates"]] == [100, 100, 0]
+        assert report["candidates"][0]["median_ms"] >= 2.0
+        assert registry.report["confirm_button"]["calibrated"] is False
+
+    def test_session_reports_chosen_locators(self):
+        """Test that the session calibrates its locators and reports them"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.instrumentation import build_run_report
+
+        driver = SimulatedWebDriver(20)
+        profile_dir = tempfile.mkdtemp()
+        try:
+            config = SessionConfig(truekey_profile_dir=profile_dir, wait_timeout=1, poll_interval=0.001,
+                                   ready_timeout=1, interactive=False, scroll_settle=0.01)
+            with patch("builtins.print"):
+                stats = DeletionSession(config, driver=driver).run()
+        finally:
+            shutil.rmtree(profile_dir)
+
+        assert stats.deleted == 20
+        assert stats.locators["list_mode"]["calibrated"] is True
+        assert stats.locators["trash_icon"]["calibrated"] is True
+        assert len(stats.locators["trash_icon"]["candidates"]) == 3
+        assert stats.steps["locator_calibration"]["count"] == 2
+        assert build_run_report(stats)["locators"] == stats.locators
+
+
+
+class TestRowStream:
+    """Tests for the scroll-aware row enumeration of lazily rendered lists"""
+    
+    def run_loop(self, driver, rows=None):
+        stats = {}
+        waits = WaitEngine(driver, timeout=1, poll_interval=0.001)
+        with patch("builtins.print", lambda *args, **kwargs: None):
+            deleted = delete_with_webdriver(driver, waits, stats, rows=rows)
+        return deleted, stats
+    
+    def test_windowed_list_is_deleted_to_the_end(self):
+        """Test that the stream scrolls for every window and stops at the true end"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.rows import RowStream
+        
+        driver = SimulatedWebDriver(230, window=50)
+        rows = RowStream(driver, TRASH_ICON_LOCATOR, settle_timeout=0.01, poll_interval=0.001)
+        deleted, stats = self.run_loop(driver, rows)
+        
+        assert deleted == 230
+        assert not driver.rows
+        # Four windows were loaded; the fifth scroll found the end of the list
+        assert driver.stats["scrolls"] == rows.pages == 5
+    
+    def test_without_scrolling_only_the_rendered_window_is_deleted(self):
+        """Test that the default, non-scrolling stream ends with the rendered rows"""
+        from test_mocks import SimulatedWebDriver
+        
+        driver = SimulatedWebDriver(230, window=50)
+        deleted, stats = self.run_loop(driver)
+        
+        assert deleted == 50
+        assert driver.stats["scrolls"] == 0
+    
+    def test_fully_rendered_list_ends_after_one_scroll(self):
+        """Test that a list without lazy rendering costs a single scroll at the end"""
+        from test_mocks import SimulatedWebDriver
+        
+        driver = SimulatedWebDriver(40)
+        profile_dir = tempfile.mkdtemp()
+        try:
+            config = SessionConfig(truekey_profile_dir=profile_dir, wait_timeout=1, poll_interval=0.001,
+                                   ready_timeout=1, interactive=False, scroll_settle=0.01)
+            with patch("builtins.print"):
+                stats = DeletionSession(config, driver=driver).run()
+        finally:
+            shutil.rmtree(profile_dir)
+        
+        assert stats.deleted == 40
+        assert driver.stats["scrolls"] == 1
+        assert stats.steps["scroll"]["count"] == 1
+    
+    def test_rendered_rows_are_tracked_by_staleness(self):
+        """Test that rows are not read while the list has neither scrolled nor reused a node"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.rows import RowStream
+        
+        driver = SimulatedWebDriver(20)
+        execute_script = driver.execute_script
+        driver.execute_script = Mock(side_effect=execute_script)
+        rows = RowStream(driver, TRASH_ICON_LOCATOR, settle_timeout=0.01, poll_interval=0.001)
+        deleted, stats = self.run_loop(driver, rows)
+        
+        assert deleted == 20
+        assert not rows.reuses_nodes
+        assert ROW_LABEL_SCRIPT not in [call[0][0] for call in driver.execute_script.call_args_list]
+    
+    def test_row_refilled_in_place_switches_to_text_tracking(self):
+        """Test that a node reused for the next login counts as removed and its text is compared from then on"""
+        from truekey_deleter.instrumentation import StepTimer
+        from truekey_deleter.rows import RowStream
+        
+        dashboard = FakeRefillingRows(3)
+        expected = list(dashboard.logins)
+        rows = RowStream(dashboard, TRASH_ICON_LOCATOR, settle_timeout=0)
+        timer = StepTimer()
+        deleted_labels = []
+        waits = WaitEngine(dashboard, timeout=0.05, poll_interval=0.001)
+        with patch("truekey_deleter.engines.ActionChains"), patch("builtins.print"):
+            deleted = delete_with_webdriver(dashboard, waits, {}, on_deleted=deleted_labels.append, timer=timer,
+                                            rows=rows)
+        
+        assert deleted == 3
+        assert deleted_labels == expected
+        assert rows.reuses_nodes
+        # Only the first deletion waited for the staleness that never came
+        assert timer.counters["reused_rows"] == 1
+    
+    @pytest.mark.chrome
+    def test_engines_against_windowed_fixture(self):
+        """Test every UI engine against a fixture that renders rows in windows of 50"""
+        driver = create_headless_test_driver()
+        profile_dir = tempfile.mkdtemp()
+        try:
+            for engine in ("webdriver", "js", "cdp", "pipeline"):
+                config = SessionConfig(dashboard_url=fixture_url("dashboard.html", logins=120, window=50),
+                                       truekey_profile_dir=profile_dir, engine=engine, wait_timeout=2,
+                                       poll_interval=0.01, ready_timeout=5, interactive=False,
+                                       scroll_settle=0.5, journal_fsync="never")
+                with patch("builtins.print"):
+                    stats = DeletionSession(config, driver=driver).run()
+                assert stats.deleted == 120, engine
+        finally:
+            driver.quit()
+            shutil.rmtree(profile_dir)
+
+
+class TestSelectiveDeletion:
+    """Tests for --match/--exclude filtered deletion"""
+    
+    def setup_method(self):
+        """Create an empty TrueKey profile directory for the session's journal"""
+        self.profile_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Remove the profile directory"""
+        shutil.rmtree(self.profile_dir)
+    
+    def run_session(self, driver, **overrides):
+        settings = dict(truekey_profile_dir=self.profile_dir, wait_timeout=1, poll_interval=0.001,
+                        ready_timeout=1, interactive=False, scroll_settle=0.01)
+        settings.update(overrides)
+        with patch("builtins.print") as mock_print:
+            stats = DeletionSession(SessionConfig(**settings), driver=driver).run()
+        return stats, " ".join(str(c) for c in mock_print.call_args_list)
+    
+    def test_patterns_and_label_parsing(self):
+        """Test glob patterns per field and the site/username guessed from row text"""
+        from truekey_deleter.filters import RowFilter, parse_row_label
+        
+        assert parse_row_label("alice@mail.com (Shop.example.org) ") == ("Shop.example.org", "alice@mail.com")
+        assert parse_row_label("no metadata") == (None, None)
+        
+        row_filter = RowFilter(["site:*.example.org", "*bank*"], ["username:admin@*"])
+        assert row_filter.matches({"site": "shop.EXAMPLE.org", "username": "bob@mail.com"})
+        assert row_filter.matches({"site": "x.com", "username": "y", "label": "y (mybank login)"})
+        assert not row_filter.matches({"site": "shop.example.org", "username": "admin@corp.com"})
+        assert not row_filter.matches({"site": "example.com", "username": "bob@mail.com"})
+        assert RowFilter(exclude=["*"]) and not RowFilter()
+    
+    def test_only_matching_rows_are_deleted(self):
+        """Test that only the selected rows of a lazily rendered list are deleted"""
+        from test_mocks import SimulatedWebDriver
+        
+        driver = SimulatedWebDriver(300, window=50)
+        # site1, site10-19 and site100-199 match; user15 and user150-159 are excluded
+        stats, printed = self.run_session(driver, match_patterns=["site:site1*.example.com"],
+                                          exclude_patterns=["username:user15*"])
+        
+        assert stats.deleted == 100
+        assert len(driver.rows) == 200
+        assert not any(row.selected for row in driver.rows)
+        assert stats.selection["indexed"] == 300
+        assert stats.selection["matched"] == 100
+        assert stats.locators["trash_icon"]["calibrated"] is False  # Filtered rows use a CSS locator
+    
+    def test_dry_run_previews_without_deleting(self):
+        """Test that a dry run indexes every row and prints the matches"""
+        from test_mocks import SimulatedWebDriver
+        
+        driver = SimulatedWebDriver(120, window=50)
+        stats, printed = self.run_session(driver, dry_run=True, match_patterns=["username:user11*"])
+        
+        assert stats.deleted == 0
+        assert len(driver.rows) == 120
+        assert driver.stats["clicks"] == 1  # Only the list-mode toggle
+        assert stats.selection == {"indexed": 120, "matched": 11, "match": ["username:user11*"],
+                                   "exclude": []}
+        assert "site110.example.com (user110@example.com)" in printed
+        assert "11 of 120 login rows match the filter" in printed
+    
+    def test_rows_with_the_same_text_are_each_counted(self):
+        """Test that duplicate logins are each previewed and counted, as each of them is deleted"""
+        from test_mocks import SimulatedWebDriver
+        
+        for dry_run in (True, False):
+            # The duplicates are rendered by a later scroll than the first row
+            driver = SimulatedWebDriver(10, window=5)
+            for row in list(driver.rows)[6:8]:
+                row.label = driver.rows[0].label
+            stats, printed = self.run_session(driver, dry_run=dry_run, match_patterns=["username:user0@*"])
+            
+            assert stats.selection["indexed"] == 10
+            assert stats.selection["matched"] == 3
+            assert stats.deleted == (0 if dry_run else 3)
+            assert len(driver.rows) == (10 if dry_run else 7)
+            if dry_run:
+                assert "3 of 10 login rows match the filter" in printed
+    
+    def test_recycled_row_is_not_deleted(self):
+        """Test that a selected row reused for another login before its click is left alone"""
+        from test_mocks import SimulatedWebDriver
+        
+        driver = SimulatedWebDriver(60, window=25)
+        remove = driver._remove
+        
+        def remove_and_recycle(row):
+            # The first deletion makes the list show another login in user12's row node
+            remove(row)
+            if driver.stats["deleted"] == 1:
+                next(r for r in driver.rows if r.label.startswith("user12@")).label = "user99@other.example.com"
+        
+        driver._remove = remove_and_recycle
+        stats, printed = self.run_session(driver, match_patterns=["site:site1*"])
+        
+        assert stats.deleted == 10  # site1, site10-11 and site13-19
+        assert stats.counters["recycled_rows"] == 1
+        assert any(row.label == "user99@other.example.com" for row in driver.rows)
+        assert len(driver.rows) == 50
+    
+    @pytest.mark.chrome
+    def test_engines_delete_only_matching_fixture_rows(self):
+        """Test every UI engine with a filter against the windowed dashboard fixture"""
+        driver = create_headless_test_driver()
+        try:
+            for engine in ("webdriver", "js", "cdp", "pipeline"):
+                url = fixture_url("dashboard.html", logins=60, window=25)
+                stats, printed = self.run_session(driver, dashboard_url=url, engine=engine, wait_timeout=2,
+                                                  ready_timeout=5, scroll_settle=0.5,
+                                                  match_patterns=["site:site1*"])
+                assert stats.deleted == 11, engine  # site1 and site10-19
+                assert len(driver.find_elements(*TRASH_ICON_LOCATOR)) == 49, engine
+        finally:
+            driver.quit()
+    
+    @pytest.mark.chrome
+    def test_engines_delete_only_matching_rows_of_recycling_list(self):
+        """Test every UI engine with a filter against a list that reuses its row nodes"""
+        driver = create_headless_test_driver()
+        try:
+            for engine in ("webdriver", "js", "cdp", "pipeline"):
+                url = fixture_url("dashboard.html", logins=60, window=25, recycle=1)
+                stats, printed = self.run_session(driver, dashboard_url=url, engine=engine, wait_timeout=2,
+                                                  ready_timeout=5, scroll_settle=0.5,
+                                                  match_patterns=["site:site1*"])
+                assert stats.deleted == 11, engine
+                driver.execute_script("document.getElementById('logins').scrollTop = 0;")
+                height, text = driver.execute_script(
+                    "var list = document.getElementById('logins');"
+                    "return [list.firstChild.offsetHeight, list.textContent];")
+                assert height == 49 * 25, engine  # The spacer is one row height per login left
+                # The top of the list is user0, user2-9 and user20-35
+                assert "(site1" not in text, engine
+                assert all(f"user{i}@" in text for i in (0, 2, 9, 20, 35)), engine
+        finally:
+            driver.quit()
+
+
+class TestLoginExport:
+    """Tests for the --export inventory written before the deletion"""
+    
+    def setup_method(self):
+        """Create an empty TrueKey profile directory for the journal and the export"""
+        self.profile_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Remove the profile directory"""
+        shutil.rmtree(self.profile_dir)
+    
+    def run_session(self, driver, **overrides):
+        settings = dict(truekey_profile_dir=self.profile_dir, wait_timeout=1, poll_interval=0.001,
+                        ready_timeout=1, interactive=False, scroll_settle=0.01)
+        settings.update(overrides)
+        with patch("builtins.print") as mock_print:
+            stats = DeletionSession(SessionConfig(**settings), driver=driver).run()
+        return stats, " ".join(str(c) for c in mock_print.call_args_list)
+    
+    def test_export_formats(self):
+        """Test the format chosen by file name and the CSV and gzip JSONL output"""
+        import csv
+        import gzip
+        import json
+        from truekey_deleter.export import LoginExporter, export_format
+        
+        assert export_format("logins.JSONL.gz") == ("jsonl", True)
+        assert export_format("logins.csv") == ("csv", False)
+        with pytest.raises(ValueError):
+            export_format("logins.json")
+        
+        records = [{"site": "a.com", "username": "alice", "last_used": None, "label": "alice a.com"}]
+        for name in ("logins.csv", "logins.jsonl.gz"):
+            path = os.path.join(self.profile_dir, name)
+            with LoginExporter(Mock(), path) as exporter:
+                exporter.write(records)
+            assert not os.path.exists(path + ".tmp")
+        with open(os.path.join(self.profile_dir, "logins.csv"), newline="") as f:
+            assert list(csv.reader(f)) == [["site", "username", "last_used", "label"],
+                                           ["a.com", "alice", "", "alice a.com"]]
+        with gzip.open(os.path.join(self.profile_dir, "logins.jsonl.gz"), "rt") as f:
+            assert [json.loads(line) for line in f] == records
+        
+        # A failed export leaves no partial file behind
+        path = os.path.join(self.profile_dir, "failed.csv")
+        with pytest.raises(RuntimeError):
+            with LoginExporter(Mock(), path):
+                raise RuntimeError("dashboard closed")
+        assert sorted(os.listdir(self.profile_dir)) == ["logins.csv", "logins.jsonl.gz"]
+    
+    def test_export_covers_every_row_before_deletion(self):
+        """Test that every row of a lazily rendered list is exported, one call per window"""
+        import gzip
+        import json
+        from test_mocks import SimulatedWebDriver
+        
+        driver = SimulatedWebDriver(250, window=100)
+        path = os.path.join(self.profile_dir, "logins.jsonl.gz")
+        stats, printed = self.run_session(driver, export_path=path)
+        
+        with gzip.open(path, "rt") as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 250
+        assert records[7] == {"site": "site7.example.com", "username": "user7@example.com",
+                              "last_used": "2024-01-08", "label": "user7@example.com (site7.example.com)"}
+        assert stats.deleted == 250
+        assert stats.export["rows"] == 250
+        assert stats.steps["export"]["count"] == 1
+        assert 0 < stats.export["extract_seconds"] <= stats.steps["export"]["total"]
+        assert f"Exported 250 logins to {path}" in printed
+    
+    def test_rows_with_the_same_text_are_all_exported(self):
+        """Test that duplicate logins each get a record while a reused row is not exported twice"""
+        from test_mocks import SimulatedWebDriver
+        from truekey_deleter.export import LoginExporter
+        
+        driver = SimulatedWebDriver(120, window=50)
+        driver.rows[90].label = driver.rows[3].label  # A duplicate vault entry
+        with LoginExporter(driver, os.path.join(self.profile_dir, "logins.csv")) as exporter:
+            assert exporter.refresh() == 50
+            # A virtualized list scrolls: row 0 now shows row 1's login and row 1 a new one
+            first, second = driver.rows[0], driver.rows[1]
+            first.label, second.label = second.label, "user999@example.com (site999.example.com)"
+            assert exporter.refresh() == 1
+            driver.rendered = 120
+            assert exporter.refresh() == 70
+        
+        assert exporter.rows == 121
+    
+    def test_resume_keeps_existing_export(self):
+        """Test that a resumed run does not replace the inventory of the interrupted run"""
+        from test_mocks import SimulatedWebDriver
+        
+        path = os.path.join(self.profile_dir, "logins.csv")
+        with open(path, "w") as f:
+            f.write("full inventory")
+        journal = os.path.join(self.profile_dir, "journal.jsonl")
+        with open(journal, "w") as f:
+            f.write('{"event": "start", "mode": "ui", "engine": "webdriver", "resumed": false}\n')
+        stats, printed = self.run_session(SimulatedWebDriver(5), export_path=path, resume=True,
+                                          journal_path=journal)
+        
+        assert stats.deleted == 5
+        assert stats.export == {}
+        with open(path) as f:
+            assert f.read() == "full inventory"
+
 class TestTrueKeyScriptIntegration:
     """Integration tests for the complete TrueKey deletion workflow"""
     
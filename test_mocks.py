@@ -10,6 +10,25 @@ from unittest.mock import Mock, MagicMock
 import tempfile
 import os
 import shutil
+import collections
+import itertools
+import random
+import time
+
+try:
+    from selenium.common.exceptions import (ElementClickInterceptedException, JavascriptException,
+                                            NoSuchElementException, StaleElementReferenceException)
+    from selenium.webdriver.remote.webelement import WebElement
+    from truekey_deleter.export import JS_EXPORT_ROWS_SCRIPT, LoginExporter
+    from truekey_deleter.filters import JS_INDEX_ROWS_SCRIPT, JS_SELECT_ROWS_SCRIPT, JS_VERIFY_ROW_SCRIPT, RowIndex
+    from truekey_deleter.rows import SCROLL_CONTAINER_SCRIPT, SCROLL_PAGE_SCRIPT, SCROLL_TOP_SCRIPT
+    from truekey_deleter.waits import ROW_LABEL_SCRIPT
+except ImportError:
+    WebElement = object  # Only the simulated driver needs selenium; the basic mocks work without it
+
+from truekey_deleter.config import (CONFIRM_BUTTON_LOCATOR, EMPTY_LIST_LOCATOR, LIST_MODE_LOCATOR,
+                                    TRASH_ICON_LOCATOR)
+from truekey_deleter.locators import load_selector_schema
 
 
 class MockChromeProfile:
@@ -129,6 +148,377 @@ class MockWebElement:
         return self.is_enabled
 
 
+class SimulatedWebElement(WebElement):
+    """
+    Element of a SimulatedWebDriver dashboard
+    
+    Elements become stale once their row is deleted or re-rendered; every
+    method then raises StaleElementReferenceException like a real driver.
+    Subclassing WebElement lets ActionChains target these elements.
+    """
+    
+    def __init__(self, driver, element_id, kind, row=None):
+        super().__init__(driver, element_id)
+        self._driver = driver
+        self.kind = kind
+        self.row = row
+        self._tag_name = "button" if kind == "confirm" else ("img" if kind == "trash" else "div")
+    
+    @property
+    def tag_name(self):
+        self._check()
+        return self._tag_name
+    
+    def _check(self):
+        self._driver._command()
+        if self.kind == "trash" and (self.row.removed or self.row.element is not self):
+            raise StaleElementReferenceException(f"element {self.id} is no longer attached to the DOM")
+        if self.kind == "confirm" and self._driver._confirm_element is not self:
+            raise StaleElementReferenceException("confirmation dialog was closed")
+    
+    @property
+    def text(self):
+        self._check()
+        return {"confirm": "Yes", "list-mode": "List"}.get(self.kind, self.row.label if self.row else "")
+    
+    def is_displayed(self):
+        self._check()
+        return True
+    
+    def is_enabled(self):
+        self._check()
+        return True
+    
+    def get_attribute(self, name):
+        self._check()
+        if self.kind == "trash" and name == "src":
+            return "../images/common/svg/trash.svg"
+        return None
+    
+    def click(self):
+        self._check()
+        self._driver._click(self)
+
+
+class SimulatedRow:
+    """Login row of a SimulatedWebDriver dashboard"""
+    
+    def __init__(self, index):
+        self.label = f"user{index}@example.com (site{index}.example.com)"
+        self.last_used = f"2024-01-{index % 28 + 1:02d}"
+        self.number = None  # data-tk-row, set when the row is indexed
+        self.indexed_label = None  # data-tk-label
+        self.seen = False  # data-tk-seen, kept when the row is reused
+        self.selected = False
+        self.exported = None  # data-tk-exported: the label the row was exported with
+        self.element = None
+        self.removed = False
+        self.remove_at = None
+
+
+class SimulatedWebDriver:
+    """
+    CPU-only WebDriver simulation of the TrueKey dashboard
+    
+    Models a list of login rows with trash icons, the list-mode toggle and an
+    optional Yes/Cancel confirmation dialog, and understands the locators in
+    truekey_deleter.config and the bundled selector schema, so the real
+    deletion loops, WaitEngine and ActionChains run against it unchanged.
+    Deleted (or re-rendered) rows make their elements stale. With `window` set
+    the list is lazily rendered like fixtures/dashboard.html?window=N: only N
+    rows are in the DOM at first and every page scrolled by
+    truekey_deleter.rows renders the next N. The row index, selection and
+    row-text scripts of truekey_deleter.filters and .waits and the export
+    script of truekey_deleter.export are simulated too; changing a row's
+    `label` emulates a list that reuses the row for another login. Latency is
+    modelled on a virtual clock: every command advances `clock` by `latency`
+    seconds (and sleeps for real when `realtime` is set), and a confirmed row
+    disappears `removal_delay` virtual seconds later. A 100k-row deletion runs
+    in seconds.
+    
+    Args:
+        rows (int): Login rows on the dashboard
+        confirm (bool): Ask for confirmation before deleting a row
+        latency (float): Virtual seconds per WebDriver command
+        removal_delay (float): Virtual seconds between the delete and the row
+            leaving the DOM
+        click_failure_rate (float): Probability that a click is intercepted
+        stale_rate (float): Probability that a row is re-rendered (its element
+            goes stale) right before it is clicked
+        seed (int): Random seed for the failure injection
+        realtime (bool): Sleep for the command latency instead of only
+            advancing the virtual clock
+        window (int): Rows rendered per scrolled page (default: all rows at
+            once)
+    
+    Attributes:
+        clock (float): Virtual time in seconds
+        stats (dict): Counts of commands, clicks, injected failures and
+            elements returned by lookups
+    """
+    
+    def __init__(self, rows=100, confirm=True, latency=0.0, removal_delay=0.0, click_failure_rate=0.0,
+                 stale_rate=0.0, seed=0, realtime=False, window=None):
+        self.confirm = confirm
+        self.latency = latency
+        self.removal_delay = removal_delay
+        self.click_failure_rate = click_failure_rate
+        self.stale_rate = stale_rate
+        self.realtime = realtime
+        self.random = random.Random(seed)
+        self.clock = 0.0
+        self.current_url = ""
+        self.list_mode = False
+        self.dialog_row = None
+        self.capabilities = {"browserName": "simulated"}
+        self.stats = {"commands": 0, "clicks": 0, "deleted": 0, "intercepted_clicks": 0,
+                      "stale_rerenders": 0, "elements_returned": 0, "scrolls": 0}
+        self.rows = collections.deque(SimulatedRow(index) for index in range(rows))
+        self.window = window
+        # Rows at the front of `rows` that are rendered into the DOM
+        self.rendered = rows if window is None else min(window, rows)
+        self._pending_removals = collections.deque()
+        self._next_id = 0
+        self._rows_by_element_id = {}
+        self._trash_xpath = TRASH_ICON_LOCATOR[1]
+        self._indexed_trash_prefix = "(" + self._trash_xpath + ")["
+        self._confirm_locator = CONFIRM_BUTTON_LOCATOR
+        schema = load_selector_schema()
+        self._trash_locators = set(schema["trash_icon"]) | {TRASH_ICON_LOCATOR}
+        self._list_mode_locators = set(schema["list_mode"]) | {LIST_MODE_LOCATOR}
+        self._empty_list_locators = set(schema["empty_list"]) | {EMPTY_LIST_LOCATOR}
+        # Row locators of truekey_deleter.filters and .export and the rows they match
+        self._row_predicates = {RowIndex.locator: lambda row: row.selected,
+                                RowIndex.row_locator: lambda row: row.number is not None,
+                                LoginExporter.row_locator: lambda row: row.exported is not None}
+        self._next_number = 0
+        # Rows exported per label (window.__truekeyExported)
+        self.exported_labels = collections.Counter()
+        # Seconds added to every lookup per strategy, to test locator calibration
+        self.lookup_cost = {}
+        self._confirm_element = None
+    
+    # --- Simulation internals ---
+    
+    def _command(self):
+        """Account for one WebDriver round trip and apply due row removals"""
+        self.stats["commands"] += 1
+        self.clock += self.latency
+        if self.realtime and self.latency:
+            time.sleep(self.latency)
+        while self._pending_removals and self._pending_removals[0].remove_at <= self.clock:
+            self._remove(self._pending_removals.popleft())
+    
+    def _remove(self, row):
+        row.removed = True
+        if row.element is not None:
+            self._rows_by_element_id.pop(row.element.id, None)
+        self.stats["deleted"] += 1
+        # Rows are removed close to the top, so deque deletion stays cheap
+        for index, candidate in enumerate(self.rows):
+            if candidate is row:
+                del self.rows[index]
+                if index < self.rendered:
+                    self.rendered -= 1
+                break
+    
+    def _element(self, row):
+        if row.element is None:
+            self._next_id += 1
+            row.element = SimulatedWebElement(self, f"trash-{self._next_id}", "trash", row)
+            self._rows_by_element_id[row.element.id] = row
+        return row.element
+    
+    def _schedule_removal(self, row):
+        if row.remove_at is not None:
+            return
+        row.remove_at = self.clock + self.removal_delay
+        if self.removal_delay <= 0:
+            self._remove(row)
+        else:
+            self._pending_removals.append(row)
+    
+    def _click(self, element):
+        self.stats["clicks"] += 1
+        if element.kind == "list-mode":
+            self.list_mode = True
+        elif element.kind == "confirm":
+            row, self.dialog_row, self._confirm_element = self.dialog_row, None, None
+            self._schedule_removal(row)
+        elif element.kind == "trash":
+            if self.click_failure_rate and self.random.random() < self.click_failure_rate:
+                self.stats["intercepted_clicks"] += 1
+                raise ElementClickInterceptedException("element click intercepted")
+            if self.confirm:
+                self.dialog_row = element.row
+            else:
+                self._schedule_removal(element.row)
+    
+    def _trash_elements(self, limit=None, predicate=None):
+        # Confirmed rows stay in the DOM until their removal is due
+        rows = itertools.islice(self.rows, self.rendered)
+        if predicate is not None:
+            rows = (row for row in rows if predicate(row))
+        return [self._element(row) for row in itertools.islice(rows, limit)]
+    
+    def _lookup(self, by):
+        cost = self.lookup_cost.get(by, 0.0)
+        self.clock += cost
+        if self.realtime and cost:
+            time.sleep(cost)
+    
+    def _script_row(self, element):
+        """Row of an element passed to a script; stale elements raise like in a real driver"""
+        if element.kind != "trash" or element.row.removed or element.row.element is not element:
+            raise StaleElementReferenceException(f"element {element.id} is no longer attached to the DOM")
+        return element.row
+    
+    @staticmethod
+    def _untag(row):
+        row.number = row.indexed_label = None
+        row.selected = False
+    
+    def _maybe_rerender(self, element):
+        """Re-render a row before it is used so the caller's reference goes stale"""
+        if self.stale_rate and element.kind == "trash" and self.random.random() < self.stale_rate:
+            self.stats["stale_rerenders"] += 1
+            self._rows_by_element_id.pop(element.id, None)
+            element.row.element = None
+    
+    # --- WebDriver API ---
+    
+    def get(self, url):
+        """Navigate; the dashboard keeps its rows"""
+        self._command()
+        self.current_url = url
+    
+    def execute_script(self, script, *args):
+        """Answer the readiness probe and the row scrolling; other scripts are not simulated"""
+        self._command()
+        if "document.readyState" in script:
+            return "complete"
+        if script == SCROLL_CONTAINER_SCRIPT:
+            return None  # The document scrolls
+        if script == JS_INDEX_ROWS_SCRIPT:
+            records = []
+            rendered = list(itertools.islice(self.rows, self.rendered))
+            shown = collections.Counter(row.label for row in rendered)
+            for row in rendered:
+                if row.number is not None and row.indexed_label != row.label:
+                    self._untag(row)  # Reused for another login since it was indexed
+                if row.number is None:
+                    row.number = self._next_number
+                    row.indexed_label = row.label
+                    self._next_number += 1
+                    records.append({"row": row.number, "label": row.label, "site": None, "username": None,
+                                    "reused": row.seen, "shown": shown[row.label]})
+                    row.seen = True
+            return records
+        if script == JS_VERIFY_ROW_SCRIPT:
+            row = self._script_row(args[0])
+            if row.indexed_label != row.label:
+                self._untag(row)
+                return None
+            return row.label
+        if script == ROW_LABEL_SCRIPT:
+            return self._script_row(args[0]).label
+        if script == SCROLL_TOP_SCRIPT:
+            return None  # Rendered rows stay rendered
+        if script == JS_EXPORT_ROWS_SCRIPT:
+            records = []
+            rendered = list(itertools.islice(self.rows, self.rendered))
+            shown = collections.Counter(row.label for row in rendered)
+            exported = self.exported_labels
+            for row in rendered:
+                if row.exported == row.label:
+                    continue
+                reused = row.exported is not None
+                row.exported = row.label
+                if reused and exported[row.label] >= shown[row.label]:
+                    continue  # A reused row showing a login that was exported elsewhere
+                exported[row.label] += 1
+                records.append([None, None, row.last_used, row.label])
+            return records
+        if script == JS_SELECT_ROWS_SCRIPT:
+            numbers = set(args[0])
+            for row in itertools.islice(self.rows, self.rendered):
+                row.selected = row.selected or row.number in numbers
+            return None
+        if script == SCROLL_PAGE_SCRIPT:
+            self.stats["scrolls"] += 1
+            more = self.rendered < len(self.rows)
+            if more:
+                self.rendered = min(len(self.rows), self.rendered + self.window)
+            return {"moved": more, "atEnd": self.rendered == len(self.rows)}
+        raise JavascriptException("script execution is not simulated")
+    
+    def execute(self, command, params=None):
+        """Handle W3C actions (ActionChains); moving to a stale element fails"""
+        self._command()
+        for device in (params or {}).get("actions", []):
+            for action in device.get("actions", []):
+                origin = action.get("origin")
+                if isinstance(origin, dict):
+                    # W3C encodes an element origin as {"element-6066-...": element_id}
+                    element_id = next(iter(origin.values()))
+                    if element_id not in self._rows_by_element_id:
+                        raise StaleElementReferenceException("pointer origin is no longer attached to the DOM")
+        return {"value": None}
+    
+    def find_element(self, by, value):
+        """Find the first element matching a dashboard locator"""
+        self._command()
+        self._lookup(by)
+        index = 0
+        if (by, value) in self._list_mode_locators:
+            return SimulatedWebElement(self, "list-mode", "list-mode")
+        if (by, value) in self._empty_list_locators:
+            if self.rows:
+                raise NoSuchElementException("the list has login rows")
+            return SimulatedWebElement(self, "empty-list", "empty-list")
+        if (by, value) == self._confirm_locator:
+            if self.dialog_row is None:
+                raise NoSuchElementException("no confirmation dialog")
+            if self._confirm_element is None:
+                self._confirm_element = SimulatedWebElement(self, "confirm", "confirm")
+            return self._confirm_element
+        predicate = self._row_predicates.get((by, value))
+        if value.startswith(self._indexed_trash_prefix):
+            index = int(value[len(self._indexed_trash_prefix):].rstrip("]")) - 1
+        elif (by, value) not in self._trash_locators and predicate is None:
+            raise NoSuchElementException(f"no element matches {value}")
+        elements = self._trash_elements(limit=index + 1, predicate=predicate)
+        if len(elements) <= index:
+            raise NoSuchElementException("no more trash icons")
+        self.stats["elements_returned"] += 1
+        element = elements[index]
+        self._maybe_rerender(element)
+        return element
+    
+    def find_elements(self, by, value):
+        """Find all elements matching a dashboard locator"""
+        self._command()
+        self._lookup(by)
+        if (by, value) in self._trash_locators:
+            elements = self._trash_elements()
+        elif (by, value) in self._row_predicates:
+            elements = self._trash_elements(predicate=self._row_predicates[(by, value)])
+        elif (by, value) in self._list_mode_locators:
+            elements = [SimulatedWebElement(self, "list-mode", "list-mode")]
+        elif (by, value) in self._empty_list_locators and not self.rows:
+            elements = [SimulatedWebElement(self, "empty-list", "empty-list")]
+        elif (by, value) == self._confirm_locator and self.dialog_row is not None:
+            elements = [self.find_element(by, value)]
+        else:
+            elements = []
+        self.stats["elements_returned"] += len(elements)
+        return elements
+    
+    def quit(self):
+        """End the simulated session"""
+        self._command()
+
+
 class MockSubprocess:
     """Mock subprocess for testing Chrome process management"""
     
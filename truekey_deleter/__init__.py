@@ -0,0 +1,49 @@
+"""
+TrueKey Login Deleter.
+
+Importable API behind delete-truekey-logins.py. The submodules that need
+selenium are only imported when one of their names is first accessed, so
+``import truekey_deleter`` stays cheap.
+
+Example:
+    from truekey_deleter import DeletionSession, SessionConfig
+
+    config = SessionConfig(headless=True, interactive=False)
+    with DeletionSession(config) as session:
+        stats = session.run()
+"""
+
+from .config import DEFAULT_EXTENSION_ID, SessionConfig
+
+__all__ = [
+    "DEFAULT_EXTENSION_ID",
+    "DashboardNotReadyError",
+    "DeletionSession",
+    "DeletionStats",
+    "DriverCreationError",
+    "SessionConfig",
+    "WaitEngine",
+    "create_chrome_driver",
+    "main",
+    "setup_truekey_profile",
+]
+
+_LAZY_EXPORTS = {
+    "DashboardNotReadyError": "session",
+    "DeletionSession": "session",
+    "DeletionStats": "session",
+    "DriverCreationError": "session",
+    "WaitEngine": "waits",
+    "create_chrome_driver": "chrome",
+    "main": "cli",
+    "setup_truekey_profile": "profile",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+
+        module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,7 @@
+"""Allow running the deleter with ``python -m truekey_deleter``."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Persistent Chrome browser for --attach runs.
+
+"browser start" launches one Chrome bound to the TrueKey profile with a fixed
+DevTools port and records it in a small JSON state file inside the profile.
+Deletion runs started with --attach connect to that browser through
+chromedriver's debuggerAddress option instead of booting a new Chrome.
+"""
+
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from .chrome import chrome_arguments, ensure_truekey_profile
+from .config import DEFAULT_DEBUG_PORT, default_truekey_profile_dir
+
+# State file of the persistent browser, stored inside the TrueKey profile
+STATE_FILE_NAME = "truekey-browser.json"
+
+# Chrome executables tried when --chrome-binary is not given
+CHROME_BINARY_CANDIDATES = [
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+]
+
+
+def find_chrome_binary(chrome_binary=None):
+    """
+    Locate the Chrome executable.
+
+    Args:
+        chrome_binary (str): Explicit executable path or name, tried first
+
+    Returns:
+        str: Path of the Chrome executable
+
+    Raises:
+        FileNotFoundError: If no Chrome executable was found
+    """
+    candidates = [chrome_binary] if chrome_binary else CHROME_BINARY_CANDIDATES
+    for candidate in candidates:
+        if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+        found = shutil.which(candidate)
+        if found:
+            return found
+    raise FileNotFoundError("Chrome executable not found; pass its path with --chrome-binary")
+
+
+def state_file_path(truekey_profile_dir=None):
+    """Return the path of the persistent browser's state file."""
+    return os.path.join(truekey_profile_dir or default_truekey_profile_dir(), STATE_FILE_NAME)
+
+
+def read_browser_state(truekey_profile_dir=None):
+    """Return the recorded browser state, or None if there is none."""
+    try:
+        with open(state_file_path(truekey_profile_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def devtools_version(port, timeout=1.0):
+    """
+    Query the DevTools HTTP endpoint of a browser.
+
+    Args:
+        port (int): DevTools port
+        timeout (float): Seconds to wait for the answer
+
+    Returns:
+        dict: The /json/version answer, or None if nothing answers on the port
+    """
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def process_alive(pid):
+    """Return True if a process with this ID exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def process_command_line(pid):
+    """
+    Return the command line of a process.
+
+    Returns:
+        str: Its arguments joined by spaces, or None if it cannot be read
+    """
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode("utf-8", "replace").strip() or None
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        return None
+    try:
+        result = subprocess.run(["ps", "-o", "command=", "-p", str(pid)], capture_output=True, text=True,
+                                timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def is_recorded_browser(state, truekey_profile_dir=None):
+    """
+    Check that the recorded process is still the persistent browser.
+
+    After a crash or a reboot the recorded PID may belong to an unrelated
+    process. It only counts as the browser if its command line names the
+    profile's --user-data-dir or, where the command line cannot be read,
+    if the recorded DevTools port answers.
+
+    Args:
+        state (dict): Recorded browser state
+        truekey_profile_dir (str): TrueKey profile the browser runs with
+
+    Returns:
+        bool: True if the process is alive and is the persistent browser
+    """
+    if not process_alive(state["pid"]):
+        return False
+    command_line = process_command_line(state["pid"])
+    if command_line is None:
+        return devtools_version(state["port"]) is not None
+    user_data_dir = state.get("user_data_dir") or truekey_profile_dir or default_truekey_profile_dir()
+    return f"--user-data-dir={user_data_dir}" in command_line
+
+
+def browser_status(truekey_profile_dir=None):
+    """
+    Check whether the persistent browser is running.
+
+    The state file of an exited browser, or of a PID now used by another
+    process, is removed. A browser whose process is alive but whose DevTools
+    port does not answer keeps its state file, since it still holds the
+    profile; it is reported as not healthy.
+
+    Args:
+        truekey_profile_dir (str): TrueKey profile the browser runs with
+
+    Returns:
+        dict: Browser state (pid, port, started, browser, healthy) or None
+        if not running
+    """
+    state = read_browser_state(truekey_profile_dir)
+    if state is None:
+        return None
+    if not is_recorded_browser(state, truekey_profile_dir):
+        os.remove(state_file_path(truekey_profile_dir))
+        return None
+    version = devtools_version(state["port"])
+    state["healthy"] = version is not None
+    state["browser"] = version.get("Browser") if version is not None else None
+    return state
+
+
+def start_browser(truekey_profile_dir=None, debug_port=DEFAULT_DEBUG_PORT, headless=False,
+                  chrome_binary=None, startup_timeout=30.0, profile_options=None):
+    """
+    Start the persistent browser, or reuse it if it is already running.
+
+    Args:
+        truekey_profile_dir (str): TrueKey profile the browser runs with
+        debug_port (int): Fixed DevTools port to listen on
+        headless (bool): Run Chrome without a window
+        chrome_binary (str): Chrome executable (default: auto-detected)
+        startup_timeout (float): Seconds to wait for the DevTools port to answer
+        profile_options (dict): Extra ensure_truekey_profile() keyword arguments
+
+    Returns:
+        dict: Browser state (pid, port, started, browser, healthy)
+
+    Raises:
+        FileNotFoundError: If Chrome is not installed
+        RuntimeError: If the browser did not open its DevTools port in time,
+            or a running persistent browser does not answer on it
+    """
+    truekey_profile_dir = truekey_profile_dir or default_truekey_profile_dir()
+    state = browser_status(truekey_profile_dir)
+    if state is not None and not state["healthy"]:
+        # A second Chrome on the same user-data-dir would fight over the profile lock
+        raise RuntimeError(f"Persistent browser (pid {state['pid']}) is running but its DevTools port "
+                           f"{state['port']} does not answer; stop it with 'browser stop'")
+    if state is not None:
+        print(f"Reusing persistent browser (pid {state['pid']}, port {state['port']}).")
+        return state
+
+    truekey_profile_dir = ensure_truekey_profile(truekey_profile_dir, **(profile_options or {}))
+    if devtools_version(debug_port) is not None:
+        raise RuntimeError(f"Port {debug_port} is already used by another browser; pick one with --debug-port")
+
+    command = [find_chrome_binary(chrome_binary),
+               *chrome_arguments(truekey_profile_dir, headless, debug_port)]
+    print(f"Starting persistent browser on DevTools port {debug_port}...")
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, start_new_session=True)
+
+    deadline = time.monotonic() + startup_timeout
+    version = devtools_version(debug_port)
+    while version is None:
+        if process.poll() is not None:
+            raise RuntimeError(f"Chrome exited during startup with code {process.returncode}")
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise RuntimeError(f"Chrome did not open DevTools port {debug_port} "
+                               f"within {startup_timeout:g} seconds")
+        time.sleep(0.2)
+        version = devtools_version(debug_port)
+
+    state = {"pid": process.pid, "port": debug_port, "started": time.time(),
+             "browser": version.get("Browser"), "user_data_dir": truekey_profile_dir}
+    with open(state_file_path(truekey_profile_dir), "w") as f:
+        json.dump(state, f)
+    state["healthy"] = True
+    print(f"Persistent browser started (pid {process.pid}).")
+    return state
+
+
+def stop_browser(truekey_profile_dir=None, timeout=10.0):
+    """
+    Stop the persistent browser.
+
+    A state file whose PID no longer belongs to the browser is removed
+    without signalling that process.
+
+    Args:
+        truekey_profile_dir (str): TrueKey profile the browser runs with
+        timeout (float): Seconds to wait for Chrome to exit before killing it
+
+    Returns:
+        bool: True if a running browser was stopped
+    """
+    state = read_browser_state(truekey_profile_dir)
+    if state is None:
+        return False
+
+    pid = state["pid"]
+    stopped = is_recorded_browser(state, truekey_profile_dir)
+    if stopped:
+        os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        while process_alive(pid) and time.monotonic() < deadline:
+            time.sleep(0.2)
+        if process_alive(pid) and sys.platform != "win32":
+            os.kill(pid, signal.SIGKILL)
+    os.remove(state_file_path(truekey_profile_dir))
+    return stopped
+
+
+def attach_chrome_driver(debug_port=DEFAULT_DEBUG_PORT):
+    """
+    Connect a WebDriver to the persistent browser.
+
+    Quitting the returned driver ends the WebDriver session only; the
+    browser keeps running for the next run.
+
+    Args:
+        debug_port (int): DevTools port of the persistent browser
+
+    Returns:
+        webdriver.Chrome: WebDriver attached through debuggerAddress
+    """
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.debugger_address = f"127.0.0.1:{debug_port}"
+    driver = webdriver.Chrome(options=options)
+    print(f"Attached to persistent browser on port {debug_port}.")
+    return driver
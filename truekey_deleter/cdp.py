@@ -0,0 +1,169 @@
+"""
+Minimal asyncio client for the Chrome DevTools Protocol.
+
+The client talks to a page target directly over its DevTools websocket
+(websocket-client, which selenium already depends on), so many commands can
+be in flight at once instead of one blocking chromedriver call at a time.
+A reader thread resolves each command's future by its message id.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import urllib.request
+
+
+class CdpError(Exception):
+    """Raised when a DevTools command or an evaluated expression fails."""
+
+
+def page_websocket_url(driver):
+    """
+    Find the DevTools websocket URL of the page a WebDriver is showing.
+
+    Args:
+        driver: Chromium-based Selenium WebDriver
+
+    Returns:
+        str: webSocketDebuggerUrl of the driver's current page
+
+    Raises:
+        CdpError: If the browser exposes no DevTools address or page target
+    """
+    address = driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+    if not address:
+        raise CdpError("The browser does not expose a DevTools debugger address")
+    with urllib.request.urlopen(f"http://{address}/json/list", timeout=5) as response:
+        targets = [target for target in json.loads(response.read().decode("utf-8"))
+                   if target.get("type") == "page" and target.get("webSocketDebuggerUrl")]
+    if not targets:
+        raise CdpError(f"No page target found at {address}")
+    current_url = driver.current_url
+    for target in targets:
+        if target.get("url") == current_url:
+            return target["webSocketDebuggerUrl"]
+    return targets[0]["webSocketDebuggerUrl"]
+
+
+class CdpConnection:
+    """
+    DevTools connection to one page target.
+
+    Use CdpConnection.open() inside a running event loop; send() and
+    evaluate() may be awaited concurrently.
+    """
+
+    def __init__(self, websocket, loop):
+        self._websocket = websocket
+        self._loop = loop
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._reader = threading.Thread(target=self._read_messages, name="cdp-reader", daemon=True)
+        self._reader.start()
+
+    @classmethod
+    async def open(cls, websocket_url, timeout=10.0):
+        """
+        Connect to a DevTools websocket.
+
+        Args:
+            websocket_url (str): webSocketDebuggerUrl of the target
+            timeout (float): Seconds to wait for the connection
+
+        Returns:
+            CdpConnection: The open connection
+        """
+        import websocket
+
+        loop = asyncio.get_running_loop()
+        # suppress_origin: Chrome rejects websocket clients that send an Origin header
+        ws = await loop.run_in_executor(
+            None, lambda: websocket.create_connection(websocket_url, timeout=timeout,
+                                                      suppress_origin=True))
+        ws.settimeout(None)
+        return cls(ws, loop)
+
+    def _read_messages(self):
+        """Resolve pending futures with the responses read from the socket."""
+        error = None
+        while True:
+            try:
+                message = self._websocket.recv()
+            except Exception as e:
+                error = e
+                break
+            if not message:
+                break
+            data = json.loads(message)
+            future = self._pending.pop(data.get("id"), None)
+            if future is not None:
+                self._loop.call_soon_threadsafe(self._resolve, future, data)
+        # Fail whatever is still waiting once the connection is gone
+        closed = CdpError(f"DevTools connection closed: {error}" if error else "DevTools connection closed")
+        for future in list(self._pending.values()):
+            self._loop.call_soon_threadsafe(self._fail, future, closed)
+        self._pending.clear()
+
+    @staticmethod
+    def _resolve(future, data):
+        if future.done():
+            return
+        if "error" in data:
+            future.set_exception(CdpError(data["error"].get("message", str(data["error"]))))
+        else:
+            future.set_result(data.get("result", {}))
+
+    @staticmethod
+    def _fail(future, error):
+        if not future.done():
+            future.set_exception(error)
+
+    async def send(self, method, params=None):
+        """
+        Send a DevTools command and wait for its result.
+
+        Args:
+            method (str): Command name, e.g. "Runtime.evaluate"
+            params (dict): Command parameters
+
+        Returns:
+            dict: The command's result
+
+        Raises:
+            CdpError: If the command failed or the connection closed
+        """
+        message_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[message_id] = future
+        self._websocket.send(json.dumps({"id": message_id, "method": method, "params": params or {}}))
+        return await future
+
+    async def evaluate(self, expression, await_promise=False):
+        """
+        Evaluate a JavaScript expression in the page.
+
+        Args:
+            expression (str): JavaScript expression
+            await_promise (bool): Wait for a returned promise to settle
+
+        Returns:
+            The expression's value, converted to Python
+
+        Raises:
+            CdpError: If the expression threw
+        """
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        })
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CdpError(details.get("exception", {}).get("description") or details.get("text"))
+        return result.get("result", {}).get("value")
+
+    async def close(self):
+        """Close the websocket and stop the reader thread."""
+        await self._loop.run_in_executor(None, self._websocket.close)
+        await self._loop.run_in_executor(None, self._reader.join, 5)
@@ -0,0 +1,213 @@
+"""
+Chrome process management and WebDriver creation.
+
+selenium is imported inside create_chrome_driver() so that importing this
+module stays cheap.
+"""
+
+import os
+import subprocess
+import time
+
+from .config import DEFAULT_EXTENSION_ID, default_truekey_profile_dir
+from .instrumentation import StepTimer
+from .profile import setup_truekey_profile
+
+
+def close_running_chrome():
+    """
+    Close running Chrome processes so the profile is not locked.
+    
+    Checks for running Chrome processes with pgrep and terminates them with
+    pkill. Errors (e.g. pgrep not available) are ignored.
+    
+    Returns:
+        bool: True if running Chrome processes were found
+    """
+    try:
+        result = subprocess.run(['pgrep', '-f', 'Google Chrome'], capture_output=True, text=True)
+        if not result.stdout.strip():
+            return False
+        
+        print("WARNING: Chrome appears to be running.")
+        print("Attempting to close Chrome processes...")
+        
+        # Try to kill Chrome processes using pkill command
+        try:
+            subprocess.run(['pkill', '-f', 'Google Chrome'], check=False)
+            print("Chrome processes terminated.")
+            time.sleep(3)  # Wait for processes to fully terminate
+        except Exception:
+            print("Could not automatically close Chrome. Please close ALL Chrome windows manually.")
+            time.sleep(5)
+        return True
+    
+    except Exception:
+        return False  # pgrep not available or other error, continue anyway
+
+
+def ensure_truekey_profile(truekey_profile_dir=None, chrome_profile_path=None,
+                           extension_id=DEFAULT_EXTENSION_ID, refresh_profile=False, checksum=False,
+                           clone_strategy="auto", copy_workers=8):
+    """
+    Create the TrueKey profile if it does not exist, or sync it on request.
+    
+    Args:
+        truekey_profile_dir (str): Dedicated TrueKey profile directory
+            (default: the TrueKey directory next to the main Chrome profile)
+        chrome_profile_path (str): Main Chrome profile to copy from
+        extension_id (str): TrueKey extension ID
+        refresh_profile (bool): Sync an existing profile from the main Chrome profile
+        checksum (bool): Compare file contents instead of size and mtime when syncing
+        clone_strategy (str): How profile files are cloned (see FileCloner)
+        copy_workers (int): Threads copying profile files in parallel
+    
+    Returns:
+        str: The TrueKey profile directory
+    """
+    truekey_profile_dir = truekey_profile_dir or default_truekey_profile_dir()
+    
+    # Check if TrueKey profile exists, if not create it
+    if not os.path.exists(truekey_profile_dir) or refresh_profile:
+        if refresh_profile and os.path.exists(truekey_profile_dir):
+            print("Refreshing TrueKey profile from the main Chrome profile...")
+        else:
+            print("TrueKey profile not found. Creating it now...")
+        setup_truekey_profile(truekey_profile_dir, chrome_profile_path, extension_id, checksum,
+                              clone_strategy, copy_workers)
+    else:
+        print("Using existing TrueKey profile.")
+    return truekey_profile_dir
+
+
+def chrome_arguments(truekey_profile_dir, headless=False, debug_port=0):
+    """
+    Build the Chrome command line arguments used for TrueKey automation.
+    
+    The same arguments are used for browsers started by WebDriver and for the
+    persistent browser that --attach connects to.
+    
+    Args:
+        truekey_profile_dir (str): Dedicated TrueKey profile directory
+        headless (bool): Run Chrome in its new headless mode without a window
+        debug_port (int): DevTools port; 0 lets Chrome choose a free port
+    
+    Returns:
+        list: Chrome command line arguments
+    """
+    arguments = []
+    
+    # Profile and Directory Options
+    arguments.append(f"--user-data-dir={truekey_profile_dir}")  # Use our dedicated TrueKey profile
+    arguments.append("--profile-directory=Default")  # Use the Default profile within our data directory
+    
+    # Startup Behavior Options
+    arguments.append("--no-first-run")  # Skip first-run setup dialogs that could interfere with automation
+    arguments.append("--no-default-browser-check")  # Prevent Chrome from checking if it's the default browser
+    arguments.append("--disable-default-apps")  # Disable default Chrome apps that might interfere
+    
+    # Security and Extension Options
+    arguments.append("--disable-web-security")  # Allow access to extension pages and cross-origin requests
+    arguments.append("--disable-features=CrossSiteDocumentBlockingIfIsolating")  # Prevent blocking of extension content
+    arguments.append("--disable-extensions-file-access-check")  # Allow extensions to access local files
+    arguments.append("--disable-extensions-http-throttling")  # Prevent throttling of extension HTTP requests
+    
+    # Debugging and Port Options
+    arguments.append(f"--remote-debugging-port={debug_port}")  # 0 lets Chrome choose an available debugging port
+    
+    # Performance and Background Process Options
+    arguments.append("--disable-background-timer-throttling")  # Prevent throttling of background processes
+    arguments.append("--disable-backgrounding-occluded-windows")  # Keep windows active even when not visible
+    arguments.append("--disable-renderer-backgrounding")  # Prevent renderer processes from being backgrounded
+    arguments.append("--disable-field-trial-config")  # Disable field trials that could affect behavior
+    arguments.append("--disable-ipc-flooding-protection")  # Allow rapid IPC communication needed for automation
+    
+    # User Experience Options
+    arguments.append("--disable-hang-monitor")  # Prevent hang detection that could interrupt automation
+    arguments.append("--disable-prompt-on-repost")  # Disable repost confirmation dialogs
+    arguments.append("--disable-sync")  # Disable Chrome sync to avoid authentication prompts
+    arguments.append("--disable-translate")  # Disable translation prompts that could interfere
+    arguments.append("--no-service-autorun")  # Prevent automatic service startup
+    arguments.append("--password-store=basic")  # Use basic password storage to avoid keychain prompts
+    
+    # Headless Options
+    if headless:
+        arguments.append("--headless=new")  # New headless mode keeps extension support
+        arguments.append("--window-size=1280,1024")  # Give the dashboard a desktop-sized viewport
+    
+    return arguments
+
+
+def create_chrome_driver(truekey_profile_dir=None, chrome_profile_path=None,
+                         extension_id=DEFAULT_EXTENSION_ID, refresh_profile=False, checksum=False,
+                         clone_strategy="auto", copy_workers=8, headless=False, timer=None):
+    """
+    Create and configure a Chrome WebDriver instance for TrueKey automation.
+    
+    This function sets up a Chrome WebDriver with a dedicated TrueKey profile
+    that contains the necessary extensions and settings. It automatically
+    creates the profile if it doesn't exist and configures Chrome with
+    specific options optimized for extension automation.
+    
+    The function uses multiple Chrome arguments to:
+    - Disable security features that might block extension access
+    - Prevent user prompts and dialogs that could interrupt automation
+    - Optimize performance for automated operations
+    - Ensure reliable extension communication
+    
+    Args:
+        truekey_profile_dir (str): Dedicated TrueKey profile Chrome runs with
+            (default: the TrueKey directory next to the main Chrome profile)
+        chrome_profile_path (str): Main Chrome profile the TrueKey profile is
+            copied from (default: the current user's Chrome profile)
+        extension_id (str): TrueKey extension ID
+        refresh_profile (bool): Sync the existing TrueKey profile from the main
+            Chrome profile before starting
+        checksum (bool): Compare file contents instead of size and mtime when syncing
+        clone_strategy (str): How profile files are cloned (see FileCloner)
+        copy_workers (int): Threads copying profile files in parallel
+        headless (bool): Run Chrome in its new headless mode without a window
+        timer (StepTimer): Optional timer recording "profile_setup" and
+            "driver_creation"
+    
+    Returns:
+        webdriver.Chrome: Configured Chrome WebDriver instance
+        
+    Raises:
+        Exception: If Chrome driver creation fails or Chrome is not properly installed
+        
+    Note:
+        The function will automatically create the TrueKey profile on first run
+        and reuse it in subsequent runs for faster startup.
+        
+    Chrome Options Configured:
+        - Profile management (user-data-dir, profile-directory)
+        - Security bypasses (disable-web-security, disable-features)
+        - Extension access (disable-extensions-file-access-check)
+        - Performance optimizations (disable-background-timer-throttling)
+        - User experience (disable-sync, disable-translate, etc.)
+    """
+    from selenium import webdriver
+    
+    timer = timer or StepTimer()
+    with timer.step("profile_setup"):
+        truekey_profile_dir = ensure_truekey_profile(truekey_profile_dir, chrome_profile_path, extension_id,
+                                                     refresh_profile, checksum, clone_strategy,
+                                                     copy_workers)
+    
+    print("Creating Chrome driver with TrueKey profile...")
+    
+    try:
+        # Set up Chrome options
+        options = webdriver.ChromeOptions()
+        for argument in chrome_arguments(truekey_profile_dir, headless):
+            options.add_argument(argument)
+        
+        with timer.step("driver_creation"):
+            driver = webdriver.Chrome(options=options)
+        print("Chrome driver created successfully with TrueKey profile.")
+        return driver
+        
+    except Exception as e:
+        print(f"Failed to create Chrome driver with TrueKey profile: {e}")
+        raise Exception("Failed to create Chrome driver. Please ensure Chrome is properly installed and try closing all Chrome processes.")
@@ -0,0 +1,430 @@
+"""
+Command line interface of the TrueKey Login Deleter.
+
+Only standard library modules are imported at module level; selenium and
+the profile code are imported once a deletion actually runs, so --help and
+--validate-only start quickly.
+"""
+
+import argparse
+import os
+
+from .config import (DEFAULT_DEBUG_PORT, DEFAULT_EXTENSION_ID, EXIT_BROWSER_NOT_RUNNING,
+                     EXIT_DASHBOARD_NOT_READY, EXIT_DRIVER_FAILED, EXIT_OK, EXIT_PROFILES_FAILED,
+                     SessionConfig)
+
+
+def build_parser():
+    """
+    Build the argument parser for the command line options.
+
+    Returns:
+        argparse.ArgumentParser: Parser for all script options
+    """
+    parser = argparse.ArgumentParser(description='TrueKey Login Deleter Script')
+    parser.add_argument('--extension-id', 
+                       default=os.environ.get('TRUEKEY_EXTENSION_ID', DEFAULT_EXTENSION_ID),
+                       help=f'TrueKey extension ID (default: {DEFAULT_EXTENSION_ID})')
+    parser.add_argument('--validate-only', 
+                       action='store_true',
+                       help='Only validate the extension ID and exit')
+    parser.add_argument('--wait-timeout',
+                       type=float,
+                       default=10.0,
+                       help='Maximum seconds to wait for the dashboard to react to a step (default: 10)')
+    parser.add_argument('--poll-interval',
+                       type=float,
+                       default=0.1,
+                       help='Seconds between DOM checks while waiting (default: 0.1)')
+    parser.add_argument('--dialog-learn',
+                       type=int,
+                       default=3,
+                       metavar='N',
+                       help='Deletions that must agree on whether a confirmation dialog appears before the '
+                            'webdriver engine stops probing for it; 0 always probes (default: 3)')
+    parser.add_argument('--engine',
+                       choices=['webdriver', 'js', 'cdp', 'pipeline'],
+                       default='webdriver',
+                       help='Deletion engine: click icons through WebDriver, in-page JavaScript batches, '
+                            'Chrome DevTools Protocol commands or pipelined DevTools operations '
+                            '(default: webdriver)')
+    parser.add_argument('--batch-size',
+                       type=int,
+                       default=50,
+                       help='Entries deleted per in-page batch or storage call (default: 50)')
+    parser.add_argument('--pipeline-depth',
+                       type=int,
+                       default=8,
+                       help='Maximum deletions in flight with --engine pipeline (default: 8)')
+    parser.add_argument('--mode',
+                       choices=['ui', 'storage'],
+                       default='ui',
+                       help='Delete by clicking the dashboard UI or through the extension storage (default: ui)')
+    parser.add_argument('--storage-key-pattern',
+                       default=None,
+                       help='Regular expression selecting login record keys in --mode=storage')
+    parser.add_argument('--match',
+                       action='append',
+                       metavar='PATTERN',
+                       help='Only delete logins whose site, username or row text matches this glob; '
+                            'prefix with site: or username: to test one field (repeatable)')
+    parser.add_argument('--exclude',
+                       action='append',
+                       metavar='PATTERN',
+                       help='Never delete logins matching this glob, same syntax as --match (repeatable)')
+    parser.add_argument('--export',
+                       metavar='FILE',
+                       default=None,
+                       help='Save the site, username and last-used date of every login to FILE before deleting '
+                            '(.jsonl, .csv, or either with .gz)')
+    parser.add_argument('--dry-run',
+                       action='store_true',
+                       help='List the records that would be deleted without deleting them')
+    parser.add_argument('--refresh-profile',
+                       action='store_true',
+                       help='Sync changed files from the main Chrome profile into the TrueKey profile')
+    parser.add_argument('--sync-checksum',
+                       action='store_true',
+                       help='Compare file contents instead of size and modification time when syncing')
+    parser.add_argument('--clone-strategy',
+                       choices=['auto', 'reflink', 'hardlink', 'copy'],
+                       default='auto',
+                       help='How profile files are cloned: copy-on-write reflinks, hardlinks for '
+                            'read-only extension files, or plain copies (default: auto)')
+    parser.add_argument('--copy-workers',
+                       type=int,
+                       default=8,
+                       help='Threads copying profile files in parallel (default: 8)')
+    parser.add_argument('--non-interactive',
+                       action='store_true',
+                       help='Skip the confirmation pause and exit with an error if the dashboard does not load')
+    parser.add_argument('--ready-timeout',
+                       type=float,
+                       default=30.0,
+                       help='Seconds to wait for the dashboard to become ready (default: 30)')
+    parser.add_argument('--attach',
+                       action='store_true',
+                       help='Run in the persistent browser (started if needed) instead of launching Chrome')
+    parser.add_argument('--resume',
+                       action='store_true',
+                       help='Continue an interrupted run from its journal: skip the profile refresh and '
+                            'the confirmation pause and report what was already deleted')
+    parser.add_argument('--journal',
+                       metavar='PATH',
+                       default=None,
+                       help='Progress journal (default: deletion-journal.jsonl in the TrueKey profile)')
+    parser.add_argument('--journal-fsync',
+                       choices=['always', 'batch', 'never'],
+                       default='batch',
+                       help='When the journal is forced to disk: after every entry, every 50 entries '
+                            'or never (default: batch)')
+    parser.add_argument('--report',
+                       metavar='FILE',
+                       default=None,
+                       help='Write a JSON run report with per-step p50/p95/p99 timings and items/second')
+    parser.add_argument('--metrics-port',
+                       type=int,
+                       metavar='PORT',
+                       default=None,
+                       help='Serve Prometheus/OpenMetrics metrics on http://127.0.0.1:PORT/metrics during the run')
+    parser.add_argument('--metrics-textfile',
+                       metavar='PATH',
+                       default=None,
+                       help='Write the metrics to PATH for the node_exporter textfile collector '
+                            '(rewritten every 15 seconds and at the end of the run)')
+    parser.add_argument('--scroll-settle',
+                       type=float,
+                       default=1.0,
+                       help='Seconds to wait for more rows after scrolling a virtualized or lazily rendered '
+                            'list; 0 disables scrolling (default: 1)')
+    parser.add_argument('--selectors',
+                       metavar='FILE',
+                       default=None,
+                       help='JSON selector schema with the candidate locators of the dashboard elements '
+                            '(default: the bundled truekey_deleter/selectors.json)')
+    add_browser_arguments(parser, DEFAULT_DEBUG_PORT, None, False)
+    parser.add_argument('--profiles',
+                       metavar='MANIFEST',
+                       help='JSON manifest of TrueKey profiles to process in parallel, one Chrome each')
+    parser.add_argument('--profile-workers',
+                       type=int,
+                       default=None,
+                       help='Profiles processed at once with --profiles (default: based on CPU and memory)')
+    parser.add_argument('--profile-retries',
+                       type=int,
+                       default=1,
+                       help='Extra attempts for a failed profile with --profiles (default: 1)')
+    
+    # "browser start|stop|status" manages the persistent browser used by --attach
+    subparsers = parser.add_subparsers(dest='command', metavar='{browser}')
+    browser_parser = subparsers.add_parser('browser', help='Start, stop or check the persistent browser')
+    browser_parser.add_argument('action', choices=['start', 'stop', 'status'])
+    add_browser_arguments(browser_parser, argparse.SUPPRESS, argparse.SUPPRESS, argparse.SUPPRESS)
+    return parser
+
+
+def add_browser_arguments(parser, debug_port, chrome_binary, headless):
+    """
+    Add the persistent browser options to a parser.
+
+    The browser subcommand passes argparse.SUPPRESS defaults so options given
+    after "browser start" override the ones given before it.
+    """
+    parser.add_argument('--debug-port',
+                       type=int,
+                       default=debug_port,
+                       help=f'DevTools port of the persistent browser (default: {DEFAULT_DEBUG_PORT})')
+    parser.add_argument('--chrome-binary',
+                       default=chrome_binary,
+                       help='Chrome executable for the persistent browser (default: auto-detected)')
+    parser.add_argument('--headless',
+                       action='store_true',
+                       default=headless,
+                       help='Run Chrome without a window (implies --non-interactive)')
+
+
+def find_truekey_extension_id():
+    """
+    Display instructions for finding the TrueKey extension ID manually.
+    
+    This helper function provides step-by-step instructions for users who need
+    to locate their TrueKey extension ID in Chrome. It guides users through
+    the Chrome extensions page and explains how to enable Developer mode to
+    reveal extension IDs.
+    
+    The function displays:
+    - How to navigate to Chrome extensions page
+    - How to enable Developer mode
+    - How to locate and copy the extension ID
+    - Command line and environment variable usage examples
+    
+    Returns:
+        None
+        
+    Note:
+        This function is called when the --validate-only flag is used or
+        when users need guidance on finding their extension ID.
+        
+    Example:
+        The function will display output like:
+        ```
+        HOW TO FIND YOUR TRUEKEY EXTENSION ID:
+        1. Open Chrome and go to: chrome://extensions/
+        2. Enable 'Developer mode' (toggle in top-right corner)
+        3. Find the TrueKey extension in the list
+        4. Look for the extension ID (32-character string)
+        5. Copy the extension ID and use it with the script
+        ```
+    """
+    print("\n" + "="*60)
+    print("HOW TO FIND YOUR TRUEKEY EXTENSION ID:")
+    print("="*60)
+    print("1. Open Chrome and go to: chrome://extensions/")
+    print("2. Enable 'Developer mode' (toggle in top-right corner)")
+    print("3. Find the TrueKey extension in the list")
+    print("4. Look for the extension ID (32-character string)")
+    print("5. Copy the extension ID and use it with the script:")
+    print(f"   python3 delete-truekey-logins.py --extension-id YOUR_EXTENSION_ID")
+    print("   OR set environment variable:")
+    print(f"   export TRUEKEY_EXTENSION_ID=YOUR_EXTENSION_ID")
+    print("="*60)
+
+
+def confirm_dashboard_loaded():
+    """Pause until the user confirms the dashboard loaded properly."""
+    # --- User Verification Step ---
+    # Pause for user to verify the TrueKey extension loaded properly
+    # This safety measure ensures the automation will work correctly
+    print("\n" + "="*60)
+    print("PAUSE: Please check if the TrueKey extension dashboard loaded properly.")
+    print("Look for the TrueKey interface in the browser window.")
+    print("="*60)
+    input("Press Enter to continue with the deletion process, or Ctrl+C to exit if the extension didn't load...")
+    print("Continuing with the deletion process...\n")
+
+
+def confirm_storage_purge(records):
+    """Ask the user to confirm deleting storage records found without --storage-key-pattern."""
+    answer = input(f"Delete these {len(records)} records from the extension storage? [y/N] ")
+    return answer.strip().lower() in ("y", "yes")
+
+
+def run_browser_command(action, config):
+    """
+    Start, stop or report the persistent browser used by --attach.
+
+    Args:
+        action (str): "start", "stop" or "status"
+        config (SessionConfig): Profile, port and Chrome settings
+
+    Returns:
+        int: Process exit code
+    """
+    from . import browser
+
+    if action == 'status':
+        state = browser.browser_status(config.truekey_profile_dir)
+        if state is None:
+            print("Persistent browser is not running.")
+            return EXIT_BROWSER_NOT_RUNNING
+        if not state["healthy"]:
+            print(f"Persistent browser running (pid {state['pid']}) but not answering on DevTools port "
+                  f"{state['port']}; stop it with 'browser stop'.")
+            return EXIT_BROWSER_NOT_RUNNING
+        print(f"Persistent browser running (pid {state['pid']}, port {state['port']}, {state['browser']}).")
+        return EXIT_OK
+
+    if action == 'stop':
+        if browser.stop_browser(config.truekey_profile_dir):
+            print("Persistent browser stopped.")
+            return EXIT_OK
+        print("Persistent browser is not running.")
+        return EXIT_BROWSER_NOT_RUNNING
+
+    if browser.browser_status(config.truekey_profile_dir) is None:
+        from .chrome import close_running_chrome
+        close_running_chrome()
+    try:
+        browser.start_browser(config.truekey_profile_dir, config.debug_port, config.headless,
+                              config.chrome_binary, profile_options=config.profile_options())
+    except (OSError, RuntimeError) as e:
+        print(f"ERROR: {e}")
+        return EXIT_DRIVER_FAILED
+    print(f"Run the deleter with --attach --debug-port {config.debug_port} to use it.")
+    return EXIT_OK
+
+
+def run_profiles_command(args, config):
+    """
+    Process every profile of a --profiles manifest in a process pool.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        config (SessionConfig): Settings shared by all profiles
+
+    Returns:
+        int: EXIT_OK if every profile succeeded, EXIT_PROFILES_FAILED otherwise
+    """
+    from .runner import load_profile_manifest, print_profile_report, run_profiles
+
+    try:
+        profiles = load_profile_manifest(args.profiles)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return EXIT_PROFILES_FAILED
+    results = run_profiles(profiles, config, args.profile_workers, args.profile_retries)
+    print_profile_report(results)
+    if args.report:
+        from .instrumentation import REPORT_FORMAT_VERSION, write_run_report
+
+        write_run_report(args.report, {"format_version": REPORT_FORMAT_VERSION, "profiles": results})
+        print(f"Run report written to {args.report}")
+    if any(result["status"] != "ok" for result in results):
+        return EXIT_PROFILES_FAILED
+    return EXIT_OK
+
+
+def main(argv=None):
+    """
+    Run the TrueKey Login Deleter from the command line.
+
+    Args:
+        argv (list): Command line arguments (default: sys.argv[1:])
+
+    Returns:
+        int: Process exit code (see the EXIT_* constants in config)
+    """
+    args = build_parser().parse_args(argv)
+    config = SessionConfig.from_args(args)
+
+    print(f"Using TrueKey extension ID: {config.extension_id}")
+    print(f"Dashboard URL: {config.dashboard_url}")
+
+    # Validate extension ID if requested (validation mode). This path stays
+    # fast: it neither imports selenium nor touches running Chrome processes.
+    if args.validate_only:
+        print(f"Extension ID validation: {config.extension_id}")
+        find_truekey_extension_id()
+        return EXIT_OK
+
+    if args.command == 'browser':
+        return run_browser_command(args.action, config)
+    if args.profiles and args.attach:
+        print("ERROR: --profiles starts one Chrome per profile and cannot be combined with --attach")
+        return EXIT_DRIVER_FAILED
+    if config.selectors_file:
+        from .locators import load_selector_schema
+
+        # Reject a broken schema before Chrome is closed or started
+        try:
+            load_selector_schema(config.selectors_file)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {e}")
+            return EXIT_DRIVER_FAILED
+    if config.export_path:
+        from .export import export_format
+
+        try:
+            export_format(config.export_path)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return EXIT_DRIVER_FAILED
+
+    # --- Chrome Process Management ---
+    # Check if Chrome is running and attempt to close it automatically
+    # This prevents profile lock conflicts when starting the automation.
+    # Attach mode runs in the persistent browser, which must stay alive.
+    if not config.attach:
+        from .chrome import close_running_chrome
+        close_running_chrome()
+
+    if args.profiles:
+        return run_profiles_command(args, config)
+
+    from .session import DashboardNotReadyError, DeletionSession, DriverCreationError
+
+    def confirm():
+        if config.interactive:
+            confirm_dashboard_loaded()
+        else:
+            print("Dashboard ready, continuing without confirmation (non-interactive mode).\n")
+
+    # --- Cleanup and Finalization ---
+    # Leaving the block closes the Chrome browser and stops the metrics
+    # exporters (writing the final textfile), on the error paths too
+    # Storage records found without --storage-key-pattern are only deleted once confirmed
+    confirm_purge = confirm_storage_purge if config.interactive else None
+    with DeletionSession(config, confirm=confirm, confirm_purge=confirm_purge) as session:
+        try:
+            stats = session.run()
+        except DriverCreationError as e:
+            if config.interactive:
+                raise
+            print(f"ERROR: {e}")
+            return EXIT_DRIVER_FAILED
+        except DashboardNotReadyError as e:
+            print(f"ERROR: {e}")
+            return EXIT_DASHBOARD_NOT_READY
+
+        print(f"Completed deleting all items. Total deleted: {stats.deleted}")
+        if stats.selection:
+            print(f"Rows matching the filter: {stats.selection['matched']} of {stats.selection['indexed']}")
+        if stats.previously_deleted:
+            print(f"Total including the interrupted run: {stats.previously_deleted + stats.deleted}")
+        if stats.mode == "ui" and stats.engine == "webdriver":
+            print(f"Stale element retries: {stats.stale_retries}, "
+                  f"skipped icons: {stats.skipped}")
+        elif stats.mode == "ui" and stats.engine in ("cdp", "pipeline"):
+            print(f"Skipped icons: {stats.skipped}")
+        session.waits.print_report()
+        session.timer.print_report()
+        if args.report:
+            from .instrumentation import build_run_report, write_run_report
+
+            write_run_report(args.report, build_run_report(stats))
+            print(f"Run report written to {args.report}")
+
+    # Display profile management information for user reference
+    print(f"\nNote: TrueKey profile is saved at: {config.truekey_profile_dir}")
+    print("To refresh the profile with latest extensions, run the script again with --refresh-profile.")
+    return EXIT_OK
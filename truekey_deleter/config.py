@@ -0,0 +1,150 @@
+"""
+Configuration defaults for the TrueKey Login Deleter.
+
+This module only uses the standard library so it can be imported without
+paying selenium's import cost.
+"""
+
+import getpass
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Default TrueKey extension ID from the Chrome Web Store
+DEFAULT_EXTENSION_ID = "cpaibbcbodhimfnjnakiidgbpiehfgci"
+
+# Exit codes for unattended (non-interactive) runs
+EXIT_OK = 0
+EXIT_DRIVER_FAILED = 2
+EXIT_DASHBOARD_NOT_READY = 3
+EXIT_BROWSER_NOT_RUNNING = 4
+EXIT_PROFILES_FAILED = 5
+
+# DevTools port of the persistent browser used by --attach
+DEFAULT_DEBUG_PORT = 9222
+
+# Dashboard element locators used throughout the deletion process. Plain
+# strategy strings (the values of selenium's By constants) keep this module
+# free of selenium imports.
+LIST_MODE_LOCATOR = ("id", "list-mode")
+TRASH_ICON_LOCATOR = ("xpath", '//img[contains(@src, "../images/common/svg/trash.svg")]')
+CONFIRM_BUTTON_LOCATOR = ("xpath", '//button[contains(text(), "Yes") or contains(text(), "Confirm")]')
+# Placeholder the dashboard shows in list view when the vault has no logins
+EMPTY_LIST_LOCATOR = ("css selector", '[class*="empty-state"], [class*="no-logins"]')
+
+
+def dashboard_url(extension_id):
+    """Return the TrueKey dashboard URL for an extension ID."""
+    return f"chrome-extension://{extension_id}/html/dashboard.html"
+
+
+def default_chrome_profile_path(username=None):
+    """Return the user's main Chrome profile directory (macOS layout)."""
+    username = username or getpass.getuser()
+    return f"/Users/{username}/Library/Application Support/Google/Chrome"
+
+
+def default_truekey_profile_dir(username=None):
+    """Return the permanent location of the copied TrueKey profile."""
+    return os.path.join(default_chrome_profile_path(username), "TrueKey")
+
+
+@dataclass
+class SessionConfig:
+    """
+    Settings for a DeletionSession.
+
+    Every field has the same default as the corresponding command line
+    option, so embedding code only needs to set what it wants to change.
+    """
+
+    extension_id: str = DEFAULT_EXTENSION_ID
+    chrome_profile_path: str = field(default_factory=default_chrome_profile_path)
+    truekey_profile_dir: str = field(default_factory=default_truekey_profile_dir)
+    dashboard_url: Optional[str] = None
+    wait_timeout: float = 10.0
+    poll_interval: float = 0.1
+    engine: str = "webdriver"
+    batch_size: int = 50
+    pipeline_depth: int = 8
+    mode: str = "ui"
+    storage_key_pattern: Optional[str] = None
+    dry_run: bool = False
+    refresh_profile: bool = False
+    sync_checksum: bool = False
+    clone_strategy: str = "auto"
+    copy_workers: int = 8
+    headless: bool = False
+    interactive: bool = True
+    ready_timeout: float = 30.0
+    attach: bool = False
+    debug_port: int = DEFAULT_DEBUG_PORT
+    chrome_binary: Optional[str] = None
+    journal_path: Optional[str] = None
+    journal_fsync: str = "batch"
+    resume: bool = False
+    metrics_port: Optional[int] = None
+    metrics_textfile: Optional[str] = None
+    selectors_file: Optional[str] = None
+    scroll_settle: float = 1.0
+    match_patterns: list = field(default_factory=list)
+    exclude_patterns: list = field(default_factory=list)
+    export_path: Optional[str] = None
+    dialog_learn: int = 3
+
+    def __post_init__(self):
+        if self.dashboard_url is None:
+            self.dashboard_url = dashboard_url(self.extension_id)
+
+    def profile_options(self):
+        """Return the keyword arguments for chrome.ensure_truekey_profile()."""
+        return dict(chrome_profile_path=self.chrome_profile_path,
+                    extension_id=self.extension_id,
+                    refresh_profile=self.refresh_profile,
+                    checksum=self.sync_checksum,
+                    clone_strategy=self.clone_strategy,
+                    copy_workers=self.copy_workers)
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Build a configuration from parsed command line arguments.
+
+        Args:
+            args (argparse.Namespace): Arguments from cli.build_parser()
+
+        Returns:
+            SessionConfig: The matching session configuration
+        """
+        return cls(
+            extension_id=args.extension_id,
+            wait_timeout=args.wait_timeout,
+            poll_interval=args.poll_interval,
+            engine=args.engine,
+            batch_size=args.batch_size,
+            pipeline_depth=args.pipeline_depth,
+            mode=args.mode,
+            storage_key_pattern=args.storage_key_pattern,
+            dry_run=args.dry_run,
+            refresh_profile=args.refresh_profile,
+            sync_checksum=args.sync_checksum,
+            clone_strategy=args.clone_strategy,
+            copy_workers=args.copy_workers,
+            headless=args.headless,
+            interactive=not (args.non_interactive or args.headless),
+            ready_timeout=args.ready_timeout,
+            attach=args.attach,
+            debug_port=args.debug_port,
+            chrome_binary=args.chrome_binary,
+            journal_path=args.journal,
+            journal_fsync=args.journal_fsync,
+            resume=args.resume,
+            metrics_port=args.metrics_port,
+            metrics_textfile=args.metrics_textfile,
+            selectors_file=args.selectors,
+            scroll_settle=args.scroll_settle,
+            match_patterns=args.match or [],
+            exclude_patterns=args.exclude or [],
+            export_path=args.export,
+            dialog_learn=args.dialog_learn,
+        )
@@ -0,0 +1,64 @@
+"""
+Dashboard readiness and view handling.
+"""
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+
+
+def wait_for_dashboard_ready(driver, waits, timeout=None):
+    """
+    Readiness probe for the TrueKey dashboard.
+    
+    The dashboard is ready once the document finished loading and the
+    list-mode toggle has been rendered by the extension.
+    
+    Args:
+        driver: Selenium WebDriver instance showing the dashboard
+        waits (WaitEngine): Wait engine used for the probe
+        timeout (float): Seconds to wait (default: the wait engine timeout)
+    
+    Returns:
+        bool: True if the dashboard is ready, False if the probe timed out
+    """
+    try:
+        waits.wait("dashboard_load",
+                   EC.all_of(lambda d: d.execute_script("return document.readyState") == "complete",
+                             EC.presence_of_element_located(waits.locators.get("list_mode"))),
+                   timeout)
+        return True
+    except TimeoutException:
+        return False
+
+
+def switch_to_list_view(driver, waits):
+    """
+    Switch the dashboard from grid view to list view.
+    
+    The list view is rendered once its login rows, or the placeholder of an
+    empty vault, are in the DOM. Failures are reported here; whether the
+    deletion continues is up to the caller.
+    
+    Args:
+        driver: Selenium WebDriver instance showing the dashboard
+        waits (WaitEngine): Wait engine used to detect the rendered list
+    
+    Returns:
+        bool: True if the list view rendered, False if the toggle could not
+            be clicked or neither rows nor the empty-list placeholder appeared
+    """
+    try:
+        list_mode_icon = driver.find_element(*waits.locators.get("list_mode"))
+        list_mode_icon.click()
+        print("Switched to list view successfully.")
+        try:
+            # Wait for the list view to render its rows or the empty-list placeholder
+            waits.wait("list_mode",
+                       EC.any_of(EC.presence_of_element_located(waits.locators.get("trash_icon")),
+                                 EC.presence_of_element_located(waits.locators.get("empty_list"))))
+            return True
+        except TimeoutException:
+            print("No login entries appeared in list view.")
+    except Exception as e:
+        print("Couldn't click the list-mode icon. Error:", e)
+    return False
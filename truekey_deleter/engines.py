@@ -0,0 +1,559 @@
+"""
+Deletion engines for the dashboard's UI.
+
+- delete_with_webdriver(): clicks every trash icon through WebDriver
+- delete_with_javascript(): deletes rows in batches with in-page JavaScript
+- delete_with_cdp(): clicks rows with DevTools input events and waits for
+  their removal with in-page MutationObservers
+"""
+
+import time
+
+from selenium.common.exceptions import JavascriptException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.action_chains import ActionChains
+
+from .instrumentation import StepTimer
+from .rows import RowStream
+from .waits import DialogTracker, removal_condition
+
+
+def delete_with_webdriver(driver, waits, stats=None, max_attempts=3, on_deleted=None, timer=None,
+                          rows=None, dialogs=None, verify=None):
+    """
+    Delete all login entries by driving each trash icon through WebDriver.
+    
+    Every deletion targets the first live row on the dashboard, so each step
+    costs a single lookup and never works on element references that went
+    stale when an earlier row was removed. A row that keeps failing after
+    `max_attempts` tries is skipped and the next live row is targeted instead.
+    Rows come from a RowStream, which scrolls virtualized or lazily rendered
+    lists for more rows once the rendered ones are gone. A deleted row is
+    detected by its element going stale until the stream has seen the list
+    reuse row nodes; from then on a row showing other text counts as removed
+    too, which costs a script call per check. Whether a click
+    opens the confirmation dialog is learned over the first deletions (see
+    waits.DialogTracker); after that the dialog is no longer probed for.
+    
+    Args:
+        driver: Selenium WebDriver instance showing the dashboard in list view
+        waits (WaitEngine): Wait engine used to detect dialogs and removed rows;
+            its locator registry supplies the trash icon and confirm button locators
+        stats (dict): Optional dict updated with "stale_retries" and "skipped"
+        max_attempts (int): Tries per row before it is skipped
+        on_deleted (callable): Called with the text label of every deleted row
+            (e.g. to journal it)
+        timer (StepTimer): Optional timer recording the find, move, click,
+            confirm and per-item durations and the stale retries
+        rows (RowStream): Row enumerator (default: one that does not scroll,
+            for lists that render every row)
+        dialogs (DialogTracker): Learns whether the dialog appears (default:
+            a tracker learning over the first 3 deletions)
+        verify (callable): Optional check run on every icon before it is
+            clicked (filters.RowIndex.verify); returns the row's text, which
+            also detects the removal, or None to leave a reused row alone
+    
+    Returns:
+        int: Number of deleted login entries
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("stale_retries", 0)
+    stats.setdefault("skipped", 0)
+    timer = timer or StepTimer()
+    # Locators chosen by the startup calibration (see locators.LocatorRegistry)
+    trash_locator = waits.locators.get("trash_icon")
+    confirm_locator = waits.locators.get("confirm_button")
+    if rows is None:
+        rows = RowStream(driver, trash_locator, settle_timeout=0, timer=timer)
+    if dialogs is None:
+        dialogs = DialogTracker()
+    live_rows = iter(rows)
+    
+    deletion_count = 0
+    attempts = 0
+    
+    while True:
+        item_started = time.perf_counter()
+        # Rows that could not be deleted stay at the top; the stream targets the one after them
+        with timer.step("find"):
+            icon = next(live_rows, None)
+        if icon is None:
+            break  # No more trash icons, even after scrolling; deletion complete
+        
+        try:
+            label = None
+            if verify is not None:
+                label = verify(icon)
+                if label is None:
+                    # The row node now shows another login; it was indexed again
+                    timer.count("recycled_rows")
+                    rows.mark_reused()
+                    continue
+            elif on_deleted is not None or rows.reuses_nodes:
+                # The journal records which login was deleted
+                label = waits.row_label(icon)
+            # The row's text is only compared once the list reused a node; until then
+            # the cheaper staleness check detects the removal
+            tracked_label = label if rows.reuses_nodes else None
+            
+            # Use ActionChains to ensure the icon is visible and clickable
+            with timer.step("move"):
+                ActionChains(driver).move_to_element(icon).perform()
+            try:
+                with timer.step("click"):
+                    icon.click()
+                    
+                    # Wait for the confirmation dialog or the row's removal, as learned so far
+                    confirm_button = _await_click_outcome(waits, icon, tracked_label, confirm_locator, dialogs,
+                                                          timer)
+                
+                # Click the confirmation dialog if it appeared
+                if confirm_button is not None:
+                    with timer.step("confirm"):
+                        confirm_button.click()
+                        timer.count("confirm_dialogs")
+                        waits.until_row_removed("confirm_click", icon, tracked_label)
+            except TimeoutException:
+                if tracked_label is not None or label is None or not removal_condition(icon, label)(driver):
+                    raise
+                # The list refilled the row's node with the next login instead of removing it
+                rows.mark_reused()
+                timer.count("reused_rows")
+            
+            deletion_count += 1
+            attempts = 0
+            timer.record("item", time.perf_counter() - item_started)
+            if on_deleted is not None:
+                on_deleted(label)
+            print(f"Deleted item #{deletion_count}")
+        
+        except StaleElementReferenceException:
+            # The row was re-rendered between lookup and click; re-resolve it
+            stats["stale_retries"] += 1
+            timer.count("stale_retries")
+        
+        except Exception as e:
+            attempts += 1
+            if attempts >= max_attempts:
+                print(f"Skipping an icon due to error: {e}")
+                stats["skipped"] += 1
+                rows.skip()
+                timer.count("skipped")
+                attempts = 0
+            else:
+                timer.count("error_retries")
+    
+    return deletion_count
+
+
+def _await_click_outcome(waits, icon, label, confirm_locator, dialogs, timer):
+    """
+    Wait for the result of a trash click in the way `dialogs` has learned.
+    
+    Returns:
+        WebElement: The confirm button if the dialog appeared, None if the
+        row was removed right away
+    """
+    if dialogs.mode == "never":
+        try:
+            waits.until_row_removed("delete_click", icon, label)
+            return None
+        except TimeoutException:
+            # The row stayed: the dashboard may ask for confirmation now
+            dialogs.relearn()
+    elif dialogs.mode == "always":
+        try:
+            return waits.until_visible("delete_click", confirm_locator)
+        except TimeoutException:
+            # No dialog: the dashboard may have removed the row right away
+            dialogs.relearn()
+    
+    with timer.step("dialog_probe"):
+        # The wait returns the visible confirm button, or True once the row is gone
+        outcome = waits.until_dialog_or_removed("delete_click", icon, label)
+    confirm_button = None if outcome is True else outcome
+    dialogs.observe(confirm_button is not None)
+    return confirm_button
+
+
+# In-page deletion batch used by the "js" engine. It runs entirely inside the
+# dashboard: each trash icon is clicked, the confirmation dialog is accepted
+# when it shows up, and the row is considered deleted once its icon leaves the
+# DOM (or the icon count drops). The callback reports the batch outcome in a
+# single WebDriver response. Like the other in-page helpers it only targets
+# window.__truekeyIconSelector when a filter set it, and skips tagged rows that
+# a virtualized list reused for another login (see filters.RowIndex). A row
+# whose text changes counts as removed too, since such lists delete a row by
+# refilling its node.
+JS_DELETE_BATCH_SCRIPT = """
+var batchSize = arguments[0];
+var timeoutMs = arguments[1];
+var skip = arguments[2] || 0;
+var done = arguments[arguments.length - 1];
+var iconSelector = window.__truekeyIconSelector || 'img[src*="../images/common/svg/trash.svg"]';
+var deleted = 0;
+var failed = 0;
+var confirms = 0;
+var exhausted = false;
+var labels = [];
+var times = [];
+
+function rowLabel(icon) {
+    var row = icon.closest('tr, li, [class*="row"], [class*="item"]') || icon.parentNode;
+    return ((row && row.textContent) || '').replace(/\\s+/g, ' ').trim().slice(0, 200);
+}
+
+function firstIcon() {
+    // Rows skipped after repeated failures stay at the top; target the one after them
+    var icons = document.querySelectorAll(iconSelector);
+    var current = 0;
+    for (var i = 0; i < icons.length; i++) {
+        if (!window.__truekeyRowCheck || window.__truekeyRowCheck(icons[i]) !== null) {
+            if (current++ === skip) { return icons[i]; }
+        }
+    }
+    return null;
+}
+
+function findConfirmButton() {
+    var buttons = document.querySelectorAll('button');
+    for (var i = 0; i < buttons.length; i++) {
+        var text = buttons[i].textContent || '';
+        if ((text.indexOf('Yes') !== -1 || text.indexOf('Confirm') !== -1) &&
+                buttons[i].offsetParent !== null) {
+            return buttons[i];
+        }
+    }
+    return null;
+}
+
+function waitFor(predicate) {
+    return new Promise(function (resolve) {
+        var value = predicate();
+        if (value) { resolve(value); return; }
+        var observer = new MutationObserver(function () {
+            var value = predicate();
+            if (value) { finish(value); }
+        });
+        var timer = setTimeout(function () { finish(null); }, timeoutMs);
+        function finish(value) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(value);
+        }
+        observer.observe(document.body, {childList: true, subtree: true, attributes: true});
+    });
+}
+
+async function run() {
+    for (var i = 0; i < batchSize; i++) {
+        var icon = firstIcon();
+        if (!icon) { exhausted = true; break; }
+        var started = performance.now();
+        var before = document.querySelectorAll(iconSelector).length;
+        var label = rowLabel(icon);
+        var removed = function () {
+            return (!icon.isConnected || rowLabel(icon) !== label ||
+                    document.querySelectorAll(iconSelector).length < before) ? 'removed' : null;
+        };
+        icon.scrollIntoView({block: 'center'});
+        icon.click();
+        var outcome = await waitFor(function () {
+            return removed() || (findConfirmButton() ? 'dialog' : null);
+        });
+        if (outcome === 'dialog') {
+            findConfirmButton().click();
+            confirms++;
+            outcome = await waitFor(removed);
+        }
+        if (outcome !== 'removed') { failed++; break; }
+        deleted++;
+        labels.push(label);
+        times.push(performance.now() - started);
+    }
+    done({deleted: deleted, failed: failed, exhausted: exhausted, labels: labels, times: times,
+          confirms: confirms, remaining: document.querySelectorAll(iconSelector).length});
+}
+
+run().catch(function (error) {
+    done({deleted: deleted, failed: failed + 1, exhausted: false, labels: labels, times: times,
+          confirms: confirms, remaining: -1, error: String(error)});
+});
+"""
+
+
+def delete_with_javascript(driver, batch_size=50, timeout=10.0, on_deleted=None, timer=None, stats=None,
+                           max_attempts=3):
+    """
+    Delete all login entries with in-page JavaScript batches.
+    
+    Each batch is a single execute_async_script call that deletes up to
+    `batch_size` entries inside the dashboard, so a whole batch costs one
+    WebDriver round trip instead of several per entry. A batch ends at the
+    first row that is not removed; that row is retried by the next batches
+    and skipped after `max_attempts` tries, like in delete_with_webdriver().
+    
+    Args:
+        driver: Selenium WebDriver instance showing the dashboard in list view
+        batch_size (int): Maximum number of entries deleted per script call
+        timeout (float): Seconds to wait for each row to disappear
+        on_deleted (callable): Called with the text label of every deleted row
+        timer (StepTimer): Optional timer recording the duration of every
+            batch, the per-item durations measured in the page and the
+            confirmation dialogs
+        stats (dict): Optional dict updated with "skipped"
+        max_attempts (int): Tries per row before it is skipped
+    
+    Returns:
+        int: Number of deleted login entries
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("skipped", 0)
+    timer = timer or StepTimer()
+    # Give every batch enough time for all of its rows plus some slack
+    driver.set_script_timeout(timeout * batch_size + 30)
+    deletion_count = 0
+    attempts = 0
+    
+    while True:
+        with timer.step("batch"):
+            result = driver.execute_async_script(JS_DELETE_BATCH_SCRIPT, batch_size, int(timeout * 1000),
+                                                 stats["skipped"])
+        deleted = result.get("deleted", 0)
+        deletion_count += deleted
+        for milliseconds in result.get("times", []):
+            timer.record("item", milliseconds / 1000)
+        if result.get("confirms"):
+            timer.count("confirm_dialogs", result["confirms"])
+        if on_deleted is not None:
+            for label in result.get("labels", []):
+                on_deleted(label)
+        print(f"Deleted {deleted} items in batch "
+              f"(total {deletion_count}, {result.get('remaining', 0)} remaining)")
+        
+        if result.get("error"):
+            print(f"Batch stopped due to error: {result['error']}")
+        
+        if deleted:
+            attempts = 0
+        if result.get("failed"):
+            attempts += 1
+            if attempts >= max_attempts:
+                print("Skipping an icon: row was not removed")
+                stats["skipped"] += 1
+                timer.count("skipped")
+                attempts = 0
+            else:
+                timer.count("error_retries")
+        elif result.get("exhausted", result.get("remaining", 0) <= 0):
+            break  # No more trash icons visible; deletion complete
+    
+    return deletion_count
+
+
+# In-page helpers used by the "cdp" engine. locate() and confirm() return the
+# viewport coordinates to click and arm a MutationObserver *before* the click,
+# so outcome() resolves as soon as the dialog appears or the row leaves the DOM
+# (or shows another login, in a virtualized list) without any polling from
+# Python.
+CDP_HELPERS_SCRIPT = """
+window.__truekeyCdp = (function () {
+    var iconSelector = window.__truekeyIconSelector || 'img[src*="../images/common/svg/trash.svg"]';
+    var pending = null;
+
+    function findConfirmButton() {
+        var buttons = document.querySelectorAll('button');
+        for (var i = 0; i < buttons.length; i++) {
+            var text = buttons[i].textContent || '';
+            if ((text.indexOf('Yes') !== -1 || text.indexOf('Confirm') !== -1) &&
+                    buttons[i].offsetParent !== null) {
+                return buttons[i];
+            }
+        }
+        return null;
+    }
+
+    function rowLabel(icon) {
+        var row = icon.closest('tr, li, [class*="row"], [class*="item"]') || icon.parentNode;
+        return ((row && row.textContent) || '').replace(/\\s+/g, ' ').trim().slice(0, 200);
+    }
+
+    function current(icon) {
+        // Tagged rows a virtualized list reused for another login are skipped (see filters.RowIndex)
+        return !window.__truekeyRowCheck || window.__truekeyRowCheck(icon) !== null;
+    }
+
+    function center(element) {
+        element.scrollIntoView({block: 'center'});
+        var rect = element.getBoundingClientRect();
+        return {x: rect.left + rect.width / 2, y: rect.top + rect.height / 2};
+    }
+
+    function watch(predicate, timeoutMs) {
+        return new Promise(function (resolve) {
+            var value = predicate();
+            if (value) { resolve(value); return; }
+            var observer = new MutationObserver(function () {
+                var value = predicate();
+                if (value) { finish(value); }
+            });
+            var timer = setTimeout(function () { finish('timeout'); }, timeoutMs);
+            function finish(value) {
+                observer.disconnect();
+                clearTimeout(timer);
+                resolve(value);
+            }
+            observer.observe(document.body, {childList: true, subtree: true, attributes: true});
+        });
+    }
+
+    return {
+        locate: function (index, timeoutMs) {
+            var icons = Array.prototype.filter.call(document.querySelectorAll(iconSelector), current);
+            var icon = icons[index];
+            if (!icon) { return null; }
+            var before = document.querySelectorAll(iconSelector).length;
+            var label = rowLabel(icon);
+            var removed = function () {
+                return (!icon.isConnected || rowLabel(icon) !== label ||
+                        document.querySelectorAll(iconSelector).length < before) ? 'removed' : null;
+            };
+            var point = center(icon);
+            point.label = label;
+            pending = {removed: removed};
+            pending.outcome = watch(function () {
+                return removed() || (findConfirmButton() ? 'dialog' : null);
+            }, timeoutMs);
+            return point;
+        },
+        confirm: function (timeoutMs) {
+            var button = findConfirmButton();
+            if (!button || !pending) { return null; }
+            var point = center(button);
+            pending.outcome = watch(pending.removed, timeoutMs);
+            return point;
+        },
+        outcome: function () {
+            return pending ? pending.outcome : null;
+        }
+    };
+})();
+"""
+
+
+def cdp_evaluate(driver, expression, await_promise=False):
+    """
+    Evaluate a JavaScript expression through the DevTools Runtime domain.
+    
+    Args:
+        driver: Chromium-based Selenium WebDriver
+        expression (str): JavaScript expression
+        await_promise (bool): Wait for a returned promise to settle
+    
+    Returns:
+        The expression's value, converted to Python
+    
+    Raises:
+        JavascriptException: If the expression threw
+    """
+    result = driver.execute_cdp_cmd("Runtime.evaluate", {
+        "expression": expression,
+        "returnByValue": True,
+        "awaitPromise": await_promise,
+    })
+    if "exceptionDetails" in result:
+        details = result["exceptionDetails"]
+        raise JavascriptException(details.get("exception", {}).get("description") or details.get("text"))
+    return result["result"].get("value")
+
+
+def cdp_click(driver, point):
+    """
+    Click at viewport coordinates with trusted DevTools mouse events.
+    
+    Args:
+        driver: Chromium-based Selenium WebDriver
+        point (dict): Viewport coordinates with "x" and "y"
+    """
+    for event_type in ("mousePressed", "mouseReleased"):
+        driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
+            "type": event_type,
+            "x": point["x"],
+            "y": point["y"],
+            "button": "left",
+            "clickCount": 1,
+        })
+
+
+def delete_with_cdp(driver, timeout=10.0, stats=None, max_attempts=3, on_deleted=None, timer=None):
+    """
+    Delete all login entries with Chrome DevTools Protocol commands.
+    
+    Rows are located and clicked with Runtime.evaluate and
+    Input.dispatchMouseEvent, and their removal is awaited with an in-page
+    MutationObserver promise. Compared to the WebDriver engine there are no
+    element references that can go stale and no polling round trips.
+    Failing rows are retried and skipped like in delete_with_webdriver().
+    
+    Args:
+        driver: Chromium-based Selenium WebDriver showing the dashboard in list view
+        timeout (float): Seconds to wait for the dialog or the row removal
+        stats (dict): Optional dict updated with "skipped"
+        max_attempts (int): Tries per row before it is skipped
+        on_deleted (callable): Called with the text label of every deleted row
+        timer (StepTimer): Optional timer recording the locate, click,
+            confirm and per-item durations
+    
+    Returns:
+        int: Number of deleted login entries
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("skipped", 0)
+    timer = timer or StepTimer()
+    timeout_ms = int(timeout * 1000)
+    
+    cdp_evaluate(driver, CDP_HELPERS_SCRIPT)
+    deletion_count = 0
+    attempts = 0
+    
+    while True:
+        item_started = time.perf_counter()
+        # Rows that could not be deleted stay at the top; target the one after them
+        with timer.step("find"):
+            point = cdp_evaluate(driver, f"window.__truekeyCdp.locate({stats['skipped']}, {timeout_ms})")
+        if point is None:
+            break  # No more trash icons visible; deletion complete
+        
+        with timer.step("click"):
+            cdp_click(driver, point)
+            outcome = cdp_evaluate(driver, "window.__truekeyCdp.outcome()", await_promise=True)
+        
+        # Click the confirmation dialog if it appeared
+        if outcome == "dialog":
+            with timer.step("confirm"):
+                button = cdp_evaluate(driver, f"window.__truekeyCdp.confirm({timeout_ms})")
+                if button is not None:
+                    cdp_click(driver, button)
+                    timer.count("confirm_dialogs")
+                    outcome = cdp_evaluate(driver, "window.__truekeyCdp.outcome()", await_promise=True)
+        
+        if outcome == "removed":
+            deletion_count += 1
+            attempts = 0
+            timer.record("item", time.perf_counter() - item_started)
+            if on_deleted is not None:
+                on_deleted(point.get("label"))
+            print(f"Deleted item #{deletion_count}")
+        else:
+            attempts += 1
+            if attempts >= max_attempts:
+                print(f"Skipping an icon: row was not removed ({outcome})")
+                stats["skipped"] += 1
+                timer.count("skipped")
+                attempts = 0
+            else:
+                timer.count("error_retries")
+    
+    return deletion_count
@@ -0,0 +1,184 @@
+"""
+Inventory export of the logins before they are deleted.
+
+--export FILE reads the visible metadata of every dashboard row (site,
+username, last used and the row's text) with one execute_script call per
+rendered window of rows and streams it to FILE. The format follows the file
+name: .jsonl or .csv, optionally gzip-compressed (.jsonl.gz, .csv.gz). The
+file is written under a temporary name and only moved into place once the
+export is complete.
+"""
+
+import csv
+import gzip
+import json
+import os
+import time
+
+from .filters import parse_row_label
+from .instrumentation import StepTimer
+
+EXPORT_FIELDS = ("site", "username", "last_used", "label")
+
+EXPORT_FORMATS = {
+    ".jsonl": ("jsonl", False),
+    ".jsonl.gz": ("jsonl", True),
+    ".csv": ("csv", False),
+    ".csv.gz": ("csv", True),
+}
+
+# In-page extraction of the rows rendered since the last call. Each row comes
+# back as a [site, username, lastUsed, label] array, which keeps the response
+# small for tens of thousands of rows. Every exported icon is tagged with its
+# row's text. A fresh node is always exported, so logins whose rows show the
+# same text each get a record. A node that was exported with other text has
+# been reused by a virtualized list; it is only exported when more rows show
+# its text right now than were exported with it, so a login scrolled into
+# another node is not exported twice.
+JS_EXPORT_ROWS_SCRIPT = """
+var exported = window.__truekeyExported = window.__truekeyExported || Object.create(null);
+var icons = document.querySelectorAll('img[src*="../images/common/svg/trash.svg"]');
+var entries = [];
+var shown = Object.create(null);
+var rows = [];
+
+function text(element) {
+    return element ? element.textContent.replace(/\\s+/g, ' ').trim() : null;
+}
+
+for (var i = 0; i < icons.length; i++) {
+    var row = icons[i].closest('tr, li, [class*="row"], [class*="item"]') || icons[i].parentNode;
+    var label = (text(row) || '').slice(0, 500);
+    shown[label] = (shown[label] || 0) + 1;
+    entries.push([icons[i], row, label]);
+}
+
+for (var j = 0; j < entries.length; j++) {
+    var icon = entries[j][0], row = entries[j][1], label = entries[j][2];
+    var mark = icon.getAttribute('data-tk-exported');
+    if (mark === label) { continue; }
+    icon.setAttribute('data-tk-exported', label);
+    if (mark !== null && (exported[label] || 0) >= shown[label]) { continue; }
+    exported[label] = (exported[label] || 0) + 1;
+    var time = row.querySelector('time[datetime]');
+    rows.push([
+        text(row.querySelector('[class*="site"], [class*="url"], [class*="domain"]')),
+        text(row.querySelector('[class*="user"], [class*="email"], [class*="login"]')),
+        time ? time.getAttribute('datetime') : text(row.querySelector('[class*="last"], [class*="used"], time')),
+        label
+    ]);
+}
+return rows;
+"""
+
+
+def export_format(path):
+    """
+    Return the (format, compressed) pair for an export file name.
+
+    Raises:
+        ValueError: If the file name has no supported extension
+    """
+    for extension, export in sorted(EXPORT_FORMATS.items(), key=lambda item: -len(item[0])):
+        if path.lower().endswith(extension):
+            return export
+    raise ValueError(f"Unsupported export file {path!r}: use one of {', '.join(EXPORT_FORMATS)}")
+
+
+def profile_export_path(path, name):
+    """
+    Return the export file of one profile of a --profiles run.
+
+    The profile name goes before the extension, so "inv.jsonl.gz" becomes
+    "inv.alice.jsonl.gz" for the profile "alice".
+
+    Raises:
+        ValueError: If the file name has no supported extension
+    """
+    export_format(path)
+    extension = max((extension for extension in EXPORT_FORMATS if path.lower().endswith(extension)), key=len)
+    return f"{path[:-len(extension)]}.{name}{path[-len(extension):]}"
+
+
+class LoginExporter:
+    """
+    Stream the dashboard's login metadata to an export file.
+
+    Used as a context manager; the file is only moved into place when the
+    block completes without an exception. Has the refresh() and
+    row_locator interface of filters.RowIndex, so a RowStream can scroll a
+    lazily rendered list and export each window as it appears.
+
+    Args:
+        driver: Selenium WebDriver showing the dashboard in list view
+        path (str): Export file (.jsonl, .jsonl.gz, .csv or .csv.gz)
+        timer (StepTimer): Optional timer recording every "export_extract" call
+
+    Attributes:
+        rows (int): Records written so far
+        extract_seconds (float): Time spent in the in-page extraction calls
+    """
+
+    row_locator = ("css selector", "img[data-tk-exported]")
+
+    def __init__(self, driver, path, timer=None):
+        self.driver = driver
+        self.path = path
+        self.format, self.compressed = export_format(path)
+        self.timer = timer or StepTimer()
+        self.rows = 0
+        self.extract_seconds = 0.0
+        self._temp_path = f"{path}.tmp"
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        opener = gzip.open if self.compressed else open
+        self._file = opener(self._temp_path, "wt", encoding="utf-8", newline="")
+        if self.format == "csv":
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(EXPORT_FIELDS)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self._temp_path, self.path)
+        else:
+            os.remove(self._temp_path)
+        return False
+
+    def write(self, records):
+        """Write records given as dicts with the EXPORT_FIELDS keys."""
+        for record in records:
+            values = [record.get(name) for name in EXPORT_FIELDS]
+            if self._writer is not None:
+                self._writer.writerow(["" if value is None else value for value in values])
+            else:
+                self._file.write(json.dumps(dict(zip(EXPORT_FIELDS, values))) + "\n")
+        self.rows += len(records)
+
+    def refresh(self):
+        """
+        Export the rows rendered since the last call.
+
+        Returns:
+            int: Number of newly exported rows
+        """
+        started = time.perf_counter()
+        with self.timer.step("export_extract"):
+            rows = self.driver.execute_script(JS_EXPORT_ROWS_SCRIPT) or []
+        self.extract_seconds += time.perf_counter() - started
+        records = [dict(zip(EXPORT_FIELDS, row)) for row in rows]
+        for record in records:
+            if not (record["site"] and record["username"]):
+                site, username = parse_row_label(record["label"])
+                record["site"] = record["site"] or site
+                record["username"] = record["username"] or username
+        self.write(records)
+        return len(records)
+
+    def summary(self):
+        """Return the export details for the run report."""
+        return {"path": self.path, "format": self.format, "compressed": self.compressed,
+                "rows": self.rows, "extract_seconds": self.extract_seconds}
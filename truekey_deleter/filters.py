@@ -0,0 +1,283 @@
+"""
+Selective deletion: pick the login rows to delete by site and username.
+
+--match and --exclude patterns are compiled once into a RowFilter. A
+RowIndex reads the metadata of every rendered row in a single in-page call,
+matches it in Python and tags the selected rows' trash icons with
+data-tk-selected. The deletion engines then only target tagged icons.
+This module only uses the standard library; the driver is passed in.
+"""
+
+import fnmatch
+import re
+
+# Pattern prefixes restricting a pattern to one field
+FILTER_FIELDS = ("site", "username")
+
+# Trash icons tagged for deletion by RowIndex
+SELECTED_ICON_SELECTOR = "img[data-tk-selected]"
+SELECTED_ICON_LOCATOR = ("css selector", SELECTED_ICON_SELECTOR)
+
+_EMAIL_RE = re.compile(r"[^\s@()<>,;]+@[^\s@()<>,;]+")
+_DOMAIN_RE = re.compile(r"(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,}", re.IGNORECASE)
+
+# In-page extraction of the rows rendered since the last call. Every new trash
+# icon gets a data-tk-row number and its row's text as data-tk-label, and is
+# returned with that text and, when the markup labels them, its site and
+# username. The in-page engines are pointed at the selected icons (arguments[0])
+# before any row is tagged, so a filter that selects nothing deletes nothing.
+# Virtualized lists reuse row nodes for other logins, so the tags could end up
+# on the wrong login: window.__truekeyRowCheck(icon) compares the row's text
+# with data-tk-label and, on a mismatch, drops the icon's tags and returns
+# null. Every call checks the tagged icons first, so reused rows are indexed
+# again as the login they show now. Such records carry `reused` (the node was
+# indexed before; data-tk-seen survives the check) and `shown`, the number of
+# rendered rows showing the same text, so RowIndex can count them like the
+# export counts its rows.
+JS_INDEX_ROWS_SCRIPT = """
+window.__truekeyIconSelector = arguments[0];
+var next = window.__truekeyNextRow || 0;
+var rows = [];
+
+function rowOf(icon) {
+    return icon.closest('tr, li, [class*="row"], [class*="item"]') || icon.parentNode;
+}
+
+function rowLabel(icon) {
+    var row = rowOf(icon);
+    return ((row && row.textContent) || '').replace(/\\s+/g, ' ').trim().slice(0, 200);
+}
+
+function field(row, selector) {
+    var element = row.querySelector(selector);
+    return element ? element.textContent.replace(/\\s+/g, ' ').trim() : null;
+}
+
+window.__truekeyRowCheck = function (icon) {
+    var label = rowLabel(icon);
+    if (!icon.hasAttribute('data-tk-row') || icon.getAttribute('data-tk-label') === label) { return label; }
+    icon.removeAttribute('data-tk-row');
+    icon.removeAttribute('data-tk-label');
+    icon.removeAttribute('data-tk-selected');
+    return null;
+};
+
+var tagged = document.querySelectorAll('img[data-tk-row]');
+for (var i = 0; i < tagged.length; i++) {
+    window.__truekeyRowCheck(tagged[i]);
+}
+
+var icons = document.querySelectorAll('img[src*="../images/common/svg/trash.svg"]');
+var shown = Object.create(null);
+var fresh = [];
+for (var i = 0; i < icons.length; i++) {
+    var label = rowLabel(icons[i]);
+    shown[label] = (shown[label] || 0) + 1;
+    if (!icons[i].hasAttribute('data-tk-row')) { fresh.push([icons[i], label]); }
+}
+
+for (var j = 0; j < fresh.length; j++) {
+    var icon = fresh[j][0], label = fresh[j][1];
+    var row = rowOf(icon);
+    var reused = icon.hasAttribute('data-tk-seen');
+    icon.setAttribute('data-tk-row', String(next));
+    icon.setAttribute('data-tk-label', label);
+    icon.setAttribute('data-tk-seen', '1');
+    rows.push({
+        row: next,
+        label: label,
+        site: row ? field(row, '[class*="site"], [class*="url"], [class*="domain"]') : null,
+        username: row ? field(row, '[class*="user"], [class*="email"], [class*="login"]') : null,
+        reused: reused,
+        shown: shown[label]
+    });
+    next++;
+}
+window.__truekeyNextRow = next;
+return rows;
+"""
+
+# Returns the text of a tagged icon's row, or null (and drops its tags) if the
+# row was reused for another login since it was indexed
+JS_VERIFY_ROW_SCRIPT = """
+return window.__truekeyRowCheck ? window.__truekeyRowCheck(arguments[0]) : null;
+"""
+
+# Tags the given rows for deletion
+JS_SELECT_ROWS_SCRIPT = """
+var rows = arguments[0];
+for (var i = 0; i < rows.length; i++) {
+    var icon = document.querySelector('[data-tk-row="' + rows[i] + '"]');
+    if (icon) { icon.setAttribute('data-tk-selected', '1'); }
+}
+"""
+
+
+def parse_row_label(label):
+    """
+    Guess the site and username from a row's text.
+
+    The first e-mail address counts as the username and the first domain
+    name outside of it as the site.
+
+    Args:
+        label (str): Text content of a dashboard row
+
+    Returns:
+        tuple: (site, username); either may be None
+    """
+    email = _EMAIL_RE.search(label or "")
+    username = email.group(0) if email else None
+    remainder = _EMAIL_RE.sub(" ", label or "")
+    domain = _DOMAIN_RE.search(remainder)
+    return (domain.group(0) if domain else None), username
+
+
+def _compile(patterns):
+    """Compile glob patterns into one case-insensitive regex per field."""
+    translated = {name: [] for name in FILTER_FIELDS + ("any",)}
+    for pattern in patterns:
+        name, _, value = pattern.partition(":")
+        if name not in FILTER_FIELDS or not value:
+            name, value = "any", pattern
+        translated[name].append(fnmatch.translate(value))
+    return {name: re.compile("|".join(parts), re.IGNORECASE)
+            for name, parts in translated.items() if parts}
+
+
+class RowFilter:
+    """
+    Precompiled --match/--exclude pattern set.
+
+    Patterns are shell-style globs matched case-insensitively. A "site:" or
+    "username:" prefix restricts a pattern to that field; a bare pattern
+    matches the site, the username or the row's full text. A record is
+    selected when it matches any --match pattern (or there are none) and no
+    --exclude pattern.
+
+    Args:
+        match (list): Patterns selecting records
+        exclude (list): Patterns protecting records from deletion
+    """
+
+    def __init__(self, match=(), exclude=()):
+        self.match = list(match or ())
+        self.exclude = list(exclude or ())
+        self._match = _compile(self.match)
+        self._exclude = _compile(self.exclude)
+
+    def __bool__(self):
+        return bool(self.match or self.exclude)
+
+    @staticmethod
+    def _hits(compiled, record):
+        for name, regex in compiled.items():
+            values = [record.get(name)] if name != "any" else [
+                record.get("site"), record.get("username"), record.get("label")]
+            if any(value and regex.match(value) for value in values):
+                return True
+        return False
+
+    def matches(self, record):
+        """
+        Return True if a record should be deleted.
+
+        Args:
+            record (dict): Record with "site", "username" and optionally "label"
+        """
+        if self._match and not self._hits(self._match, record):
+            return False
+        return not self._hits(self._exclude, record)
+
+
+class RowIndex:
+    """
+    Metadata index of the dashboard rows, filled one in-page call at a time.
+
+    refresh() reads the rows rendered since the previous call, matches them
+    against the filter and tags the selected ones. It runs once before the
+    deletion and again whenever scrolling renders more rows. Every row node
+    counts, even if other rows show the same text. A node a virtualized list
+    reused only counts when more rows show its text than were counted, so a
+    login scrolled into another node is not counted twice.
+
+    Args:
+        driver: Selenium WebDriver showing the dashboard in list view
+        row_filter (RowFilter): Patterns selecting the rows to delete
+
+    Attributes:
+        indexed (int): Rows read so far
+        selected (list): Records of the rows tagged for deletion
+        locator (tuple): Locator of the tagged trash icons
+        row_locator (tuple): Locator of every indexed trash icon
+    """
+
+    locator = SELECTED_ICON_LOCATOR
+    row_locator = ("css selector", "img[data-tk-row]")
+
+    def __init__(self, driver, row_filter):
+        self.driver = driver
+        self.row_filter = row_filter
+        self.indexed = 0
+        self.selected = []
+        self._counts = {}
+
+    def refresh(self):
+        """
+        Index the rows rendered since the last call and tag the matching ones.
+
+        Returns:
+            int: Number of newly indexed rows
+        """
+        records = self.driver.execute_script(JS_INDEX_ROWS_SCRIPT, SELECTED_ICON_SELECTOR) or []
+        selected = []
+        for record in records:
+            if not (record.get("site") and record.get("username")):
+                site, username = parse_row_label(record.get("label"))
+                record["site"] = record.get("site") or site
+                record["username"] = record.get("username") or username
+            if self.row_filter.matches(record):
+                selected.append(record)
+        if selected:
+            self.driver.execute_script(JS_SELECT_ROWS_SCRIPT, [record["row"] for record in selected])
+        # A virtualized list shows a login again in another row node after
+        # scrolling or deletions; it is tagged again but not counted again
+        new = set()
+        for record in records:
+            label = record.get("label")
+            if record.get("reused") and self._counts.get(label, 0) >= record.get("shown", 1):
+                continue
+            self._counts[label] = self._counts.get(label, 0) + 1
+            new.add(record["row"])
+        self.indexed += len(new)
+        self.selected.extend(record for record in selected if record["row"] in new)
+        return len(records)
+
+    def verify(self, icon):
+        """
+        Check that a tagged icon's row still shows the login it was indexed as.
+
+        Virtualized lists reuse row nodes for other logins. A reused row loses
+        its tags and the rendered rows are indexed again right away.
+
+        Args:
+            icon: WebElement of a tagged trash icon
+
+        Returns:
+            str: The row's text if it is unchanged, None if the row was reused
+        """
+        label = self.driver.execute_script(JS_VERIFY_ROW_SCRIPT, icon)
+        if label is None:
+            self.refresh()
+        return label
+
+    def summary(self):
+        """Return the counts and patterns for the run report."""
+        return {"indexed": self.indexed, "matched": len(self.selected),
+                "match": self.row_filter.match, "exclude": self.row_filter.exclude}
+
+    def print_preview(self):
+        """Print every selected row and the counts (dry run)."""
+        print(f"{len(self.selected)} of {self.indexed} login rows match the filter:")
+        for record in self.selected:
+            print(f"  {record.get('site') or '-'} ({record.get('username') or '-'})")
@@ -0,0 +1,173 @@
+"""
+Per-step timing instrumentation and the JSON run report.
+
+A StepTimer records the wall time of every named step of a run (profile
+setup, driver creation, dashboard load, each find/move/click/confirm of a
+deletion, ...) and counts events such as stale element retries. Recording a
+step costs a perf_counter() call and a list append, so the deletion loops
+time every step unconditionally. build_run_report() turns the recorded
+timings into percentiles per step for --report.
+"""
+
+import json
+import math
+import os
+import platform
+import time
+from contextlib import contextmanager
+
+# Bumped when the report layout changes incompatibly
+REPORT_FORMAT_VERSION = 1
+
+
+def percentile(values, q):
+    """
+    Return the q-th percentile of `values` (linear interpolation).
+
+    Args:
+        values (list): Numbers, in any order
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile, or 0.0 for an empty list
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class StepTimer:
+    """
+    Wall-time recorder for the steps of a deletion run.
+
+    Args:
+        metrics (DeletionMetrics): Optional exporter every step and counter
+            is forwarded to
+
+    Attributes:
+        step_times (dict): Mapping of step name to the list of durations in seconds
+        counters (dict): Mapping of event name to its count
+    """
+
+    def __init__(self, metrics=None):
+        self.step_times = {}
+        self.counters = {}
+        self.metrics = metrics
+
+    @contextmanager
+    def step(self, name):
+        """Time the enclosed block as one occurrence of step `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        """Record a duration measured elsewhere (e.g. in the page)."""
+        self.step_times.setdefault(name, []).append(seconds)
+        if self.metrics is not None:
+            self.metrics.observe(name, seconds)
+
+    def count(self, name, amount=1):
+        """Increment the counter `name`."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+        if self.metrics is not None:
+            self.metrics.increment(name, amount)
+
+    def total(self, name):
+        """Return the summed duration of step `name` in seconds."""
+        return sum(self.step_times.get(name, ()))
+
+    def summary(self):
+        """
+        Summarize the recorded steps.
+
+        Returns:
+            dict: Step name mapped to count, total, mean, p50, p95, p99 and
+            max, all in seconds
+        """
+        summary = {}
+        for name, durations in self.step_times.items():
+            total = sum(durations)
+            summary[name] = {
+                "count": len(durations),
+                "total": total,
+                "mean": total / len(durations),
+                "p50": percentile(durations, 50),
+                "p95": percentile(durations, 95),
+                "p99": percentile(durations, 99),
+                "max": max(durations),
+            }
+        return summary
+
+    def print_report(self):
+        """Print the per-step percentiles in milliseconds."""
+        summary = self.summary()
+        if not summary:
+            return
+        print("\n" + "="*60)
+        print("STEP TIMING REPORT (ms):")
+        print("="*60)
+        print(f"{'Step':<18} {'Count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'Total s':>9}")
+        for name, stats in summary.items():
+            print(f"{name:<18} {stats['count']:>6} {stats['p50'] * 1000:>9.1f} "
+                  f"{stats['p95'] * 1000:>9.1f} {stats['p99'] * 1000:>9.1f} {stats['total']:>9.2f}")
+        for name, value in self.counters.items():
+            print(f"{name}: {value}")
+        print("="*60)
+
+
+def build_run_report(stats):
+    """
+    Build the JSON run report of a finished DeletionSession run.
+
+    Throughput is computed over the deletion phase only, so profile setup,
+    startup and the interactive confirmation pause do not dilute it.
+
+    Args:
+        stats (DeletionStats): Result of DeletionSession.run()
+
+    Returns:
+        dict: JSON-serializable report
+    """
+    deletion_seconds = stats.steps.get("deletion", {}).get("total", 0.0)
+    return {
+        "format_version": REPORT_FORMAT_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mode": stats.mode,
+        "engine": stats.engine,
+        "deleted": stats.deleted,
+        "skipped": stats.skipped,
+        "elapsed": stats.elapsed,
+        "deletion_seconds": deletion_seconds,
+        "items_per_second": stats.deleted / deletion_seconds if deletion_seconds else 0.0,
+        "steps": stats.steps,
+        "counters": stats.counters,
+        "waits": stats.waits,
+        "locators": stats.locators,
+        "selection": stats.selection,
+        "export": stats.export,
+        "dialog": stats.dialog,
+    }
+
+
+def write_run_report(path, report):
+    """
+    Write a run report as JSON, replacing the file atomically.
+
+    Args:
+        path (str): Destination file
+        report (dict): Report from build_run_report()
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(temp_path, path)
@@ -0,0 +1,140 @@
+"""
+Append-only progress journal for resumable deletion runs.
+
+Every run writes JSON lines to the journal: a "start" record, one "deleted"
+record per removed entry and a "finish" record when the run completes. A run
+started with --resume reads the journal of the interrupted run, reports what
+was already done and keeps appending to it; other runs start a new journal.
+
+Durability is configurable:
+
+- "always": fsync after every record (safest, slowest)
+- "batch": fsync every `batch_size` records and on close (default)
+- "never": leave syncing to the operating system
+
+Records are always flushed to the operating system immediately, so a crash
+of the Python process or Chrome loses nothing; the fsync policy only matters
+for power loss or a kernel crash.
+"""
+
+import json
+import os
+import time
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+# Journal location inside the TrueKey profile when --journal is not given
+DEFAULT_JOURNAL_NAME = "deletion-journal.jsonl"
+
+
+def default_journal_path(truekey_profile_dir):
+    """Return the default journal path for a TrueKey profile."""
+    return os.path.join(truekey_profile_dir, DEFAULT_JOURNAL_NAME)
+
+
+class DeletionJournal:
+    """
+    Append-only JSON lines journal of deleted entries.
+
+    Args:
+        path (str): Journal file
+        fsync (str): "always", "batch" or "never"
+        batch_size (int): Records between fsyncs with the "batch" policy
+        resume (bool): Append to the existing journal instead of starting a new one
+    """
+
+    def __init__(self, path, fsync="batch", batch_size=50, resume=False):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {', '.join(FSYNC_POLICIES)}")
+        self.path = path
+        self.fsync = fsync
+        self.batch_size = max(1, batch_size)
+        self.deleted = 0
+        self._unsynced = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _append(self, record):
+        record["ts"] = round(time.time(), 3)
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self.fsync == "always" or (self.fsync == "batch" and self._unsynced >= self.batch_size):
+            self.sync()
+
+    def sync(self):
+        """Force the journal to disk."""
+        if self._unsynced and self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def start(self, **details):
+        """Record the start (or resumption) of a run."""
+        self._append({"event": "start", **details})
+        self.sync()
+
+    def record_deleted(self, identifier=None):
+        """
+        Record one deleted entry.
+
+        Args:
+            identifier (str): Storage key or row label of the entry, if known
+        """
+        self.deleted += 1
+        self._append({"event": "deleted", "id": identifier})
+
+    def finish(self, deleted):
+        """Record that the run completed with `deleted` entries in total."""
+        self._append({"event": "finish", "deleted": deleted})
+        self.sync()
+
+    def close(self):
+        """Sync and close the journal."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+def read_journal(path):
+    """
+    Summarize a journal.
+
+    A partially written last line (e.g. after a power loss) is ignored.
+
+    Args:
+        path (str): Journal file
+
+    Returns:
+        dict: "deleted" (count), "runs" (number of start records),
+            "finished" (whether the last run completed) and "last_ts"
+            (timestamp of the last record)
+    """
+    state = {"deleted": 0, "runs": 0, "finished": False, "last_ts": None}
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return state
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            event = record.get("event")
+            if event == "start":
+                state["runs"] += 1
+                state["finished"] = False
+            elif event == "deleted":
+                state["deleted"] += 1
+            elif event == "finish":
+                state["finished"] = True
+            state["last_ts"] = record.get("ts", state["last_ts"])
+    return state
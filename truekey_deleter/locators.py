@@ -0,0 +1,162 @@
+"""
+Locator registry for the dashboard elements the WebDriver engine looks up.
+
+Candidate locators for the list-mode toggle, the trash icons and the confirm
+button are read from a versioned JSON selector schema (selectors.json next to
+this module, or --selectors FILE). At startup calibrate() times every
+candidate against the live dashboard and keeps the fastest one that finds the
+same elements as the reference candidate (the first one listed). Elements
+that are not on the page during calibration, such as the confirm button,
+keep their reference locator. CSS cannot match a button's text, so the
+confirm button only has XPath candidates.
+"""
+
+import json
+import os
+import statistics
+import time
+
+from .config import CONFIRM_BUTTON_LOCATOR, EMPTY_LIST_LOCATOR, LIST_MODE_LOCATOR, TRASH_ICON_LOCATOR
+
+SELECTOR_SCHEMA_VERSION = 1
+DEFAULT_SELECTORS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selectors.json")
+
+# Element names and the locators used when no schema is loaded
+DEFAULT_LOCATORS = {
+    "list_mode": LIST_MODE_LOCATOR,
+    "trash_icon": TRASH_ICON_LOCATOR,
+    "confirm_button": CONFIRM_BUTTON_LOCATOR,
+    "empty_list": EMPTY_LIST_LOCATOR,
+}
+
+SUPPORTED_STRATEGIES = ("id", "css selector", "xpath", "class name", "name", "tag name")
+
+
+def load_selector_schema(path=None):
+    """
+    Read the candidate locators from a selector schema.
+
+    Args:
+        path (str): Schema file (default: the bundled selectors.json)
+
+    Returns:
+        dict: Element name mapped to its list of (by, value) candidates
+
+    Raises:
+        ValueError: If the schema version is unsupported or an entry is malformed
+    """
+    path = path or DEFAULT_SELECTORS_PATH
+    with open(path, encoding="utf-8") as f:
+        schema = json.load(f)
+    if schema.get("schema_version") != SELECTOR_SCHEMA_VERSION:
+        raise ValueError(f"{path}: unsupported selector schema version {schema.get('schema_version')!r} "
+                         f"(expected {SELECTOR_SCHEMA_VERSION})")
+    candidates = {}
+    for name, entries in schema.get("locators", {}).items():
+        if name not in DEFAULT_LOCATORS:
+            raise ValueError(f"{path}: unknown element {name!r}")
+        if not entries:
+            raise ValueError(f"{path}: no locators for {name!r}")
+        for entry in entries:
+            if entry.get("by") not in SUPPORTED_STRATEGIES or not entry.get("value"):
+                raise ValueError(f"{path}: invalid locator for {name!r}: {entry!r}")
+        candidates[name] = [(entry["by"], entry["value"]) for entry in entries]
+    return candidates
+
+
+class LocatorRegistry:
+    """
+    Chosen locator per dashboard element.
+
+    Args:
+        candidates (dict): Element name mapped to its (by, value) candidates;
+            elements without candidates use DEFAULT_LOCATORS
+
+    Attributes:
+        report (dict): Calibration results per element, for the run report
+    """
+
+    def __init__(self, candidates=None):
+        self.candidates = {name: [locator] for name, locator in DEFAULT_LOCATORS.items()}
+        self.candidates.update(candidates or {})
+        self.chosen = {name: locators[0] for name, locators in self.candidates.items()}
+        self.report = {}
+
+    @classmethod
+    def from_schema(cls, path=None):
+        """Build a registry from a selector schema (default: the bundled one)."""
+        return cls(load_selector_schema(path))
+
+    def get(self, name):
+        """Return the (by, value) locator to use for an element."""
+        return self.chosen[name]
+
+    def calibrate(self, driver, names=None, samples=5):
+        """
+        Time every candidate against the live page and keep the fastest valid one.
+
+        Each candidate is timed with find_element(), the lookup the deletion
+        loop repeats for every row, and its matches are counted once. A
+        candidate is valid when it matches as many elements as the reference
+        candidate and finds the same first element. Elements the reference
+        cannot find right now (e.g. the confirm button, which only exists
+        while a dialog is open) keep their current locator.
+
+        Args:
+            driver: Selenium WebDriver showing the dashboard
+            names (list): Elements to calibrate (default: all)
+            samples (int): Timed lookups per candidate; the median is used
+
+        Returns:
+            dict: Element name mapped to the chosen (by, value) locator
+        """
+        names = list(names or self.candidates)
+        for name in names:
+            results = []
+            reference_first = None
+            for by, value in self.candidates[name]:
+                result = {"by": by, "value": value, "count": 0, "median_ms": None, "valid": False}
+                try:
+                    timings = []
+                    for _ in range(max(1, samples)):
+                        started = time.perf_counter()
+                        first = driver.find_element(by, value)
+                        timings.append(time.perf_counter() - started)
+                    result["count"] = len(driver.find_elements(by, value))
+                    result["median_ms"] = statistics.median(timings) * 1000
+                except Exception:
+                    # Not on the page (or not supported by the browser)
+                    first = None
+                if not results:
+                    reference_first = first
+                    result["valid"] = first is not None
+                else:
+                    result["valid"] = (first is not None and reference_first is not None
+                                       and result["count"] == results[0]["count"]
+                                       and first == reference_first)
+                results.append(result)
+
+            valid = [result for result in results if result["valid"]]
+            fastest = min(valid, key=lambda result: result["median_ms"]) if valid else None
+            if fastest is not None:
+                self.chosen[name] = (fastest["by"], fastest["value"])
+            self.report[name] = {
+                "by": self.chosen[name][0],
+                "value": self.chosen[name][1],
+                "calibrated": fastest is not None,
+                "median_ms": fastest["median_ms"] if fastest else None,
+                "candidates": results,
+            }
+        return {name: self.chosen[name] for name in names}
+
+    def print_report(self):
+        """Print the locator chosen for every calibrated element."""
+        for name, entry in self.report.items():
+            if entry["calibrated"]:
+                print(f"Locator for {name}: {entry['by']} {entry['value']} "
+                      f"({entry['median_ms']:.2f} ms/lookup)")
+
+    def summary(self):
+        """Return the chosen locator of every element and its calibration results."""
+        return {name: self.report.get(name, {"by": locator[0], "value": locator[1], "calibrated": False})
+                for name, locator in self.chosen.items()}
@@ -0,0 +1,237 @@
+"""
+Prometheus / OpenMetrics exporter for deletion runs.
+
+DeletionMetrics is fed by the StepTimer of a session, so the deletion loops
+need no extra calls: every timed step or counted event is forwarded to
+observe() or increment(), which update a few integers under a lock. The
+metrics can be scraped from a local HTTP endpoint (--metrics-port) or
+written periodically to a file for node_exporter's textfile collector
+(--metrics-textfile).
+"""
+
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the per-deletion latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds between textfile rewrites during a run
+TEXTFILE_INTERVAL = 15.0
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# StepTimer counter and step names mapped onto the exported counters
+_COUNTED_EVENTS = {
+    "deleted": ("deleted", None),
+    "skipped": ("skipped", None),
+    "stale_retries": ("retries", "stale"),
+    "error_retries": ("retries", "error"),
+    "confirm_dialogs": ("confirm_dialogs", None),
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in sorted(labels.items())) + "}"
+
+
+class DeletionMetrics:
+    """
+    Counters and a latency histogram of one deletion run.
+
+    Args:
+        labels (dict): Constant labels added to every sample, e.g. the engine
+        buckets (tuple): Upper bounds of the latency histogram in seconds
+
+    Attributes:
+        deleted (int): Deleted entries
+        skipped (int): Trash icons skipped after repeated errors
+        confirm_dialogs (int): Confirmation dialogs accepted
+        retries (dict): Retry kind ("stale" or "error") mapped to its count
+    """
+
+    def __init__(self, labels=None, buckets=LATENCY_BUCKETS):
+        self.labels = dict(labels or {})
+        self.buckets = tuple(buckets)
+        self.deleted = 0
+        self.skipped = 0
+        self.confirm_dialogs = 0
+        self.retries = {"stale": 0, "error": 0}
+        self._bucket_counts = [0] * (len(self.buckets) + 1)
+        self._latency_sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, step, seconds):
+        """Record a timed step; "item" steps feed the latency histogram."""
+        if step == "item":
+            with self._lock:
+                self._bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+                self._latency_sum += seconds
+
+    def increment(self, event, amount=1):
+        """Record a counted event such as "deleted", "skipped" or "stale_retries"."""
+        target = _COUNTED_EVENTS.get(event)
+        if target is None:
+            return
+        name, kind = target
+        with self._lock:
+            if kind is None:
+                setattr(self, name, getattr(self, name) + amount)
+            else:
+                self.retries[kind] += amount
+
+    def render(self, openmetrics=True):
+        """
+        Render the metrics in the text exposition format.
+
+        Args:
+            openmetrics (bool): OpenMetrics 1.0 (default) or the Prometheus
+                0.0.4 text format expected by the textfile collector
+
+        Returns:
+            str: The exposition text
+        """
+        with self._lock:
+            counters = [
+                ("truekey_items_deleted", "Login entries deleted", [({}, self.deleted)]),
+                ("truekey_skipped_icons", "Trash icons skipped after repeated errors", [({}, self.skipped)]),
+                ("truekey_confirm_dialogs", "Confirmation dialogs accepted", [({}, self.confirm_dialogs)]),
+                ("truekey_retries", "Deletion attempts retried",
+                 [({"kind": kind}, count) for kind, count in sorted(self.retries.items())]),
+            ]
+            bucket_counts = list(self._bucket_counts)
+            latency_sum = self._latency_sum
+
+        lines = []
+        for name, help_text, samples in counters:
+            family = name if openmetrics else f"{name}_total"
+            lines.append(f"# HELP {family} {help_text}.")
+            lines.append(f"# TYPE {family} counter")
+            for labels, value in samples:
+                lines.append(f"{name}_total{_format_labels({**self.labels, **labels})} {value}")
+
+        name = "truekey_deletion_latency_seconds"
+        lines.append(f"# HELP {name} Seconds from clicking a trash icon to the row leaving the dashboard.")
+        lines.append(f"# TYPE {name} histogram")
+        if openmetrics:
+            lines.append(f"# UNIT {name} seconds")
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), bucket_counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            lines.append(f"{name}_bucket{_format_labels({**self.labels, 'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(self.labels)} {latency_sum}")
+        lines.append(f"{name}_count{_format_labels(self.labels)} {cumulative}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint serving the metrics at /metrics.
+
+    Clients that accept application/openmetrics-text get OpenMetrics; all
+    others get the Prometheus text format.
+
+    Args:
+        metrics (DeletionMetrics): Metrics to expose
+        port (int): TCP port; 0 picks a free one
+        host (str): Interface to bind (default: loopback only)
+    """
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = metrics.render(openmetrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type",
+                                 OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the deletion output
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+
+    def start(self):
+        """Start serving in a background thread."""
+        self._thread.start()
+        print(f"Serving metrics on http://127.0.0.1:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def write_textfile(metrics, path):
+    """
+    Write the metrics for node_exporter's textfile collector.
+
+    The file is replaced atomically so the collector never reads a partial
+    file.
+
+    Args:
+        metrics (DeletionMetrics): Metrics to write
+        path (str): Destination file, conventionally ending in .prom
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(metrics.render(openmetrics=False))
+    os.replace(temp_path, path)
+
+
+class TextfileWriter:
+    """
+    Rewrite a metrics textfile periodically during a run.
+
+    Args:
+        metrics (DeletionMetrics): Metrics to write
+        path (str): Destination file
+        interval (float): Seconds between writes
+    """
+
+    def __init__(self, metrics, path, interval=TEXTFILE_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            write_textfile(self.metrics, self.path)
+
+    def start(self):
+        """Write the file once and keep rewriting it in the background."""
+        write_textfile(self.metrics, self.path)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background writer and write the final values."""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        write_textfile(self.metrics, self.path)
@@ -0,0 +1,301 @@
+"""
+Pipelined deletion engine.
+
+Keeps several delete operations in flight over a direct DevTools connection
+instead of waiting for each row before starting the next one. Every
+operation targets one row tagged with a data-tk-key attribute, so its result
+is correlated with the removal of exactly that row. The number of operations
+in flight adapts to the dashboard: it grows while rows disappear promptly and
+is halved when removals start lagging or time out.
+"""
+
+import asyncio
+import time
+
+from .cdp import CdpConnection, page_websocket_url
+from .instrumentation import StepTimer
+
+# In-page helpers used by the "pipeline" engine. claim() tags live trash icons
+# with data-tk-key; remove() deletes one tagged row. The confirmation dialog is
+# shared by all rows, so the click-and-confirm step runs under an in-page lock
+# while the waits for the rows to leave the DOM overlap. A filter narrows the
+# icons through window.__truekeyIconSelector (see filters.RowIndex). The helpers
+# are installed again after every scroll, so the key counter lives on window:
+# skipped rows keep their keys and a restarted counter would reuse them. Each
+# key also records its row's text (data-tk-claim). A virtualized list reuses
+# row nodes for other logins. A keyed row that shows other text is released
+# and reported as "missing" instead of being clicked. Once a row has been
+# clicked, a change of its text counts as its removal.
+PIPELINE_HELPERS_SCRIPT = """
+window.__truekeyPipeline = (function () {
+    var iconSelector = window.__truekeyIconSelector || 'img[src*="../images/common/svg/trash.svg"]';
+    var lock = Promise.resolve();
+
+    function findConfirmButton() {
+        var buttons = document.querySelectorAll('button');
+        for (var i = 0; i < buttons.length; i++) {
+            var text = buttons[i].textContent || '';
+            if ((text.indexOf('Yes') !== -1 || text.indexOf('Confirm') !== -1) &&
+                    buttons[i].offsetParent !== null) {
+                return buttons[i];
+            }
+        }
+        return null;
+    }
+
+    function watch(predicate, timeoutMs) {
+        return new Promise(function (resolve) {
+            var value = predicate();
+            if (value) { resolve(value); return; }
+            var observer = new MutationObserver(function () {
+                var value = predicate();
+                if (value) { finish(value); }
+            });
+            var timer = setTimeout(function () { finish('timeout'); }, timeoutMs);
+            function finish(value) {
+                observer.disconnect();
+                clearTimeout(timer);
+                resolve(value);
+            }
+            observer.observe(document.body, {childList: true, subtree: true, attributes: true});
+        });
+    }
+
+    function rowLabel(icon) {
+        var row = icon.closest('tr, li, [class*="row"], [class*="item"]') || icon.parentNode;
+        return ((row && row.textContent) || '').replace(/\\s+/g, ' ').trim().slice(0, 200);
+    }
+
+    function current(icon) {
+        if (window.__truekeyRowCheck && window.__truekeyRowCheck(icon) === null) { return false; }
+        return !icon.hasAttribute('data-tk-key') || icon.getAttribute('data-tk-claim') === rowLabel(icon);
+    }
+
+    function release(icon) {
+        icon.removeAttribute('data-tk-key');
+        icon.removeAttribute('data-tk-claim');
+    }
+
+    function withLock(task) {
+        var run = lock.then(task);
+        lock = run.catch(function () {});
+        return run;
+    }
+
+    return {
+        claim: function (count) {
+            var keys = [];
+            var claimed = document.querySelectorAll('[data-tk-key]');
+            for (var i = 0; i < claimed.length; i++) {
+                if (!current(claimed[i])) { release(claimed[i]); }
+            }
+            var icons = document.querySelectorAll(iconSelector + ':not([data-tk-key])');
+            for (var i = 0; i < icons.length && keys.length < count; i++) {
+                if (!current(icons[i])) { continue; }
+                var key = String(window.__truekeyNextKey || 0);
+                window.__truekeyNextKey = Number(key) + 1;
+                icons[i].setAttribute('data-tk-key', key);
+                icons[i].setAttribute('data-tk-claim', rowLabel(icons[i]));
+                keys.push(key);
+            }
+            return keys;
+        },
+        remove: function (key, timeoutMs) {
+            var icon = document.querySelector('[data-tk-key="' + key + '"]');
+            if (!icon) { return Promise.resolve({outcome: 'missing', latencyMs: 0, label: null}); }
+            var label = icon.getAttribute('data-tk-claim');
+            var removed = function () {
+                return (!icon.isConnected || rowLabel(icon) !== label) ? 'removed' : null;
+            };
+            var started = null;
+            var dialog = false;
+            return withLock(function () {
+                if (!current(icon)) {
+                    // Rows above were deleted and the node now shows another login
+                    release(icon);
+                    return 'missing';
+                }
+                started = performance.now();
+                icon.scrollIntoView({block: 'center'});
+                icon.click();
+                return watch(function () {
+                    return removed() || (findConfirmButton() ? 'dialog' : null);
+                }, timeoutMs).then(function (outcome) {
+                    if (outcome !== 'dialog') { return outcome; }
+                    dialog = true;
+                    findConfirmButton().click();
+                    // Hold the lock until the dialog is gone so the next row can open it
+                    return watch(function () {
+                        return removed() || (findConfirmButton() ? null : 'confirmed');
+                    }, timeoutMs);
+                });
+            }).then(function (outcome) {
+                return outcome === 'timeout' || outcome === 'missing' ? outcome : watch(removed, timeoutMs);
+            }).then(function (outcome) {
+                return {outcome: outcome, latencyMs: started === null ? 0 : performance.now() - started,
+                        label: label, dialog: dialog};
+            });
+        }
+    };
+})();
+"""
+
+
+class AdaptiveWindow:
+    """
+    Additive-increase/multiplicative-decrease limit for in-flight deletions.
+
+    The window grows by one operation per window's worth of prompt removals
+    and is halved when a removal times out or takes longer than `lag_factor`
+    times the fastest removal seen so far.
+
+    Args:
+        maximum (int): Upper bound of operations in flight
+        initial (int): Starting window size
+        lag_factor (float): Latency multiple that counts as lagging
+    """
+
+    def __init__(self, maximum, initial=1, lag_factor=4.0):
+        self.maximum = max(1, maximum)
+        self.size = float(min(max(1, initial), self.maximum))
+        self.lag_factor = lag_factor
+        self.baseline_ms = None
+        self.backoffs = 0
+        self.peak = int(self.size)
+
+    @property
+    def limit(self):
+        """Number of operations allowed in flight right now."""
+        return int(self.size)
+
+    def success(self, latency_ms):
+        """Record a removed row and its click-to-removal latency."""
+        if self.baseline_ms is None or latency_ms < self.baseline_ms:
+            self.baseline_ms = latency_ms
+        if latency_ms > self.lag_factor * max(self.baseline_ms, 1.0):
+            self.backoff()
+            return
+        self.size = min(self.maximum, self.size + 1.0 / self.size)
+        self.peak = max(self.peak, self.limit)
+
+    def backoff(self):
+        """Halve the window after a timeout or a lagging removal."""
+        self.size = max(1.0, self.size / 2)
+        self.backoffs += 1
+
+
+async def delete_pipelined(connection, depth=8, timeout=10.0, stats=None, max_attempts=3,
+                           on_deleted=None, timer=None):
+    """
+    Delete all login entries with up to `depth` operations in flight.
+
+    Args:
+        connection (CdpConnection): DevTools connection to the dashboard page
+        depth (int): Maximum number of delete operations in flight
+        timeout (float): Seconds to wait for the dialog and the row removal
+        stats (dict): Optional dict updated with "skipped", "peak_in_flight"
+            and "backoffs"
+        max_attempts (int): Tries per row before it is skipped
+        on_deleted (callable): Called with the text label of every deleted row
+        timer (StepTimer): Optional timer recording each row's in-page
+            click-to-removal latency as "item"
+
+    Returns:
+        int: Number of deleted login entries
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("skipped", 0)
+    timer = timer or StepTimer()
+    timeout_ms = int(timeout * 1000)
+    window = AdaptiveWindow(depth)
+    attempts = {}
+    in_flight = {}
+    retry = []
+    deletion_count = 0
+
+    async def remove(key):
+        return await connection.evaluate(f"window.__truekeyPipeline.remove({key!r}, {timeout_ms})",
+                                         await_promise=True)
+
+    await connection.evaluate(PIPELINE_HELPERS_SCRIPT)
+    while True:
+        # Fill the window: retries first, then freshly claimed rows
+        free = window.limit - len(in_flight)
+        keys = [retry.pop(0) for _ in range(min(free, len(retry)))]
+        if free > len(keys):
+            keys += await connection.evaluate(f"window.__truekeyPipeline.claim({free - len(keys)})")
+        for key in keys:
+            in_flight[asyncio.ensure_future(remove(key))] = key
+        if not in_flight:
+            break  # No more trash icons visible; deletion complete
+
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            key = in_flight.pop(task)
+            result = task.result()
+            if result.get("dialog"):
+                timer.count("confirm_dialogs")
+            if result["outcome"] == "removed":
+                window.success(result["latencyMs"])
+                timer.record("item", result["latencyMs"] / 1000.0)
+                deletion_count += 1
+                if on_deleted is not None:
+                    on_deleted(result.get("label"))
+                print(f"Deleted item #{deletion_count} ({len(in_flight)} in flight)")
+                continue
+            if result["outcome"] == "missing":
+                # The tagged row left the DOM without being deleted here (e.g. re-rendered)
+                timer.count("missing_rows")
+                continue
+            window.backoff()
+            attempts[key] = attempts.get(key, 0) + 1
+            if attempts[key] >= max_attempts:
+                print(f"Skipping an icon: row was not removed ({result['outcome']})")
+                stats["skipped"] += 1
+                timer.count("skipped")
+            else:
+                timer.count("error_retries")
+                retry.append(key)
+
+    stats["peak_in_flight"] = window.peak
+    stats["backoffs"] = window.backoffs
+    return deletion_count
+
+
+def delete_with_pipeline(driver, depth=8, timeout=10.0, stats=None, on_deleted=None, timer=None):
+    """
+    Delete all login entries with the pipelined engine.
+
+    Opens a direct DevTools connection to the page the driver is showing and
+    runs delete_pipelined() on a private event loop.
+
+    Args:
+        driver: Chromium-based Selenium WebDriver showing the dashboard in list view
+        depth (int): Maximum number of delete operations in flight
+        timeout (float): Seconds to wait for the dialog and the row removal
+        stats (dict): Optional dict updated with "skipped", "peak_in_flight"
+            and "backoffs"
+        on_deleted (callable): Called with the text label of every deleted row
+        timer (StepTimer): Optional timer recording the per-row latencies
+
+    Returns:
+        int: Number of deleted login entries
+    """
+    websocket_url = page_websocket_url(driver)
+
+    async def run():
+        connection = await CdpConnection.open(websocket_url)
+        try:
+            return await delete_pipelined(connection, depth, timeout, stats, on_deleted=on_deleted,
+                                          timer=timer)
+        finally:
+            await connection.close()
+
+    started = time.perf_counter()
+    deletion_count = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    if deletion_count:
+        print(f"Pipeline deleted {deletion_count} items in {elapsed:.1f}s "
+              f"({deletion_count / elapsed:.1f} items/s)")
+    return deletion_count
@@ -0,0 +1,484 @@
+"""
+TrueKey profile management.
+
+Builds and refreshes the dedicated TrueKey Chrome profile from the user's
+main Chrome profile: only the TrueKey extension and its state are copied,
+unchanged files are skipped, files are cloned with reflinks or hardlinks where
+the filesystem allows it, and copies run on a thread pool.
+"""
+
+import errno
+import hashlib
+import os
+import re
+import shutil
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .config import DEFAULT_EXTENSION_ID, default_chrome_profile_path, default_truekey_profile_dir
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    Compute the SHA-256 digest of a file.
+    
+    Args:
+        path (str): File to hash
+        chunk_size (int): Bytes read per chunk
+    
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def files_match(src, dst, src_stat=None, checksum=False):
+    """
+    Check whether a destination file is already up to date with its source.
+    
+    Files match when their sizes and modification times (whole seconds, as
+    rsync does) are equal, or with checksum=True when their contents hash to
+    the same digest.
+    
+    Args:
+        src (str): Source file path
+        dst (str): Destination file path
+        src_stat (os.stat_result): Optional pre-computed stat of the source
+        checksum (bool): Compare content hashes instead of modification times
+    
+    Returns:
+        bool: True if the destination does not need to be copied again
+    """
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if src_stat is None:
+        src_stat = os.stat(src)
+    if dst_stat.st_size != src_stat.st_size:
+        return False
+    if checksum:
+        return file_digest(src) == file_digest(dst)
+    return int(dst_stat.st_mtime) == int(src_stat.st_mtime)
+
+
+def new_sync_stats():
+    """Create an empty set of sync counters."""
+    return {"files_copied": 0, "files_skipped": 0, "files_removed": 0,
+            "bytes_copied": 0, "bytes_skipped": 0}
+
+
+class FileCloner:
+    """
+    Clone files into the TrueKey profile using the cheapest available method.
+    
+    Strategies:
+    - "reflink": copy-on-write clone (FICLONE on Linux btrfs/xfs, clonefile()
+      on macOS APFS); instant and independent of the source afterwards
+    - "hardlink": shares the source file; only used for read-only extension
+      assets since any write would also change the main Chrome profile
+    - "copy": regular byte copy with shutil.copy2
+    - "auto": try reflink, then hardlink (read-only files only), then copy,
+      remembering what works for each source/destination filesystem pair
+    
+    Args:
+        strategy (str): One of "auto", "reflink", "hardlink" or "copy"
+    
+    Attributes:
+        counts (dict): Number of files cloned with each strategy
+    """
+    
+    STRATEGIES = ("auto", "reflink", "hardlink", "copy")
+    
+    # Linux ioctl request for a copy-on-write clone (_IOW(0x94, 9, int))
+    FICLONE = 0x40049409
+    
+    def __init__(self, strategy="auto"):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown clone strategy: {strategy}")
+        self.strategy = strategy
+        self.counts = {"reflink": 0, "hardlink": 0, "copy": 0}
+        self._unsupported = set()
+        self._lock = threading.Lock()
+    
+    def clone(self, src, dst, read_only=False):
+        """
+        Clone a file, replacing any existing destination file.
+        
+        Args:
+            src (str): Source file path
+            dst (str): Destination file path
+            read_only (bool): Whether the file may be shared through a hardlink
+        
+        Returns:
+            str: The strategy that was used
+        """
+        if os.path.lexists(dst):
+            # Never write through an existing file, it may be a hardlink
+            os.remove(dst)
+        
+        if self.strategy == "auto":
+            candidates = ["reflink", "hardlink", "copy"] if read_only else ["reflink", "copy"]
+        elif self.strategy == "hardlink" and not read_only:
+            candidates = ["copy"]
+        else:
+            candidates = [self.strategy]
+        
+        filesystems = None
+        if len(candidates) > 1:
+            filesystems = (os.stat(src).st_dev, os.stat(os.path.dirname(dst) or ".").st_dev)
+        for strategy in candidates:
+            if (strategy, filesystems) in self._unsupported and strategy != candidates[-1]:
+                continue
+            try:
+                getattr(self, f"_{strategy}")(src, dst)
+            except OSError:
+                if strategy == candidates[-1]:
+                    raise
+                # Remember that this filesystem pair does not support the strategy
+                self._unsupported.add((strategy, filesystems))
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                continue
+            with self._lock:
+                self.counts[strategy] += 1
+            return strategy
+    
+    def _reflink(self, src, dst):
+        if sys.platform == "darwin":
+            import ctypes
+            libc = ctypes.CDLL("/usr/lib/libSystem.B.dylib", use_errno=True)
+            if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+                error = ctypes.get_errno()
+                raise OSError(error, os.strerror(error), src)
+        elif sys.platform == "win32":
+            # No fcntl on Windows; "auto" falls back to the next strategy
+            raise OSError(errno.ENOTSUP, "reflinks are not supported on Windows", src)
+        else:
+            import fcntl
+            with open(src, "rb") as source, open(dst, "wb") as target:
+                fcntl.ioctl(target.fileno(), self.FICLONE, source.fileno())
+        shutil.copystat(src, dst)
+    
+    def _hardlink(self, src, dst):
+        os.link(src, dst)
+    
+    def _copy(self, src, dst):
+        shutil.copy2(src, dst)
+    
+    def describe(self):
+        """Return a short summary of how many files each strategy handled."""
+        return ", ".join(f"{count} {name}" for name, count in self.counts.items() if count) or "nothing"
+
+
+def _sync_one(src, dst, checksum=False, cloner=None, read_only=False):
+    """
+    Copy a file if it is out of date; safe to run from worker threads.
+    
+    Returns:
+        tuple: (copied, size) where copied is False for unchanged files
+    """
+    src_stat = os.stat(src)
+    if files_match(src, dst, src_stat, checksum):
+        return False, src_stat.st_size
+    if cloner is not None:
+        cloner.clone(src, dst, read_only)
+    else:
+        shutil.copy2(src, dst)
+    return True, src_stat.st_size
+
+
+def _record_sync(stats, copied, size):
+    if copied:
+        stats["files_copied"] += 1
+        stats["bytes_copied"] += size
+    else:
+        stats["files_skipped"] += 1
+        stats["bytes_skipped"] += size
+
+
+def sync_file(src, dst, stats, checksum=False, cloner=None, read_only=False):
+    """
+    Copy a single file only if the destination is out of date.
+    
+    Args:
+        src (str): Source file path
+        dst (str): Destination file path
+        stats (dict): Sync counters updated in place
+        checksum (bool): Compare content hashes instead of modification times
+        cloner (FileCloner): Optional cloner used instead of a plain copy
+        read_only (bool): Whether the file may be shared through a hardlink
+    """
+    _record_sync(stats, *_sync_one(src, dst, checksum, cloner, read_only))
+
+
+def sync_tree(src, dst, checksum=False, stats=None, cloner=None, read_only=False,
+              workers=1, progress=None):
+    """
+    Incrementally mirror a directory tree, rsync style.
+    
+    Only files whose size or modification time differ (or content hash, with
+    checksum=True) are copied. Files and directories that no longer exist in
+    the source are removed from the destination.
+    
+    The source is walked once and every directory is created up front, in
+    walk order so parents exist before their children. Files are then
+    compared and copied through a bounded thread pool when workers > 1, which
+    hides the per-file syscall latency of trees with many small files.
+    
+    Args:
+        src (str): Source directory
+        dst (str): Destination directory
+        checksum (bool): Compare content hashes instead of modification times
+        stats (dict): Optional sync counters to update
+        cloner (FileCloner): Optional cloner used instead of a plain copy
+        read_only (bool): Whether the files may be shared through hardlinks
+        workers (int): Number of copy threads (1 copies sequentially)
+        progress (callable): Optional callback called as progress(done, total)
+    
+    Returns:
+        dict: Counters for copied, skipped and removed files and bytes
+    """
+    if stats is None:
+        stats = new_sync_stats()
+    
+    jobs = []
+    for root, dirs, files in os.walk(src):
+        rel = os.path.relpath(root, src)
+        target = os.path.normpath(os.path.join(dst, rel))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            jobs.append((os.path.join(root, name), os.path.join(target, name)))
+    
+    total = len(jobs)
+    done = 0
+    
+    def finished(result):
+        nonlocal done
+        _record_sync(stats, *result)
+        done += 1
+        if progress is not None:
+            progress(done, total)
+    
+    if workers <= 1:
+        for file_src, file_dst in jobs:
+            finished(_sync_one(file_src, file_dst, checksum, cloner, read_only))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for file_src, file_dst in jobs:
+                pending.add(pool.submit(_sync_one, file_src, file_dst, checksum, cloner, read_only))
+                # Keep the number of queued copies bounded
+                if len(pending) >= workers * 4:
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        finished(future.result())
+            for future in pending:
+                finished(future.result())
+    
+    # Remove whatever disappeared from the source since the last sync
+    for root, dirs, files in os.walk(dst, topdown=False):
+        rel = os.path.relpath(root, dst)
+        source = os.path.normpath(os.path.join(src, rel))
+        for name in files:
+            if not os.path.isfile(os.path.join(source, name)):
+                os.remove(os.path.join(root, name))
+                stats["files_removed"] += 1
+        for name in dirs:
+            if not os.path.isdir(os.path.join(source, name)):
+                shutil.rmtree(os.path.join(root, name))
+    
+    return stats
+
+
+def print_sync_progress(done, total):
+    """Progress callback printing every 10% of a sync."""
+    step = max(total // 10, 1)
+    if done % step == 0 or done == total:
+        print(f"  {done}/{total} files ({done * 100 // total}%)")
+
+
+def format_bytes(size):
+    """Format a byte count for display."""
+    if size < 1024:
+        return f"{size} B"
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024.0
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+
+
+# Directories holding the TrueKey extension's own data (settings and logged-in
+# state), relative to the Chrome profile's Default directory
+EXTENSION_STATE_DIRS = [
+    os.path.join("Local Extension Settings", "{id}"),
+    os.path.join("Sync Extension Settings", "{id}"),
+    os.path.join("IndexedDB", "chrome-extension_{id}_0.indexeddb.leveldb"),
+    os.path.join("IndexedDB", "chrome-extension_{id}_0.indexeddb.blob"),
+]
+
+
+def extension_version_key(version):
+    """Sort key for extension version directories such as "4.2.118_0"."""
+    return [int(part) if part.isdigit() else 0 for part in re.split(r"[._]", version)]
+
+
+def latest_extension_version(extension_dir):
+    """
+    Find the newest installed version directory of an extension.
+    
+    Args:
+        extension_dir (str): Extensions/<extension id> directory
+    
+    Returns:
+        str: Name of the newest version directory, or None if there is none
+    """
+    if not os.path.isdir(extension_dir):
+        return None
+    versions = [name for name in os.listdir(extension_dir)
+                if os.path.isdir(os.path.join(extension_dir, name))]
+    if not versions:
+        return None
+    return max(versions, key=extension_version_key)
+
+
+def sync_truekey_extension(default_profile, truekey_default, extension_id, checksum=False, stats=None,
+                           cloner=None, workers=1, progress=None):
+    """
+    Sync only the TrueKey extension and its state into the TrueKey profile.
+    
+    Copies Extensions/<extension id>/<newest version> plus the extension's
+    settings and IndexedDB directories. Other extensions, older TrueKey
+    versions and anything left over from earlier full copies are removed from
+    the TrueKey profile so Chrome only has to load a single extension.
+    
+    Args:
+        default_profile (str): Default directory of the main Chrome profile
+        truekey_default (str): Default directory of the TrueKey profile
+        extension_id (str): TrueKey extension ID
+        checksum (bool): Compare content hashes instead of modification times
+        stats (dict): Optional sync counters to update
+        cloner (FileCloner): Optional cloner used instead of a plain copy
+        workers (int): Number of copy threads
+        progress (callable): Optional callback called as progress(done, total)
+    
+    Returns:
+        bool: True if the extension was found and synced
+    """
+    if stats is None:
+        stats = new_sync_stats()
+    
+    ext_src = os.path.join(default_profile, "Extensions", extension_id)
+    version = latest_extension_version(ext_src)
+    if version is None:
+        return False
+    
+    ext_dst_root = os.path.join(truekey_default, "Extensions")
+    ext_dst = os.path.join(ext_dst_root, extension_id)
+    # Installed extension files are never modified, so they may be hardlinked
+    sync_tree(os.path.join(ext_src, version), os.path.join(ext_dst, version), checksum, stats,
+              cloner, read_only=True, workers=workers, progress=progress)
+    
+    # Drop other extensions and older TrueKey versions from earlier copies
+    for parent, keep in ((ext_dst_root, extension_id), (ext_dst, version)):
+        for name in os.listdir(parent):
+            path = os.path.join(parent, name)
+            if name == keep:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+    
+    for state_dir in EXTENSION_STATE_DIRS:
+        rel = state_dir.format(id=extension_id)
+        src = os.path.join(default_profile, rel)
+        if os.path.isdir(src):
+            sync_tree(src, os.path.join(truekey_default, rel), checksum, stats, cloner,
+                      workers=workers, progress=progress)
+    
+    return True
+
+
+def setup_truekey_profile(truekey_profile_dir=None, chrome_profile_path=None,
+                          extension_id=DEFAULT_EXTENSION_ID, checksum=False, clone_strategy="auto",
+                          workers=8):
+    """
+    Setup or update the TrueKey profile from the main Chrome profile.
+    
+    This function creates a dedicated TrueKey profile by copying essential files
+    from the user's main Chrome profile. This includes preferences, settings,
+    and the TrueKey extension with its stored state. Other installed extensions
+    are not copied, which keeps the profile small and Chrome startup fast.
+    
+    The copied profile allows the script to run without interfering with the
+    user's main Chrome instance while preserving all necessary TrueKey data.
+    Existing profiles are synchronized incrementally: only files that changed
+    since the last setup are copied again.
+    
+    Args:
+        truekey_profile_dir (str): TrueKey profile to create or update
+            (default: the TrueKey directory next to the main Chrome profile)
+        chrome_profile_path (str): Main Chrome profile to copy from
+            (default: the current user's Chrome profile)
+        extension_id (str): TrueKey extension ID
+        checksum (bool): Compare file content hashes instead of size and
+            modification time when deciding what to copy
+        clone_strategy (str): How files are cloned: "auto" (default) picks
+            reflinks, hardlinks for read-only extension files, or plain copies
+            depending on what the filesystem supports
+        workers (int): Number of threads copying files in parallel
+    
+    Returns:
+        dict: Sync counters for copied, skipped and removed files and bytes
+        
+    Raises:
+        OSError: If there are issues creating directories or copying files
+        Exception: If the default Chrome profile is not found
+        
+    Note:
+        This function creates a permanent TrueKey profile directory that will
+        be reused in subsequent script runs for faster startup.
+    """
+    print("Setting up TrueKey profile...")
+    stats = new_sync_stats()
+    cloner = FileCloner(clone_strategy)
+    truekey_profile_dir = truekey_profile_dir or default_truekey_profile_dir()
+    chrome_profile_path = chrome_profile_path or default_chrome_profile_path()
+    
+    # Create TrueKey profile directory
+    os.makedirs(truekey_profile_dir, exist_ok=True)
+    
+    # Copy essential profile files
+    default_profile = os.path.join(chrome_profile_path, "Default")
+    if os.path.exists(default_profile):
+        truekey_default = os.path.join(truekey_profile_dir, "Default")
+        os.makedirs(truekey_default, exist_ok=True)
+        
+        # Copy preferences and settings
+        for item in ["Preferences", "Secure Preferences", "Local State"]:
+            src = os.path.join(chrome_profile_path, item)
+            if os.path.exists(src):
+                sync_file(src, os.path.join(truekey_profile_dir, item), stats, checksum, cloner)
+        
+        # Sync the TrueKey extension and its stored state
+        if sync_truekey_extension(default_profile, truekey_default, extension_id, checksum, stats,
+                                  cloner, workers, print_sync_progress):
+            print("TrueKey extension synced successfully.")
+        else:
+            print(f"Warning: TrueKey extension {extension_id} not found in the Extensions directory.")
+        
+        print(f"Copied {stats['files_copied']} files ({format_bytes(stats['bytes_copied'])}), "
+              f"skipped {stats['files_skipped']} unchanged files ({format_bytes(stats['bytes_skipped'])}), "
+              f"removed {stats['files_removed']} stale files.")
+        print(f"Files cloned with: {cloner.describe()}")
+        print("TrueKey profile setup complete.")
+    else:
+        print("Error: Default Chrome profile not found.")
+    
+    return stats
@@ -0,0 +1,224 @@
+"""
+Streaming enumeration of the dashboard's login rows.
+
+A dashboard that virtualizes or lazily renders its list only has a window of
+rows in the DOM. Once that window is deleted, a plain lookup finds nothing
+and the deletion would end early. RowStream yields one row at a time. When
+the rendered rows run out it scrolls the list container by a page and waits
+briefly for more rows. It stops only when the container cannot scroll any
+further and no new rows appear. Only the row being deleted is held, so memory
+and per-row DOM work do not grow with the vault.
+"""
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .instrumentation import StepTimer
+
+# Returns the nearest scrollable ancestor of a row, or null for the document
+SCROLL_CONTAINER_SCRIPT = """
+var node = arguments[0].parentElement;
+while (node && node !== document.body && node !== document.documentElement) {
+    if (/(auto|scroll)/.test(getComputedStyle(node).overflowY)) { return node; }
+    node = node.parentElement;
+}
+return null;
+"""
+
+# Scrolls the container (default: the document) down by one page. The scroll
+# event is dispatched explicitly so lazy lists also load their next window
+# when the container is too short to scroll.
+SCROLL_PAGE_SCRIPT = """
+var container = arguments[0] || document.scrollingElement || document.documentElement;
+var before = container.scrollTop;
+container.scrollTop = Math.min(before + container.clientHeight, container.scrollHeight);
+var isDocument = container === document.scrollingElement || container === document.documentElement;
+(isDocument ? document : container).dispatchEvent(new Event('scroll'));
+return {moved: container.scrollTop !== before,
+        atEnd: Math.ceil(container.scrollTop + container.clientHeight) >= container.scrollHeight};
+"""
+
+# Scrolls the container (default: the document) back to the top
+SCROLL_TOP_SCRIPT = """
+var container = arguments[0] || document.scrollingElement || document.documentElement;
+container.scrollTop = 0;
+var isDocument = container === document.scrollingElement || container === document.documentElement;
+(isDocument ? document : container).dispatchEvent(new Event('scroll'));
+"""
+
+
+def nth_match(driver, locator, index):
+    """
+    Find the element at position `index` among the locator's matches.
+
+    XPath locators are narrowed in the browser so only a single element is
+    returned; other locator types fall back to a full lookup.
+
+    Args:
+        driver: Selenium WebDriver instance
+        locator (tuple): (By, value) locator
+        index (int): Zero-based position of the wanted match
+
+    Returns:
+        WebElement: The matching element
+
+    Raises:
+        NoSuchElementException: If there are not enough matches
+    """
+    by, value = locator
+    if index == 0:
+        return driver.find_element(by, value)
+    if by == By.XPATH:
+        return driver.find_element(By.XPATH, f"({value})[{index + 1}]")
+    matches = driver.find_elements(by, value)
+    if len(matches) <= index:
+        raise NoSuchElementException(f"No match #{index + 1} for {value}")
+    return matches[index]
+
+
+class RowStream:
+    """
+    Generator of the dashboard's trash icons that scrolls for more rows.
+
+    Iterating yields the first live row after the `offset` rows the caller
+    left in place. The caller deletes it (or calls skip()) before asking
+    for the next one. When no rendered row is left, load_more() scrolls the
+    list and iteration continues with the rows that appeared.
+
+    Args:
+        driver: Selenium WebDriver showing the dashboard in list view
+        locator (tuple): (By, value) locator of the trash icons
+        settle_timeout (float): Seconds to wait for new rows after each
+            scroll; 0 disables scrolling (for fully rendered lists)
+        poll_interval (float): Seconds between checks for new rows
+        max_empty_pages (int): Pages scrolled without new rows before the
+            list counts as finished even if it could scroll further
+        timer (StepTimer): Optional timer recording every "scroll" step
+        index (RowIndex): Optional filter index (or export.LoginExporter);
+            rows rendered by a scroll are indexed (and the matching ones
+            tagged) before they count
+
+    Attributes:
+        offset (int): Rows at the top of the list that were left in place
+        pages (int): Pages scrolled so far
+        reuses_nodes (bool): Whether the list may show other logins in nodes
+            it already rendered: it was scrolled, refilled its window in place
+            or the caller saw a reused node (mark_reused()). Until then a
+            deleted row is detected by its element going stale
+    """
+
+    def __init__(self, driver, locator, settle_timeout=1.0, poll_interval=0.1, max_empty_pages=3, timer=None,
+                 index=None):
+        self.driver = driver
+        self.locator = locator
+        self.settle_timeout = settle_timeout
+        self.poll_interval = poll_interval
+        self.max_empty_pages = max_empty_pages
+        self.timer = timer or StepTimer()
+        self.index = index
+        self.offset = 0
+        self.pages = 0
+        self.reuses_nodes = False
+        self._container = None
+        self._container_located = False
+
+    def __iter__(self):
+        while True:
+            try:
+                row = nth_match(self.driver, self.locator, self.offset)
+            except NoSuchElementException:
+                if self.load_more():
+                    continue
+                return
+            if not self._container_located:
+                self.locate_container(row)
+            yield row
+
+    def skip(self):
+        """Leave the current row in place; iteration continues after it."""
+        self.offset += 1
+
+    def mark_reused(self):
+        """Record that a row node was reused for another login."""
+        self.reuses_nodes = True
+
+    def locate_container(self, row=None):
+        """
+        Find the scrollable element around the rows (once per stream).
+
+        Args:
+            row: A rendered row; looked up when not given
+        """
+        if self.settle_timeout <= 0 or self._container_located:
+            return
+        try:
+            # With a filter the selected rows may all be gone; any indexed row will do
+            locator = self.index.row_locator if self.index is not None else self.locator
+            row = row or nth_match(self.driver, locator, 0)
+            self._container = self.driver.execute_script(SCROLL_CONTAINER_SCRIPT, row)
+        except WebDriverException:
+            return  # No rows yet; scroll the document
+        self._container_located = True
+
+    def rewind(self):
+        """Scroll the list back to its top, e.g. after reading it to the end."""
+        if self.settle_timeout <= 0:
+            return
+        try:
+            self.driver.execute_script(SCROLL_TOP_SCRIPT, self._container)
+        except WebDriverException:
+            pass  # Nothing to scroll
+
+    def load_more(self):
+        """
+        Scroll the list until new rows are rendered or the list has ended.
+
+        With an index, rows that appeared without scrolling are indexed first
+        and no scroll happens: a virtualized list refills its window in place
+        after rows are deleted.
+
+        Returns:
+            bool: True if rows past `offset` (with an index: any new rows)
+            are rendered now, False at the true end of the list
+        """
+        if self.index is not None and self.index.refresh():
+            self.reuses_nodes = True
+            return True
+        if self.settle_timeout <= 0:
+            return False
+        with self.timer.step("scroll"):
+            for _ in range(self.max_empty_pages):
+                try:
+                    position = self.driver.execute_script(SCROLL_PAGE_SCRIPT, self._container)
+                except WebDriverException:
+                    return False
+                if not isinstance(position, dict):
+                    return False  # The driver cannot run scripts
+                self.pages += 1
+                self.timer.count("scroll_pages")
+                if position.get("moved"):
+                    # A virtualized list now shows other logins in the nodes it had rendered
+                    self.reuses_nodes = True
+                if self._wait_for_rows():
+                    return True
+                if not position.get("moved") or position.get("atEnd"):
+                    # Nothing below and nothing new rendered: the true end of the list
+                    return False
+        return False
+
+    def _wait_for_rows(self):
+        def _row_rendered(driver):
+            if self.index is not None:
+                # New rows count even if the filter selects none of them
+                return self.index.refresh() > 0
+            try:
+                return nth_match(driver, self.locator, self.offset)
+            except NoSuchElementException:
+                return False
+
+        try:
+            WebDriverWait(self.driver, self.settle_timeout, poll_frequency=self.poll_interval).until(_row_rendered)
+            return True
+        except TimeoutException:
+            return False
@@ -0,0 +1,313 @@
+"""
+Multi-profile runner for --profiles.
+
+Runs one isolated Chrome and chromedriver per TrueKey profile in a process
+pool. A manifest lists the profiles; every profile must use its own Chrome
+user-data-dir, which is checked up front and guarded by a lock file while a
+worker runs. Failed profiles are retried, and a worker process that dies is
+replaced by a fresh pool without losing the results of the others.
+
+Manifest format (JSON):
+
+    {"profiles": [
+        {"name": "alice", "truekey_profile_dir": "/Users/alice/TrueKeyProfile",
+         "chrome_profile_path": "/Users/alice/Library/Application Support/Google/Chrome"},
+        {"name": "bob", "truekey_profile_dir": "/Users/bob/TrueKeyProfile", "engine": "js"}
+    ]}
+
+Any other SessionConfig field may be set per profile to override the
+command line options.
+"""
+
+import dataclasses
+import json
+import os
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .config import SessionConfig
+from .export import export_format, profile_export_path
+
+# Rough cost of one Chrome + chromedriver worker, used to cap the pool size
+CPUS_PER_WORKER = 2
+MEMORY_PER_WORKER_MB = 1024
+
+# Lock file that keeps two workers out of the same user-data-dir
+LOCK_FILE_NAME = "truekey-runner.lock"
+
+
+class ProfileLockedError(Exception):
+    """Raised when another worker already uses a profile's user-data-dir."""
+
+
+def load_profile_manifest(path):
+    """
+    Read and validate a profiles manifest.
+
+    Args:
+        path (str): JSON manifest, either a list of profiles or an object
+            with a "profiles" list
+
+    Returns:
+        list: Profile dicts, each with a unique "name" and "truekey_profile_dir"
+
+    Raises:
+        ValueError: If the manifest is malformed, names an unknown setting or
+            lists the same user-data-dir or export file twice
+    """
+    with open(path) as f:
+        data = json.load(f)
+    profiles = data.get("profiles") if isinstance(data, dict) else data
+    if not isinstance(profiles, list) or not profiles:
+        raise ValueError(f"{path}: expected a non-empty list of profiles")
+
+    fields = {field.name for field in dataclasses.fields(SessionConfig)}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    seen_dirs = {}
+    seen_exports = {}
+    seen_names = set()
+    for index, profile in enumerate(profiles):
+        if not isinstance(profile, dict) or not profile.get("truekey_profile_dir"):
+            raise ValueError(f"{path}: profile #{index + 1} needs a truekey_profile_dir")
+        unknown = set(profile) - fields - {"name"}
+        if unknown:
+            raise ValueError(f"{path}: profile #{index + 1} has unknown settings: {', '.join(sorted(unknown))}")
+
+        # Resolve relative paths against the manifest so the same file works from any directory
+        profile["truekey_profile_dir"] = os.path.join(base_dir, os.path.expanduser(profile["truekey_profile_dir"]))
+        if profile.get("chrome_profile_path"):
+            profile["chrome_profile_path"] = os.path.join(base_dir, os.path.expanduser(profile["chrome_profile_path"]))
+        if profile.get("export_path"):
+            export_format(profile["export_path"])
+            profile["export_path"] = os.path.join(base_dir, os.path.expanduser(profile["export_path"]))
+        profile.setdefault("name", os.path.basename(os.path.normpath(profile["truekey_profile_dir"])))
+
+        user_data_dir = os.path.normcase(os.path.realpath(profile["truekey_profile_dir"]))
+        if user_data_dir in seen_dirs:
+            raise ValueError(f"{path}: profiles {seen_dirs[user_data_dir]!r} and {profile['name']!r} "
+                             f"share the user-data-dir {profile['truekey_profile_dir']}")
+        if profile["name"] in seen_names:
+            raise ValueError(f"{path}: duplicate profile name {profile['name']!r}")
+        export_path = profile.get("export_path") and os.path.normcase(os.path.realpath(profile["export_path"]))
+        if export_path in seen_exports:
+            raise ValueError(f"{path}: profiles {seen_exports[export_path]!r} and {profile['name']!r} "
+                             f"share the export file {profile['export_path']}")
+        if export_path:
+            seen_exports[export_path] = profile["name"]
+        seen_dirs[user_data_dir] = profile["name"]
+        seen_names.add(profile["name"])
+    return profiles
+
+
+def available_memory_mb():
+    """Return the available (or, failing that, total) physical memory in MB, or None."""
+    for pages_name in ("SC_AVPHYS_PAGES", "SC_PHYS_PAGES"):
+        try:
+            return os.sysconf(pages_name) * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+        except (AttributeError, ValueError, OSError):
+            continue
+    return None
+
+
+def default_worker_count(profile_count):
+    """
+    Pick how many profiles run at once from the CPU count and free memory.
+
+    Args:
+        profile_count (int): Number of profiles in the manifest
+
+    Returns:
+        int: Number of worker processes, at least 1
+    """
+    limit = max(1, (os.cpu_count() or 1) // CPUS_PER_WORKER)
+    memory = available_memory_mb()
+    if memory is not None:
+        limit = min(limit, max(1, memory // MEMORY_PER_WORKER_MB))
+    return max(1, min(limit, profile_count))
+
+
+def acquire_profile_lock(truekey_profile_dir):
+    """
+    Claim a user-data-dir for this process.
+
+    A lock left behind by a process that no longer exists is taken over.
+
+    Args:
+        truekey_profile_dir (str): The profile's user-data-dir
+
+    Returns:
+        str: Path of the lock file, to be passed to release_profile_lock()
+
+    Raises:
+        ProfileLockedError: If a running process holds the lock
+    """
+    from .browser import process_alive
+
+    os.makedirs(truekey_profile_dir, exist_ok=True)
+    lock_path = os.path.join(truekey_profile_dir, LOCK_FILE_NAME)
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(lock_path) as f:
+                    owner = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                owner = 0
+            if owner and process_alive(owner):
+                raise ProfileLockedError(f"{truekey_profile_dir} is in use by process {owner}")
+            os.remove(lock_path)  # Stale lock of a crashed worker
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return lock_path
+    raise ProfileLockedError(f"Could not lock {truekey_profile_dir}")
+
+
+def release_profile_lock(lock_path):
+    """Remove a lock file created by acquire_profile_lock()."""
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+
+
+def run_profile(name, config):
+    """
+    Delete the logins of one profile. Runs inside a worker process.
+
+    Args:
+        name (str): Profile name used in the report
+        config (SessionConfig): Settings for this profile
+
+    Returns:
+        dict: Result with name, status ("ok" or "failed"), deleted, skipped,
+            elapsed, error and, for a successful run, its run report
+    """
+    from .instrumentation import build_run_report
+    from .session import DeletionSession
+
+    started = time.perf_counter()
+    result = {"name": name, "status": "failed", "deleted": 0, "skipped": 0, "error": None}
+    try:
+        lock_path = acquire_profile_lock(config.truekey_profile_dir)
+    except ProfileLockedError as e:
+        result.update(error=str(e), elapsed=time.perf_counter() - started)
+        return result
+    try:
+        with DeletionSession(config) as session:
+            stats = session.run()
+        result.update(status="ok", deleted=stats.deleted, skipped=stats.skipped,
+                      report=build_run_report(stats))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        release_profile_lock(lock_path)
+    result["elapsed"] = time.perf_counter() - started
+    return result
+
+
+def run_profiles(profiles, base_config=None, workers=None, retries=1, worker=run_profile):
+    """
+    Run the deletion for every profile in a process pool.
+
+    A profile that fails is retried up to `retries` times, resuming from its
+    deletion journal. If a worker process dies, the pool is rebuilt and the
+    profiles that had not finished are submitted again; every profile in
+    flight at that moment uses up one attempt.
+
+    Args:
+        profiles (list): Profile dicts from load_profile_manifest()
+        base_config (SessionConfig): Settings shared by all profiles
+        workers (int): Worker processes (default: based on CPU and memory)
+        retries (int): Extra attempts per failed profile
+        worker (callable): Function run per profile (default: run_profile)
+
+    Returns:
+        list: One result dict per profile, in manifest order, each with an
+            "attempts" count
+    """
+    base_config = base_config or SessionConfig()
+    workers = workers or default_worker_count(len(profiles))
+    configs = {}
+    for profile in profiles:
+        overrides = {key: value for key, value in profile.items() if key != "name"}
+        overrides.setdefault("journal_path", None)  # Each profile journals into its own directory
+        # One port or textfile cannot serve several workers; set them per profile in the manifest
+        overrides.setdefault("metrics_port", None)
+        overrides.setdefault("metrics_textfile", None)
+        if base_config.export_path and "export_path" not in overrides:
+            # Concurrent workers cannot share one inventory file; each gets its own
+            overrides["export_path"] = profile_export_path(base_config.export_path, profile["name"])
+        if "extension_id" in overrides:
+            overrides["dashboard_url"] = None  # Recomputed for the profile's extension ID
+        configs[profile["name"]] = dataclasses.replace(base_config, interactive=False, **overrides)
+
+    print(f"Running {len(profiles)} profiles with {workers} worker processes...")
+    attempts = {name: 0 for name in configs}
+    results = {}
+    pending = list(configs)
+    while pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            submitting, pending = pending, []
+            broken = False
+            for name in submitting:
+                if not broken:
+                    try:
+                        futures[executor.submit(worker, name, configs[name])] = name
+                        attempts[name] += 1
+                        continue
+                    except BrokenProcessPool:
+                        broken = True  # A worker died before every profile was submitted
+                pending.append(name)
+            while futures:
+                # Once the pool broke every future is done; collect them all, keeping
+                # the results of profiles that finished before it broke
+                done, _ = wait(futures, return_when=ALL_COMPLETED if broken else FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        result = {"name": name, "status": "failed", "deleted": 0, "skipped": 0,
+                                  "elapsed": 0.0, "error": "worker process died"}
+                    except Exception as e:
+                        result = {"name": name, "status": "failed", "deleted": 0, "skipped": 0,
+                                  "elapsed": 0.0, "error": f"{type(e).__name__}: {e}"}
+                    result["attempts"] = attempts[name]
+                    results[name] = result
+                    if result["status"] != "ok" and attempts[name] <= retries:
+                        print(f"[{name}] attempt {attempts[name]} failed ({result['error']}); retrying")
+                        # Continue from the failed attempt's journal instead of starting over
+                        configs[name] = dataclasses.replace(configs[name], resume=True)
+                        if not broken:
+                            try:
+                                futures[executor.submit(worker, name, configs[name])] = name
+                                attempts[name] += 1
+                                continue
+                            except BrokenProcessPool:
+                                broken = True  # Another worker died before its future was collected
+                        pending.append(name)
+                    else:
+                        print(f"[{name}] {result['status']}: {result['deleted']} deleted "
+                              f"in {result['elapsed']:.1f}s")
+    return [results[profile["name"]] for profile in profiles]
+
+
+def print_profile_report(results):
+    """Print a per-profile summary table and the totals."""
+    print("\n" + "=" * 60)
+    print(f"{'Profile':<20} {'Status':<8} {'Deleted':>8} {'Attempts':>9} {'Seconds':>9}")
+    for result in results:
+        print(f"{result['name'][:20]:<20} {result['status']:<8} {result['deleted']:>8} "
+              f"{result['attempts']:>9} {result['elapsed']:>9.1f}")
+        if result["status"] != "ok":
+            print(f"    error: {result['error']}")
+    print("-" * 60)
+    failed = sum(1 for result in results if result["status"] != "ok")
+    print(f"Total deleted: {sum(result['deleted'] for result in results)} "
+          f"across {len(results)} profiles ({failed} failed)")
+    print("=" * 60)
@@ -0,0 +1,429 @@
+"""
+DeletionSession: one deletion run against the TrueKey dashboard.
+"""
+
+import dataclasses
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from .config import SessionConfig
+from .instrumentation import StepTimer
+
+
+class DriverCreationError(Exception):
+    """Raised when the Chrome WebDriver could not be created."""
+
+
+class DashboardNotReadyError(Exception):
+    """Raised when the TrueKey dashboard did not become ready in time."""
+
+
+@dataclass
+class DeletionStats:
+    """
+    Structured result of a DeletionSession run.
+
+    Attributes:
+        deleted (int): Number of deleted login entries
+        mode (str): "ui" or "storage"
+        engine (str): Deletion engine used in UI mode
+        stale_retries (int): Stale element references that were re-resolved
+        skipped (int): Trash icons skipped after repeated errors
+        previously_deleted (int): Entries deleted by the interrupted run a
+            --resume run continued
+        elapsed (float): Wall time of the run in seconds
+        waits (dict): Per-step wait summary from the WaitEngine
+        steps (dict): Per-step timing percentiles from the StepTimer
+        counters (dict): Event counts from the StepTimer
+        locators (dict): Locator chosen per dashboard element and the
+            calibration timings of every candidate
+        selection (dict): Indexed and matching row counts and the patterns
+            of a --match/--exclude (or dry) run
+        export (dict): File, format, row count and extraction time of the
+            --export inventory
+        dialog (dict): Confirmation dialog mode learned by the webdriver
+            engine and its probe counts
+    """
+
+    deleted: int = 0
+    mode: str = "ui"
+    engine: str = "webdriver"
+    stale_retries: int = 0
+    skipped: int = 0
+    previously_deleted: int = 0
+    elapsed: float = 0.0
+    waits: dict = field(default_factory=dict)
+    steps: dict = field(default_factory=dict)
+    counters: dict = field(default_factory=dict)
+    locators: dict = field(default_factory=dict)
+    selection: dict = field(default_factory=dict)
+    export: dict = field(default_factory=dict)
+    dialog: dict = field(default_factory=dict)
+
+    def to_dict(self):
+        """Return the stats as a plain dict (e.g. for JSON output)."""
+        return asdict(self)
+
+
+class DeletionSession:
+    """
+    Delete TrueKey logins from the dashboard.
+
+    A session owns (or borrows) a Chrome WebDriver, loads the dashboard,
+    waits for it to become ready and runs the configured deletion mode and
+    engine. Passing an existing driver lets callers reuse one warm browser
+    across several runs; a driver created by the session is closed by
+    close() or when the session is used as a context manager. With
+    config.attach the session connects to the persistent browser managed by
+    truekey_deleter.browser instead of launching Chrome.
+
+    Args:
+        config (SessionConfig): Session settings (default: SessionConfig())
+        driver: Optional existing WebDriver to reuse
+        confirm (callable): Optional callback run once the dashboard is ready,
+            before anything is deleted; used for the interactive pause
+        confirm_purge (callable): Optional callback asked with the listed
+            records before --mode storage deletes records found without
+            storage_key_pattern; returns True to delete them
+
+    Example:
+        with DeletionSession(SessionConfig(headless=True, interactive=False)) as session:
+            stats = session.run()
+            print(stats.deleted)
+    """
+
+    def __init__(self, config=None, driver=None, confirm=None, confirm_purge=None):
+        self.config = config or SessionConfig()
+        self.driver = driver
+        self.confirm = confirm
+        self.confirm_purge = confirm_purge
+        self.waits = None
+        self.metrics = None
+        if self.config.metrics_port is not None or self.config.metrics_textfile:
+            from .metrics import DeletionMetrics
+
+            self.metrics = DeletionMetrics({"engine": self.config.engine, "mode": self.config.mode})
+        self.timer = StepTimer(self.metrics)
+        self._exporters = []
+        self._owns_driver = driver is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def start(self):
+        """
+        Create the Chrome driver if the session does not have one yet.
+
+        Raises:
+            DriverCreationError: If Chrome could not be started
+        """
+        if self.driver is not None:
+            return self.driver
+        config = self.config
+        try:
+            if config.attach:
+                self.driver = self._attach()
+            else:
+                from .chrome import create_chrome_driver
+
+                self.driver = create_chrome_driver(config.truekey_profile_dir, config.chrome_profile_path,
+                                                   config.extension_id, config.refresh_profile,
+                                                   config.sync_checksum, config.clone_strategy,
+                                                   config.copy_workers, config.headless,
+                                                   timer=self.timer)
+        except Exception as e:
+            raise DriverCreationError(str(e)) from e
+        self._owns_driver = True
+        return self.driver
+
+    def _attach(self):
+        """Start or reuse the persistent browser and attach a driver to it."""
+        from .browser import attach_chrome_driver, start_browser
+
+        config = self.config
+        with self.timer.step("browser_start"):
+            state = start_browser(config.truekey_profile_dir, config.debug_port, config.headless,
+                                  config.chrome_binary, profile_options=config.profile_options())
+        with self.timer.step("driver_creation"):
+            return attach_chrome_driver(state["port"])
+
+    def load_dashboard(self):
+        """
+        Open the dashboard and wait until it is ready.
+
+        Raises:
+            DashboardNotReadyError: If the readiness probe timed out in a
+                non-interactive session
+        """
+        from .dashboard import wait_for_dashboard_ready
+        from .locators import LocatorRegistry
+        from .waits import WaitEngine
+
+        config = self.config
+        self.waits = WaitEngine(self.driver, timeout=config.wait_timeout,
+                                poll_interval=config.poll_interval,
+                                locators=LocatorRegistry.from_schema(config.selectors_file))
+        with self.timer.step("dashboard_load"):
+            self.driver.get(config.dashboard_url)
+
+            # Wait for the dashboard to render its view toggle instead of a fixed sleep
+            ready = wait_for_dashboard_ready(self.driver, self.waits, config.ready_timeout)
+        if not ready:
+            print(f"The dashboard did not finish loading within {config.ready_timeout:g} seconds.")
+            if not config.interactive:
+                # Nobody can check the browser window, so fail fast
+                raise DashboardNotReadyError(
+                    f"TrueKey dashboard not ready at {config.dashboard_url}")
+        else:
+            with self.timer.step("locator_calibration"):
+                self.waits.locators.calibrate(self.driver, ["list_mode"])
+
+    def run(self):
+        """
+        Run the deletion.
+
+        Returns:
+            DeletionStats: Structured statistics of the run
+
+        Raises:
+            DriverCreationError: If Chrome could not be started
+            DashboardNotReadyError: If the dashboard did not become ready
+        """
+        started = time.perf_counter()
+        config = self.config
+        stats = DeletionStats(mode=config.mode, engine=config.engine)
+        self._start_exporters()
+        resuming = self._previous_run_state(stats)
+        if resuming and config.refresh_profile:
+            # The profile was already prepared by the interrupted run
+            self.config = config = dataclasses.replace(config, refresh_profile=False)
+
+        self.start()
+        self.load_dashboard()
+        if self.confirm is not None and not resuming:
+            with self.timer.step("confirm_pause"):
+                self.confirm()
+
+        if config.dry_run:
+            # Nothing is deleted, so an interrupted run's journal stays as it is
+            self._delete(stats, None, resuming)
+        else:
+            from .journal import DeletionJournal, default_journal_path
+
+            journal_path = config.journal_path or default_journal_path(config.truekey_profile_dir)
+            with DeletionJournal(journal_path, config.journal_fsync, resume=resuming) as journal:
+                def on_deleted(identifier):
+                    journal.record_deleted(identifier)
+                    self.timer.count("deleted")
+
+                journal.start(mode=config.mode, engine=config.engine, resumed=resuming)
+                self._delete(stats, on_deleted, resuming)
+                journal.finish(stats.previously_deleted + stats.deleted)
+
+        stats.waits = self.waits.summary()
+        stats.steps = self.timer.summary()
+        stats.counters = dict(self.timer.counters)
+        stats.locators = self.waits.locators.summary()
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    def _start_exporters(self):
+        """Start the metrics endpoint and textfile writer requested by the config."""
+        if self.metrics is None or self._exporters:
+            return
+        from .metrics import MetricsServer, TextfileWriter
+
+        config = self.config
+        if config.metrics_port is not None:
+            try:
+                self._exporters.append(MetricsServer(self.metrics, config.metrics_port).start())
+            except OSError as e:
+                # Metrics are an aid; a busy port must not stop the deletion
+                print(f"Could not serve metrics on port {config.metrics_port}: {e}")
+        if config.metrics_textfile:
+            self._exporters.append(TextfileWriter(self.metrics, config.metrics_textfile).start())
+
+    def _previous_run_state(self, stats):
+        """
+        Read the journal of an interrupted run when resuming.
+
+        Returns:
+            bool: True if an unfinished run is continued
+        """
+        config = self.config
+        if not config.resume:
+            return False
+        from .journal import default_journal_path, read_journal
+
+        state = read_journal(config.journal_path or default_journal_path(config.truekey_profile_dir))
+        if not state["runs"] or state["finished"]:
+            print("No interrupted run found in the journal; starting a new run.")
+            return False
+        stats.previously_deleted = state["deleted"]
+        print(f"Resuming interrupted run: {state['deleted']} entries were already deleted.")
+        return True
+
+    def _delete(self, stats, on_deleted, resuming=False):
+        """Run the configured deletion mode and engine, filling in `stats`."""
+        config = self.config
+        timer = self.timer
+        from .filters import RowFilter
+
+        row_filter = RowFilter(config.match_patterns, config.exclude_patterns)
+        export = config.export_path and not (resuming and os.path.exists(config.export_path))
+        if config.export_path and not export:
+            # The interrupted run already saved the full inventory; keep it
+            print(f"Keeping the existing export {config.export_path}.")
+        if config.mode == "storage":
+            from .storage import list_storage_logins, purge_extension_storage
+
+            if export:
+                with self._export_logins(stats) as exporter:
+                    exporter.write(list_storage_logins(self.driver, config.storage_key_pattern))
+
+            # Remove login records through the extension's own storage instead of the UI
+            print("Starting extension storage purge...")
+            with timer.step("deletion"):
+                stats.deleted = purge_extension_storage(self.driver, config.batch_size,
+                                                        config.storage_key_pattern, config.dry_run,
+                                                        on_deleted, row_filter, self.confirm_purge)
+            return
+
+        from .dashboard import switch_to_list_view
+        from .engines import delete_with_cdp, delete_with_javascript, delete_with_webdriver
+
+        # Switch to list view so every login entry is visible for deletion
+        with timer.step("list_mode"):
+            rendered = switch_to_list_view(self.driver, self.waits)
+        if not rendered:
+            if not config.interactive:
+                # A half-loaded list would be reported as an empty vault
+                raise DashboardNotReadyError(
+                    f"TrueKey list view did not render at {config.dashboard_url}")
+            print("Continuing anyway - some entries might not be visible.")
+        from .rows import RowStream
+        from .waits import DialogTracker
+
+        if export:
+            with self._export_logins(stats) as exporter:
+                # One in-page call per rendered window; scroll until the list ends
+                exporter.refresh()
+                export_rows = RowStream(self.driver, exporter.row_locator, config.scroll_settle,
+                                        config.poll_interval, timer=timer, index=exporter)
+                export_rows.locate_container()
+                while export_rows.load_more():
+                    pass
+                # Start the deletion at the top; a virtualized list only shows the window it is scrolled to
+                export_rows.rewind()
+
+        index = None
+        if row_filter or config.dry_run:
+            from .filters import RowIndex
+
+            # Read every rendered row's metadata in one call and tag the rows to delete
+            index = RowIndex(self.driver, row_filter)
+            with timer.step("row_index"):
+                index.refresh()
+            trash_locator = index.locator
+        else:
+            if config.engine == "webdriver":
+                # The in-page engines use their own CSS selectors; only the
+                # WebDriver loop repeats these lookups for every row
+                with timer.step("locator_calibration"):
+                    self.waits.locators.calibrate(self.driver, ["trash_icon"])
+                self.waits.locators.print_report()
+            trash_locator = self.waits.locators.get("trash_icon")
+        rows = RowStream(self.driver, trash_locator, config.scroll_settle, config.poll_interval,
+                         timer=timer, index=index)
+
+        if config.dry_run:
+            # Scroll through the whole list so the preview covers every row
+            rows.locate_container()
+            with timer.step("row_index"):
+                while rows.load_more():
+                    pass
+            index.print_preview()
+            stats.selection = index.summary()
+            print("Dry run: no logins were deleted.")
+            return
+        if index is not None:
+            print(f"{len(index.selected)} of {index.indexed} rendered login rows match the filter.")
+        if resuming:
+            remaining = len(self.driver.find_elements(*trash_locator))
+            print(f"{remaining} entries remain on the dashboard.")
+
+        print(f"Starting automated deletion process ({config.engine} engine)...")
+        loop_stats = {}
+
+        def delete_rendered_rows():
+            if config.engine == "js":
+                return delete_with_javascript(self.driver, config.batch_size, config.wait_timeout,
+                                              on_deleted, timer, loop_stats)
+            if config.engine == "cdp":
+                return delete_with_cdp(self.driver, config.wait_timeout, loop_stats,
+                                       on_deleted=on_deleted, timer=timer)
+            from .pipeline import delete_with_pipeline
+
+            return delete_with_pipeline(self.driver, config.pipeline_depth, config.wait_timeout,
+                                        loop_stats, on_deleted, timer)
+
+        with timer.step("deletion"):
+            if config.engine == "webdriver":
+                dialogs = DialogTracker(config.dialog_learn)
+                stats.deleted = delete_with_webdriver(self.driver, self.waits, loop_stats,
+                                                      on_deleted=on_deleted, timer=timer, rows=rows,
+                                                      dialogs=dialogs,
+                                                      verify=index.verify if index is not None else None)
+                stats.dialog = dialogs.summary()
+            else:
+                # The in-page engines only see the rendered rows; scroll for more and go again
+                rows.locate_container()
+                stats.deleted = delete_rendered_rows()
+                rows.offset = loop_stats.get("skipped", 0)
+                while rows.load_more():
+                    stats.deleted += delete_rendered_rows()
+                    rows.offset = loop_stats.get("skipped", 0)
+        stats.stale_retries = loop_stats.get("stale_retries", 0)
+        stats.skipped = loop_stats.get("skipped", 0)
+        if index is not None:
+            stats.selection = index.summary()
+
+    @contextmanager
+    def _export_logins(self, stats):
+        """Export the logins under the "export" step and report the result."""
+        from .export import LoginExporter
+
+        config = self.config
+        with self.timer.step("export"):
+            with LoginExporter(self.driver, config.export_path, self.timer) as exporter:
+                yield exporter
+        stats.export = exporter.summary()
+        print(f"Exported {exporter.rows} logins to {config.export_path} "
+              f"({exporter.extract_seconds:.2f}s reading the dashboard).")
+
+    def close(self):
+        """
+        Quit the driver if this session created it.
+
+        In attach mode only the WebDriver session ends; the persistent
+        browser keeps running. Metrics exporters are stopped, which writes
+        the final metrics textfile.
+        """
+        while self._exporters:
+            self._exporters.pop().stop()
+        if self.driver is not None and self._owns_driver:
+            try:
+                self.driver.quit()
+                if self.config.attach:
+                    print("Detached from the persistent browser.")
+                else:
+                    print("Browser closed successfully.")
+            except Exception as e:
+                print(f"Error during cleanup: {e}")
+        self.driver = None
@@ -0,0 +1,148 @@
+"""
+Storage purge mode: delete login records through the extension's storage.
+"""
+
+
+# In-page listing of the login records kept in the extension's storage. Runs in
+# the dashboard's chrome-extension:// context, where the extension's
+# chrome.storage API is available. A record is any top-level key matching the
+# given pattern or, without a pattern, any object that carries both a site
+# field (url, website, domain or site) and a username field.
+JS_LIST_STORAGE_LOGINS_SCRIPT = """
+var keyPattern = arguments[0] ? new RegExp(arguments[0]) : null;
+var done = arguments[arguments.length - 1];
+var siteFields = ['url', 'website', 'domain', 'site'];
+var userFields = ['username', 'login', 'email', 'user'];
+var lastUsedFields = ['lastUsed', 'last_used', 'lastLogin', 'lastAccessed'];
+
+function pick(value, fields) {
+    for (var i = 0; i < fields.length; i++) {
+        if (typeof value[fields[i]] === 'string') { return value[fields[i]]; }
+    }
+    return null;
+}
+
+function lastUsed(value) {
+    for (var i = 0; i < lastUsedFields.length; i++) {
+        var field = value[lastUsedFields[i]];
+        if (typeof field === 'number') { return new Date(field).toISOString(); }
+        if (typeof field === 'string') { return field; }
+    }
+    return null;
+}
+
+if (!window.chrome || !chrome.storage || !chrome.storage.local) {
+    done({error: 'chrome.storage is not available on this page', records: []});
+    return;
+}
+
+chrome.storage.local.get(null, function (items) {
+    if (chrome.runtime && chrome.runtime.lastError) {
+        done({error: chrome.runtime.lastError.message, records: []});
+        return;
+    }
+    var records = [];
+    Object.keys(items).sort().forEach(function (key) {
+        var value = items[key];
+        var isObject = value !== null && typeof value === 'object';
+        var site = isObject ? pick(value, siteFields) : null;
+        var username = isObject ? pick(value, userFields) : null;
+        var matches = keyPattern ? keyPattern.test(key) : (site !== null && username !== null);
+        if (matches) {
+            records.push({key: key, site: site, username: username,
+                          last_used: isObject ? lastUsed(value) : null});
+        }
+    });
+    done({error: null, records: records});
+});
+"""
+
+
+# In-page removal of a batch of storage keys
+JS_REMOVE_STORAGE_KEYS_SCRIPT = """
+var keys = arguments[0];
+var done = arguments[arguments.length - 1];
+chrome.storage.local.remove(keys, function () {
+    var error = chrome.runtime && chrome.runtime.lastError ? chrome.runtime.lastError.message : null;
+    done({error: error, removed: error ? 0 : keys.length});
+});
+"""
+
+
+def list_storage_logins(driver, key_pattern=None):
+    """
+    List the login records stored in the extension's storage.
+    
+    Args:
+        driver: Selenium WebDriver instance showing the extension dashboard
+        key_pattern (str): Optional regular expression selecting record keys
+    
+    Returns:
+        list: Records as dicts with "key", "site", "username" and "last_used"
+        (ISO 8601 when stored as a timestamp)
+    
+    Raises:
+        Exception: If the extension storage cannot be read
+    """
+    result = driver.execute_async_script(JS_LIST_STORAGE_LOGINS_SCRIPT, key_pattern)
+    if result.get("error"):
+        raise Exception(f"Could not read extension storage: {result['error']}")
+    return result.get("records", [])
+
+
+def purge_extension_storage(driver, batch_size=50, key_pattern=None, dry_run=False, on_deleted=None,
+                            row_filter=None, confirm=None):
+    """
+    Delete login records directly from the extension's storage.
+    
+    The records are always listed first. With dry_run nothing is deleted;
+    otherwise the records are removed in batches of `batch_size` keys.
+    Without `key_pattern` the records are only guessed from their fields,
+    so they are deleted only once `confirm` accepts the listed records.
+    
+    Args:
+        driver: Selenium WebDriver instance showing the extension dashboard
+        batch_size (int): Number of keys removed per storage call
+        key_pattern (str): Optional regular expression selecting record keys
+        dry_run (bool): Only list the records that would be deleted
+        on_deleted (callable): Called with the storage key of every deleted record
+        row_filter (RowFilter): Optional --match/--exclude patterns applied to
+            the records' site and username
+        confirm (callable): Called with the listed records when there is no
+            `key_pattern`; deletes them only if it returns True. Without it
+            such records are never deleted
+    
+    Returns:
+        int: Number of deleted login records
+    """
+    records = list_storage_logins(driver, key_pattern)
+    if row_filter:
+        records = [record for record in records if row_filter.matches(record)]
+    
+    print(f"Found {len(records)} login records in extension storage:")
+    for record in records:
+        print(f"  {record['key']}: {record.get('site') or '-'} ({record.get('username') or '-'})")
+    
+    if dry_run:
+        print("Dry run: no records were deleted.")
+        return 0
+    
+    if records and key_pattern is None and (confirm is None or not confirm(records)):
+        print("Not deleting records that were only detected by their fields. Check the list above "
+              "and confirm it interactively, or select the records with --storage-key-pattern.")
+        return 0
+    
+    deletion_count = 0
+    for start in range(0, len(records), batch_size):
+        keys = [record["key"] for record in records[start:start + batch_size]]
+        result = driver.execute_async_script(JS_REMOVE_STORAGE_KEYS_SCRIPT, keys)
+        if result.get("error"):
+            print(f"Could not delete batch: {result['error']}")
+            break
+        deletion_count += result.get("removed", 0)
+        if on_deleted is not None:
+            for key in keys:
+                on_deleted(key)
+        print(f"Deleted {deletion_count} of {len(records)} records")
+    
+    return deletion_count
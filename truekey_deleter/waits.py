@@ -0,0 +1,235 @@
+"""
+Condition-driven waits for the TrueKey dashboard.
+"""
+
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .locators import LocatorRegistry
+
+# Text of a trash icon's row (as indexed by filters.RowIndex), or null once
+# the icon left the DOM
+ROW_LABEL_SCRIPT = """
+var icon = arguments[0];
+if (!icon.isConnected) { return null; }
+var row = icon.closest('tr, li, [class*="row"], [class*="item"]') || icon.parentNode;
+return ((row && row.textContent) || '').replace(/\\s+/g, ' ').trim().slice(0, 200);
+"""
+
+
+class WaitEngine:
+    """
+    Condition-driven waits for the TrueKey dashboard.
+
+    Instead of sleeping for a fixed amount of time after every action, each
+    step waits on an explicit DOM condition (element present, dialog visible,
+    deleted row gone stale) and returns as soon as the condition holds. Every
+    wait is timed per step so the run can report how much idle time was saved
+    compared to the fixed sleeps the script used to rely on.
+
+    Args:
+        driver: Selenium WebDriver instance to poll
+        timeout (float): Maximum seconds to wait for a single condition
+        poll_interval (float): Seconds between condition checks
+        locators (LocatorRegistry): Locators of the dashboard elements
+            (default: the reference locators from config)
+
+    Attributes:
+        step_times (dict): Mapping of step name to the list of wait durations
+    """
+
+    # Fixed sleeps the previous implementation used for each step. Only used
+    # to report the latency saved by waiting on conditions instead.
+    LEGACY_SLEEP_BUDGET = {
+        "dashboard_load": 3.0,
+        "list_mode": 2.0,
+        "delete_click": 1.0,
+        "confirm_click": 1.0,
+    }
+
+    def __init__(self, driver, timeout=10.0, poll_interval=0.1, locators=None):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.locators = locators or LocatorRegistry()
+        self.step_times = {}
+
+    def wait(self, step, condition, timeout=None):
+        """
+        Wait until a condition is truthy and record the time spent.
+
+        Args:
+            step (str): Step name the wait time is recorded under
+            condition (callable): Expected condition taking the driver
+            timeout (float): Optional override of the default timeout
+
+        Returns:
+            The truthy value returned by the condition
+
+        Raises:
+            TimeoutException: If the condition does not hold within the timeout
+        """
+        wait = WebDriverWait(self.driver,
+                             self.timeout if timeout is None else timeout,
+                             poll_frequency=self.poll_interval)
+        started = time.perf_counter()
+        try:
+            return wait.until(condition)
+        finally:
+            self.step_times.setdefault(step, []).append(time.perf_counter() - started)
+
+    def until_present(self, step, locator, timeout=None):
+        """Wait until at least one element matching the locator is in the DOM."""
+        return self.wait(step, EC.presence_of_element_located(locator), timeout)
+
+    def until_visible(self, step, locator, timeout=None):
+        """Wait until an element matching the locator is displayed."""
+        return self.wait(step, EC.visibility_of_element_located(locator), timeout)
+
+    def row_label(self, element):
+        """
+        Read the text of a trash icon's row.
+
+        Raises:
+            StaleElementReferenceException: If the icon left the DOM
+        """
+        label = self.driver.execute_script(ROW_LABEL_SCRIPT, element)
+        if label is None:
+            raise StaleElementReferenceException("the row left the DOM")
+        return label
+
+    def until_row_removed(self, step, element, label=None, timeout=None):
+        """
+        Wait until a deleted row is gone from the dashboard.
+
+        The row counts as removed once its element is stale. With the row's
+        text given, it also counts as removed once the row shows other text,
+        which is how a virtualized list that reuses row nodes deletes it.
+        """
+        return self.wait(step, removal_condition(element, label), timeout)
+
+    def until_dialog_or_removed(self, step, element, label=None, timeout=None):
+        """Wait until either the confirmation dialog appears or the row is removed."""
+        dialog = EC.visibility_of_element_located(self.locators.get("confirm_button"))
+        return self.wait(step, EC.any_of(dialog, removal_condition(element, label)), timeout)
+
+    def summary(self):
+        """
+        Summarize the recorded waits per step.
+
+        Returns:
+            dict: Step name mapped to count, total seconds, average seconds and
+            the legacy sleep budget for the same number of steps
+        """
+        summary = {}
+        for step, durations in self.step_times.items():
+            total = sum(durations)
+            summary[step] = {
+                "count": len(durations),
+                "total": total,
+                "average": total / len(durations),
+                "legacy_budget": self.LEGACY_SLEEP_BUDGET.get(step, 0.0) * len(durations),
+            }
+        return summary
+
+    def print_report(self):
+        """Print per-step wait times and the latency saved against fixed sleeps."""
+        summary = self.summary()
+        if not summary:
+            return
+        print("\n" + "="*60)
+        print("WAIT TIME REPORT:")
+        print("="*60)
+        waited = budget = 0.0
+        for step, stats in summary.items():
+            waited += stats["total"]
+            budget += stats["legacy_budget"]
+            print(f"{step:<16} {stats['count']:>6} waits  {stats['total']:>9.2f}s total  "
+                  f"{stats['average']:>7.3f}s avg  (fixed sleeps: {stats['legacy_budget']:.2f}s)")
+        print(f"Total waited: {waited:.2f}s vs {budget:.2f}s of fixed sleeps "
+              f"(saved {budget - waited:.2f}s)")
+        print("="*60)
+
+
+class DialogTracker:
+    """
+    Learn whether the dashboard confirms deletions with a dialog.
+
+    The WebDriver loop probes for both outcomes of every trash click (the
+    dialog appears or the row goes) until `learn_after` deletions in a row
+    agree. It then waits for the learned outcome only: "always" polls just
+    for the confirm button, "never" just for the row's removal and no
+    longer looks up the confirm button. A wait for the learned outcome that
+    times out means the dashboard changed, and probing starts again.
+
+    Args:
+        learn_after (int): Agreeing deletions before the fast path is taken;
+            0 probes after every click
+
+    Attributes:
+        mode (str): "probe", "always" or "never"
+        probes (int): Deletions that were probed
+        relearned (int): Times a contradicting outcome restarted probing
+    """
+
+    def __init__(self, learn_after=3):
+        self.learn_after = learn_after
+        self.mode = "probe"
+        self.probes = 0
+        self.relearned = 0
+        self._streak = 0
+        self._last = None
+
+    def observe(self, dialog):
+        """
+        Record the outcome of a probed deletion.
+
+        Args:
+            dialog (bool): Whether the confirmation dialog appeared
+        """
+        self.probes += 1
+        self._streak = self._streak + 1 if dialog == self._last else 1
+        self._last = dialog
+        if self.learn_after > 0 and self._streak >= self.learn_after:
+            self.mode = "always" if dialog else "never"
+            print(f"The dashboard {'always' if dialog else 'never'} asks for confirmation; "
+                  f"no longer probing for the dialog.")
+
+    def relearn(self):
+        """Go back to probing after an outcome the learned mode did not expect."""
+        self.mode = "probe"
+        self._streak = 0
+        self._last = None
+        self.relearned += 1
+        print("The confirmation dialog behaved differently; probing for it again.")
+
+    def summary(self):
+        """Return the learned mode and probe counts for the run report."""
+        return {"mode": self.mode, "learn_after": self.learn_after, "probes": self.probes,
+                "relearned": self.relearned}
+
+
+def removal_condition(element, label=None):
+    """
+    Expected condition: a row is removed from the dashboard.
+
+    Args:
+        element: WebElement of the row's trash icon
+        label (str): Row text before the deletion; when given, a row showing
+            other text counts as removed too
+
+    Returns:
+        callable: Condition usable with WebDriverWait; returns True
+    """
+    if label is None:
+        return EC.staleness_of(element)
+
+    def _predicate(driver):
+        try:
+            return driver.execute_script(ROW_LABEL_SCRIPT, element) != label
+        except StaleElementReferenceException:
+            return True
+    return _predicate